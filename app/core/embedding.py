@@ -2,8 +2,14 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import os
+import sys
+import time
 import importlib
+import threading
 from typing import Any, Dict
+from app.utils.diagnostics import logger
+from app.utils.memory import trim_heap
+from app.utils.metrics import metrics
 
 class EmbeddingModel:
     """
@@ -76,24 +82,98 @@ def get_embedding(text: str, config: Dict[str, Any]) -> Any:
 
 
 class EmbeddingEngine:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    """
+    Lazy-loading wrapper around the sentence transformer. With `idle_timeout`
+    (seconds) the model is unloaded once no encode has run for that long and
+    reloaded transparently by the next one. `torch_threads` caps intra-op
+    threads (0 keeps torch's default of one per core).
+    """
+    def __init__(self, model_name='all-MiniLM-L6-v2', model=None, idle_timeout=0.0, torch_threads=0):
         self.model_name = model_name
-        self._model = None  # Lazy load
+        self._model = model  # Lazy load unless a model object is injected (e.g. a benchmark stub)
+        self._injected = model is not None
+        self.idle_timeout = idle_timeout
+        self.torch_threads = torch_threads
+        self._lock = threading.Lock()
+        self._active = 0  # Encodes in flight; the model is never unloaded under them
+        self._last_used = time.monotonic()
+        self._reaper = None
+        self._loaded = metrics.gauge("embedding_model_loaded", "1 while the embedding model is resident")
+        self._loaded.set(1 if model is not None else 0)
 
     @property
     def model(self):
+        with self._lock:
+            return self._load_locked()
+
+    def _load_locked(self):
         if self._model is None:
-            self._model = SentenceTransformer(self.model_name)
+            if self.torch_threads:
+                import torch
+                torch.set_num_threads(self.torch_threads)
+            with metrics.timer("model_load_seconds", "Time to load the embedding model"):
+                self._model = SentenceTransformer(self.model_name)
+            self._loaded.set(1)
+            self._last_used = time.monotonic()
+            if self.idle_timeout and (self._reaper is None or not self._reaper.is_alive()):
+                self._reaper = threading.Thread(target=self._reap, name="SLAM-ModelReaper", daemon=True)
+                self._reaper.start()
         return self._model
 
+    @property
+    def dimension(self) -> int:
+        model = self.model
+        if hasattr(model, "get_sentence_embedding_dimension"):
+            return model.get_sentence_embedding_dimension()
+        return len(self.encode(""))
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def unload(self) -> bool:
+        """Drops the model unless an encode is running; returns True if memory was released."""
+        with self._lock:
+            if self._model is None or self._injected or self._active:
+                return False
+            self._model = None
+            self._loaded.set(0)
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        trim_heap()
+        logger.info(f"Embedding model {self.model_name} unloaded")
+        return True
+
+    def _reap(self):
+        # Lives only while the model is loaded; the next load starts a new one
+        while True:
+            with self._lock:
+                if self._model is None:
+                    return
+                idle = time.monotonic() - self._last_used
+            if idle >= self.idle_timeout and self.unload():
+                return
+            time.sleep(min(30.0, max(1.0, self.idle_timeout - idle)))
+
     def encode(self, text):
         """
         Encode a single string or a list of strings.
         Uses batch encoding for lists for better performance.
         """
-        if isinstance(text, list):
-            return self.model.encode(text, normalize_embeddings=True)
-        return self.model.encode([text], normalize_embeddings=True)[0]
+        texts = text if isinstance(text, list) else [text]
+        with self._lock:
+            model = self._load_locked()
+            self._active += 1
+        try:
+            with metrics.timer("encode_seconds", "Latency of one EmbeddingEngine.encode call"):
+                vectors = model.encode(texts, normalize_embeddings=True)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_used = time.monotonic()
+        metrics.counter("encoded_texts_total", "Texts embedded").inc(len(texts))
+        return vectors if isinstance(text, list) else vectors[0]
 
     def save_embeddings(self, embeddings, file_path):
         """Save embeddings (numpy array) to disk."""
@@ -106,7 +186,13 @@ class EmbeddingEngine:
         return np.load(file_path)
 
     def switch_model(self, model_name):
-        """Switch to a different sentence transformer model at runtime."""
+        """
+        Switch to a different sentence transformer model at runtime. Stored
+        vectors are not touched; with an existing index use `ReembedMigration`.
+        """
         if model_name != self.model_name:
-            self.model_name = model_name
-            self._model = SentenceTransformer(model_name)
\ No newline at end of file
+            with self._lock:
+                self.model_name = model_name
+                self._model = None
+                self._injected = False
+                self._load_locked()
\ No newline at end of file
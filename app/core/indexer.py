@@ -1,10 +1,55 @@
 
 import queue
 import threading
+from collections import deque
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
 
+class _Deferred:
+    __slots__ = ("item",)
+
+    def __init__(self, item):
+        self.item = item
+
+
+class TieredQueue(queue.Queue):
+    """
+    Index queue with a low-priority lane for deferred work (the remaining
+    page ranges of large documents). New files always go first; one
+    deferred item is let through after every `LOW_EVERY` files so a steady
+    stream of small files cannot stall a half-indexed document forever.
+    """
+    LOW_EVERY = 8
+
+    def _init(self, maxsize):
+        self.queue = deque()
+        self.low = deque()
+        self._since_low = 0
+
+    def _qsize(self):
+        return len(self.queue) + len(self.low)
+
+    def _put(self, item):
+        if isinstance(item, _Deferred):
+            self.low.append(item.item)
+        else:
+            self.queue.append(item)
+
+    def _get(self):
+        if self.low and (not self.queue or self._since_low >= self.LOW_EVERY):
+            self._since_low = 0
+            return self.low.popleft()
+        self._since_low += 1
+        return self.queue.popleft()
+
+    def put_low(self, item):
+        self.put(_Deferred(item))
+
+    def deferred(self) -> int:
+        with self.mutex:
+            return len(self.low)
+
 
 class IndexWorker(threading.Thread):
     """
@@ -29,7 +74,7 @@ class IndexWorker(threading.Thread):
                 if path:
                     # Sharding: Only process files assigned to this shard
                     if self.shard_id is not None and self.total_shards > 1:
-                        if (hash(path) % self.total_shards) != self.shard_id:
+                        if (hash(getattr(path, "path", path)) % self.total_shards) != self.shard_id:
                             self.q.task_done()
                             continue
                     self.process_func(path)
@@ -71,15 +116,15 @@ class WatcherHandler(FileSystemEventHandler):
             self.seen.add(event.src_path)
 
     def on_deleted(self, event):
-        # Optionally handle deletions for real-time index cleanup
-        if not event.is_directory and event.src_path in self.seen:
-            self.seen.remove(event.src_path)
-            # Could trigger index removal here
+        # The worker sees the path is gone and drops it from the index
+        if not event.is_directory:
+            self.seen.discard(event.src_path)
+            self.q.put(event.src_path)
 
     def on_moved(self, event):
-        # Handle file moves/renames for real-time updates
+        # Handle file moves/renames for real-time updates: old path is removed, new one indexed
         if not event.is_directory:
-            if event.src_path in self.seen:
-                self.seen.remove(event.src_path)
+            self.seen.discard(event.src_path)
+            self.q.put(event.src_path)
             self.q.put(event.dest_path)
             self.seen.add(event.dest_path)
\ No newline at end of file
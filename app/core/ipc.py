@@ -0,0 +1,334 @@
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import types
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.utils.diagnostics import logger
+
+# Newline-delimited JSON over a Unix socket (loopback TCP where AF_UNIX is missing):
+#   -> {"id": 1, "method": "search", "params": {"query": "...", "n": 10}, "token": "..."}
+#   <- {"id": 1, "result": [...]}  or  {"id": 1, "error": {"type": "...", "message": "..."}}
+# Handlers returning a generator are streamed: {"id": 1, "item": ...} per item, then {"id": 1, "end": true}
+# Every request carries the per-install token from TOKEN_FILE (owner-only, next to the socket);
+# a request without the right token gets an "Unauthorized" error and the connection is closed.
+DEFAULT_SOCKET = os.path.join("slam_db", "slam.sock")
+DEFAULT_TCP = ("127.0.0.1", 47653)
+TOKEN_FILE = "ipc.token"
+
+Address = Union[str, Tuple[str, int]]
+
+
+class IPCError(RuntimeError):
+    """Raised by the client when the daemon reports an error for a call."""
+    def __init__(self, kind: str, message: str):
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+
+
+def resolve_address(address: str = "") -> Address:
+    """
+    "" -> platform default, "host:port" -> TCP, anything else -> Unix socket
+    path. TCP is loopback-only: any other host raises ValueError.
+    """
+    if not address:
+        return DEFAULT_SOCKET if hasattr(socket, "AF_UNIX") else DEFAULT_TCP
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        host = host.strip("[]") or "127.0.0.1"
+        if not _loopback(host):
+            raise ValueError(f"IPC over TCP is limited to loopback addresses, not {host}")
+        return host, int(port)
+    return address
+
+
+def _loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def token_path(address: Address) -> str:
+    """The token file: beside the Unix socket, or in the default socket's folder for TCP."""
+    folder = os.path.dirname(address) if isinstance(address, str) else os.path.dirname(DEFAULT_SOCKET)
+    return os.path.join(folder or ".", TOKEN_FILE)
+
+
+def load_token(address: Address, create: bool = False) -> Optional[str]:
+    """Reads the install's IPC token; with `create`, writes a new owner-only one if there is none."""
+    path = token_path(address)
+    try:
+        with open(path) as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    if not create:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    token = secrets.token_hex(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+
+# --- 🛰️ Server ---
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                self._send({"id": None, "error": {"type": "BadRequest", "message": "invalid JSON"}})
+                continue
+            if not hmac.compare_digest(str(request.get("token") or ""), self.server.token):
+                self._send({"id": request.get("id"), "error": {"type": "Unauthorized", "message": "missing or wrong IPC token"}})
+                return
+            self.server.dispatch(request, self._send)
+
+    def _send(self, response: Dict):
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+        self.wfile.flush()
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _ThreadingTCP6Server(_ThreadingTCPServer):
+    address_family = socket.AF_INET6
+
+
+class IPCServer:
+    """
+    Serves `handlers` ({method: callable(**params)}) to local clients, one
+    thread per connection. The Unix socket is created owner-only, and every
+    request must present the install's token (see `load_token`).
+    """
+    def __init__(self, handlers: Dict[str, Callable[..., Any]], address: str = ""):
+        self.handlers = handlers
+        self.address = resolve_address(address)
+        token = load_token(self.address, create=True)
+        os.chmod(token_path(self.address), 0o600)
+        if isinstance(self.address, str):
+            os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+            if os.path.exists(self.address):
+                if _alive(self.address):
+                    raise OSError(f"Another SLAM daemon is listening on {self.address}")
+                os.unlink(self.address)  # Stale socket from a crashed daemon
+            old_umask = os.umask(0o177)
+            try:
+                self._server = _ThreadingUnixServer(self.address, _Handler)
+            finally:
+                os.umask(old_umask)
+        else:
+            server = _ThreadingTCP6Server if ":" in self.address[0] else _ThreadingTCPServer
+            self._server = server(self.address, _Handler)
+        self._server.dispatch = self.dispatch
+        self._server.token = token
+        self._thread = None
+
+    def dispatch(self, request: Dict, send: Callable[[Dict], None]):
+        req_id = request.get("id")
+        handler = self.handlers.get(request.get("method"))
+        if handler is None:
+            send({"id": req_id, "error": {"type": "UnknownMethod", "message": str(request.get("method"))}})
+            return
+        try:
+            result = handler(**(request.get("params") or {}))
+            if isinstance(result, types.GeneratorType):
+                for item in result:
+                    send({"id": req_id, "item": item})
+                send({"id": req_id, "end": True})
+            else:
+                send({"id": req_id, "result": result})
+        except OSError:
+            raise  # Client went away; drop the connection
+        except Exception as e:
+            logger.error(f"IPC {request.get('method')} failed: {e}")
+            send({"id": req_id, "error": {"type": type(e).__name__, "message": str(e)}})
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="SLAM-IPC", daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+def _alive(path: str) -> bool:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+# --- 📡 Client ---
+
+class IPCClient:
+    """Blocking client with one persistent connection; safe to share between threads."""
+    def __init__(self, address: str = "", timeout: Optional[float] = 300.0):
+        self.address = resolve_address(address)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+        self._token = None
+        self._next_id = 0
+
+    def _connect(self):
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+        else:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._sock, self._file = sock, sock.makefile("rb")
+        # Read per connection: an autostarted daemon writes it on first start
+        self._token = load_token(self.address)
+
+    def call(self, method: str, **params) -> Any:
+        """Returns the result; a streamed result is collected into a list."""
+        items = []
+        for response in self._exchange(method, params):
+            if "item" in response:
+                items.append(response["item"])
+            elif not response.get("end"):
+                return response["result"]
+        return items
+
+    def stream(self, method: str, **params) -> Iterator[Any]:
+        """Yields the items of a streamed result as they arrive."""
+        for response in self._exchange(method, params):
+            if "item" in response:
+                yield response["item"]
+            elif response.get("end"):
+                return
+            else:
+                yield response["result"]
+                return
+
+    def _exchange(self, method: str, params: Dict) -> Iterator[Dict]:
+        # The connection is held for the whole (possibly streamed) response
+        with self._lock:
+            self._next_id += 1
+            request = {"id": self._next_id, "method": method, "params": params}
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(json.dumps({**request, "token": self._token}).encode() + b"\n")
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("daemon closed the connection")
+                    break
+                except OSError:
+                    # One reconnect covers a restarted daemon; a second failure is real
+                    self._close_locked()
+                    if attempt:
+                        raise
+            finished = False
+            try:
+                while True:
+                    response = json.loads(line)
+                    if "error" in response:
+                        finished = True
+                        raise IPCError(response["error"]["type"], response["error"]["message"])
+                    finished = "item" not in response
+                    yield response
+                    if finished:
+                        return
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("daemon closed the connection mid-stream")
+            finally:
+                if not finished:
+                    # Abandoned mid-stream: the rest of the reply is still in flight
+                    self._close_locked()
+
+    def ping(self) -> bool:
+        try:
+            return self.call("ping") == "pong"
+        except IPCError as e:
+            if e.kind == "Unauthorized":
+                raise  # A daemon is running but won't talk to us; starting another won't help
+            return False
+        except OSError:
+            return False
+
+    def _close_locked(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+
+class SLAMClient(IPCClient):
+    """Thin-client view of the daemon with the same search API as the in-process backend."""
+    config = None
+
+    def search(self, query: str, n: int = 10) -> List[Dict]:
+        return self.call("search", query=query, n=n)
+
+    def search_batch(self, queries: List[str], n: int = 10) -> Iterator[Dict]:
+        """Streams {"index", "results"} per query as the daemon answers them."""
+        return self.stream("search_batch", queries=queries, n=n)
+
+    def status(self) -> Dict:
+        return self.call("status")
+
+    def enqueue(self, paths: List[str]) -> int:
+        return self.call("enqueue", paths=paths)
+
+    def snippet(self, chunk_id: str) -> Optional[str]:
+        return self.call("snippet", chunk_id=chunk_id)
+
+    def warm(self) -> bool:
+        return self.call("warm")
+
+    def switch_model(self, model_name: str) -> Dict:
+        return self.call("switch_model", model_name=model_name)
+
+    def compact(self, dry_run: bool = False) -> Dict:
+        return self.call("compact", dry_run=dry_run)
+
+    def export_snapshot(self, dest: str, dtype: str = "float16") -> Dict:
+        return self.call("export_snapshot", dest=dest, dtype=dtype)
+
+    def import_snapshot(self, src: str, remap: Optional[Dict[str, str]] = None) -> Dict:
+        return self.call("import_snapshot", src=src, remap=remap)
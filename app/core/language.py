@@ -0,0 +1,82 @@
+import re
+from typing import Dict, List, Tuple
+
+from app.database.vector_db import DEFAULT_LANE, MULTI_LANE
+from app.utils.metrics import metrics
+
+# --- 🌍 Language Detection ---
+
+# Function words are the cheapest reliable signal: every sentence has them and
+# the sets barely overlap between languages. Non-Latin scripts are caught by
+# the share of non-ASCII words before the stopword vote.
+_STOPWORDS = {
+    "en": "the of and to in is that for it as was with be by on not this are or from at which but have an they you were there their can has been if will would who",
+    "de": "der die das und ist nicht ein eine zu den mit sich des auf für im dem von sie es auch wir ich bei oder wird sind aus nach wie",
+    "fr": "le la les et des est une un du que dans pour pas qui sur au avec ce sont par il elle nous vous mais ou être cette aux",
+    "es": "el la los las y de que en un una es por con para del se no al lo como más pero sus fue son este esta entre",
+    "it": "il lo la gli le di che e un una per non con sono del della nel alla come anche ma questo questa essere gli",
+    "pt": "o a os as e de que em um uma do da para com não por se no na dos das como mais mas foi ao ser",
+    "nl": "de het een en van is dat op te in zijn met voor niet aan er maar ook als bij door wordt naar",
+}
+_STOPWORDS = {lang: frozenset(words.split()) for lang, words in _STOPWORDS.items()}
+_WORD = re.compile(r"[^\W\d_]+")
+SAMPLE_CHARS = 2000
+
+
+def detect_language(text: str) -> str:
+    """
+    Best-guess ISO 639-1 code ("en", "de", ...) or "other" for non-Latin
+    scripts. Text without enough evidence (numbers, codes, a few nouns)
+    counts as English: the compact model embeds it just as well.
+    """
+    words = _WORD.findall(text[:SAMPLE_CHARS].lower())
+    if not words:
+        return "en"
+    if sum(not w.isascii() for w in words) > 0.5 * len(words):
+        # Cyrillic, CJK, Greek, Arabic...; accented Latin stays well below this share
+        return "other"
+    votes = {lang: 0 for lang in _STOPWORDS}
+    for w in words:
+        for lang, stop in _STOPWORDS.items():
+            if w in stop:
+                votes[lang] += 1
+    best = max(votes, key=votes.get)
+    if best != "en" and votes[best] >= 2 and votes[best] > votes["en"]:
+        return best
+    return "en"
+
+
+# --- 🔀 Routing ---
+
+class LanguageRouter:
+    """
+    Routes English chunks to the default lane (compact model) and all other
+    text to the multilingual lane. Queries in English search both lanes (the
+    multilingual model is cross-lingual); other queries only the multilingual one.
+    """
+    def __init__(self, multilingual_engine):
+        self.engines = {MULTI_LANE: multilingual_engine}
+        self._routed = {lane: metrics.counter("chunks_routed_total", "Chunks per embedding lane", {"lane": lane})
+                        for lane in (DEFAULT_LANE, MULTI_LANE)}
+
+    def route(self, text: str) -> Tuple[str, str]:
+        """(lane, language) for one chunk."""
+        lang = detect_language(text)
+        lane = DEFAULT_LANE if lang == "en" else MULTI_LANE
+        self._routed[lane].inc()
+        return lane, lang
+
+    def split(self, items: List[tuple]) -> Dict[str, List[tuple]]:
+        """Groups (chunk_id, text, meta) items by lane, tagging each meta with its language."""
+        groups: Dict[str, List[tuple]] = {}
+        for item in items:
+            lane, lang = self.route(item[1])
+            item[2]["lang"] = lang
+            groups.setdefault(lane, []).append(item)
+        return groups
+
+    @staticmethod
+    def query_lanes(query: str) -> List[str]:
+        if detect_language(query) == "en":
+            return [DEFAULT_LANE, MULTI_LANE]
+        return [MULTI_LANE]
@@ -1,10 +1,44 @@
 import os
+import re
+import time
+import zlib
 import hashlib
+import threading
 from app.utils.diagnostics import logger, profile_performance
+from app.utils.metrics import metrics
+from app.utils.tracing import tracer
+from app.core.source import SourceBuffer
+from app.core.sandbox import ExtractionError, ExtractionSupervisor
+from app.database.dedup import text_hash
+from app.database.vector_db import DEFAULT_LANE
 from abc import ABC, abstractmethod
-from typing import Any, Callable, List, Dict, Generator, Optional
+from contextlib import contextmanager
+from typing import Any, Callable, List, Dict, Generator, Iterable, NamedTuple, Optional
 
 
+_WHITESPACE = re.compile(r"\s+")
+
+# --- 📑 Progressive Indexing ---
+
+class PageRange(NamedTuple):
+    """
+    Deferred work unit: pages [start, stop) of a large document whose
+    earlier pages are already searchable. Chunk numbering continues at
+    `chunk_no`; `sig`/`size`/`mtime` are the file's when its first range
+    was read, and `chain` identifies that indexing run.
+    """
+    path: str
+    start: int
+    stop: int
+    pages: int
+    chunk_no: int
+    sig: Optional[str]
+    size: int
+    mtime: float
+    chain: object
+
+    def __str__(self):
+        return f"{self.path} (pages {self.start + 1}-{self.stop} of {self.pages})"
 
 # --- 🧠 Logic Processor Architecture ---
 
@@ -37,16 +71,72 @@ class ChainedLogicProcessor(LogicProcessor):
 # --- ⚙️ Main Backend ---
 
 class SLAMBackend:
-    def __init__(self, db, proc, engine, logic_processor: Optional[LogicProcessor] = None):
+    def __init__(self, db, proc, engine, logic_processor: Optional[LogicProcessor] = None,
+                 archive_after_index: bool = False, sandbox: Optional[ExtractionSupervisor] = None,
+                 router=None):
         self.db = db
         self.proc = proc
         self.engine = engine
         self.logic_processor = logic_processor
-        
+        self.archive_after_index = archive_after_index
+        # When set, extraction runs in a supervised child process instead of `proc`
+        self.sandbox = sandbox
+        # When set (a LanguageRouter), non-English chunks go to the multilingual lane
+        self.router = router
+        # Near-duplicate detection; sources with more text than this are indexed without it
+        self.dedup = getattr(db, "dedup", None)
+        self.dedup_max_chars = 4_000_000
+        # Called with paths that need re-indexing (the daemon's queue)
+        self.requeue: Optional[Callable[[List[str]], None]] = None
+        # Progressive indexing: paged documents longer than `first_pages` are indexed a
+        # `unit_pages` range at a time; `defer` queues the next range at low priority
+        self.first_pages = 50
+        self.unit_pages = 100
+        self.defer: Optional[Callable[["PageRange"], None]] = None
+        self._chains: Dict[str, object] = {}  # path -> token of its live chain of page ranges
+
         # Internal State
         self.dead_letter_queue = []
-        self._batch_cache = {"ids": [], "vectors": [], "metas": []}
-        self.batch_size = 10
+        # Failed files are retried at most this many times, `retry_backoff` seconds after the
+        # first failure and twice as long after each further one
+        self.max_attempts = 5
+        self.retry_backoff = 60.0
+        self.encode_batch = 32
+        # Paths between extraction start and manifest update; the compactor leaves them alone
+        self._busy = set()
+        self._busy_lock = threading.Lock()
+        self._ingest_lock = threading.Lock()  # Held per file; see paused()
+        # Chunk vectors are group-committed by the store's write-behind buffer
+        self.writer = db.writer
+        self.writer.on_error = self._on_write_error
+        # Per-source signatures let unchanged archive members be skipped
+        self.manifest = db.manifest
+        # Chunk text for previews, compressed outside the vector index
+        self.snippets = db.snippets
+        self.proc.skip_member = self._member_unchanged
+
+        # Metrics
+        self._files_indexed = metrics.counter("files_indexed_total", "Files (re)indexed")
+        self._chunks_indexed = metrics.counter("chunks_indexed_total", "Chunks embedded and queued for writing")
+        self._manifest_hits = metrics.counter("cache_requests_total", labels={"cache": "manifest", "result": "hit"})
+        self._manifest_misses = metrics.counter("cache_requests_total", labels={"cache": "manifest", "result": "miss"})
+        self._dup_linked = metrics.counter("dedup_documents_linked_total", "Documents linked to a near-duplicate canonical")
+        self._dup_shared = metrics.counter("dedup_chunks_shared_total", "Chunks not embedded because a near-duplicate had them")
+        self._ocr_skipped = metrics.counter("ocr_gate_total", "Images by text-presence gate decision", {"decision": "skip"})
+        self._ocr_run = metrics.counter("ocr_gate_total", labels={"decision": "ocr"})
+        self._ocr_seconds = metrics.counter("ocr_seconds_total", "Seconds spent in tesseract")
+        self._ocr_saved = metrics.counter("ocr_seconds_saved_total", "Estimated tesseract seconds avoided by the text-presence gate")
+        self._ocr_pixels = 0
+        self._files_purged = metrics.counter("files_purged_total", "Indexed files dropped with a folder that is no longer watched")
+        self._progressive = metrics.counter("progressive_documents_total", "Large documents indexed a page range at a time")
+
+    @property
+    def batch_size(self) -> int:
+        return self.writer.max_batch
+
+    @batch_size.setter
+    def batch_size(self, value: int):
+        self.writer.max_batch = value
 
     def get_file_hash(self, path: str) -> str:
         """Calculates SHA-256 using memory-efficient chunking."""
@@ -57,89 +147,544 @@ class SLAMBackend:
         return sha256.hexdigest()
 
     def chunk_text(self, text: str, size: int = 1000) -> Generator[str, None, None]:
-        """Generator to yield text chunks without loading all into RAM."""
-        for i in range(0, len(text), size):
-            yield text[i : i + size]
+        """
+        Yields pieces of about `size` characters, cut after a word chosen by
+        content (a hash of the word) rather than at fixed offsets. An edit then
+        only changes the pieces around it, so the rest of a near-duplicate still
+        matches its original piece by piece.
+        """
+        low, high = size // 2, size * 2
+        divisor = max(1, (size - low) // 6)  # ~6 chars per word: average piece ~= size
+        start = prev = 0
+        for m in _WHITESPACE.finditer(text):
+            length = m.start() - start
+            while length > high:
+                # No cut point in a long run (tables, base64): hard split
+                yield text[start:start + size]
+                start += size
+                length = m.start() - start
+            if length >= low and (zlib.crc32(text[prev:m.start()].encode("utf-8", "surrogatepass")) % divisor == 0
+                                  or length >= size * 1.5):
+                yield text[start:m.end()]
+                start = m.end()
+            prev = m.end()
+        while start < len(text):
+            yield text[start:start + high]
+            start += high
+
+    def is_busy(self, path: str) -> bool:
+        with self._busy_lock:
+            return path in self._busy
+
+    def _set_busy(self, path: str, busy: bool):
+        with self._busy_lock:
+            if busy:
+                self._busy.add(path)
+            else:
+                self._busy.discard(path)
+
+    @contextmanager
+    def paused(self):
+        """Holds off ingestion: waits for the file in progress, blocks the next until exit."""
+        with self._ingest_lock:
+            yield
 
     @profile_performance
-    def handle_new_file(self, path: str):
+    def handle_new_file(self, path):
+        """Indexes a file, or the next page range of a large one (a `PageRange`)."""
+        with self._ingest_lock:
+            if isinstance(path, PageRange):
+                self._handle_unit(path)
+            else:
+                self._handle_new_file(path)
+
+    def _handle_new_file(self, path: str):
+        # A full (re)index supersedes page ranges still queued for this file
+        self._chains.pop(path, None)
+        if not os.path.lexists(path):
+            # Deleted (or moved away) since it was queued
+            self.remove_file(path)
+            return
         if not os.access(path, os.R_OK):
             logger.error(f"Access Denied: {path}")
-            self.dead_letter_queue.append(path)
+            self._dead_letter(path, "access", "not readable")
+            return
+        self._index_file(path)
+
+    def _handle_unit(self, unit: "PageRange"):
+        if self._chains.get(unit.path) is not unit.chain:
+            return  # Re-indexed or removed since this range was queued
+        try:
+            st = os.stat(unit.path)
+        except OSError:
+            st = None
+        if st is None or (st.st_size, st.st_mtime) != (unit.size, unit.mtime):
+            # Changed since its first pages were indexed; the watcher queued a full re-index
+            self._chains.pop(unit.path, None)
+            self._set_busy(unit.path, False)
+            if st is None:
+                self.remove_file(unit.path)
             return
+        self._index_file(unit.path, unit)
 
+    def _index_file(self, path: str, unit: Optional["PageRange"] = None):
+        trace = None
+        self._set_busy(path, True)
+        hooked = False
         try:
-            # 1. Deduplication check
-            current_hash = self.get_file_hash(path)
-            existing = self.db.collection.get(ids=[path])
-            if existing['ids'] and existing['metadatas'][0].get('hash') == current_hash:
-                return 
+            # Per-file trace; skipped files are not persisted, failed ones are
+            with tracer.trace(path, persist=False) as trace:
+                entry = None
+                if unit is None:
+                    # 1. Deduplication check: an unchanged stat skips the file without reading it
+                    with tracer.span("stat"):
+                        st = os.stat(path)
+                        entry = self.manifest.get(path)
+                    if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime:
+                        self._manifest_hits.inc()
+                        return
+                    self._manifest_misses.inc()
+
+                # 2-3. Single read, extraction, transformation & vectorization
+                extract = self._extract_sandboxed if self.sandbox else self._extract_local
+                indexed = extract(path, entry, unit)
+                if indexed is None:
+                    return
+                sources, size, mtime, next_unit = indexed
+                self._record_ocr(trace)
+                trace.add("bytes", size)
+                trace.add("chunks", sum(s["chunks"] for s in sources.values()))
+
+            # 4. Manifest + stale chunk cleanup right away, under the ingest lock: the next
+            # event for this file sees the new version, and the deletes queue behind this
+            # version's upserts. A failed commit invalidates the entry (see _on_write_error).
+            if next_unit is None:
+                self._record_sources(path, sources, size, mtime)
+            else:
+                # Searchable so far; without a stat, any change re-indexes it in full
+                self._record_sources(path, sources)
 
-            # 2. Extraction & Transformation
-            text = self.proc.extract_text(path)
-            if not text:
-                return
+            # The trace is written once the chunks are durable, so it includes the commit wait
+            queued_at = time.perf_counter()
+            chain = next_unit.chain if next_unit else unit.chain if unit else None
+
+            def release(committed: bool):
+                if committed and next_unit is not None:
+                    self.defer(next_unit)
+                else:
+                    # Done, or the commit failed: _on_write_error dead-lettered the file and
+                    # invalidated its manifest entry, so the rest of a chain is re-done in full
+                    if chain is not None and self._chains.get(path) is chain:
+                        del self._chains[path]
+                    self._set_busy(path, False)
+                if not committed:
+                    trace.status = "error"
+                waited = time.perf_counter() - queued_at
+                trace.add_span("commit_wait", waited)
+                trace.total += waited
+                tracer.finish(trace)
+            self.writer.after_commit(lambda: release(True), lambda: release(False))
+            hooked = True
+            if unit is None:
+                self._files_indexed.inc()
+
+            # 5. POST-PROCESSING: Archive the file once all of it is indexed
+            if self.archive_after_index and next_unit is None:
+                # Vectors and manifest must be durable before the source file moves
+                self.writer.flush()
+                from app.core.processor import archive_on_index
+                new_path = archive_on_index(path)
+                self.move_file(path, new_path)
+                logger.info(f"File archived to: {new_path}")
+
+        except ExtractionError as e:
+            logger.error(f"Extraction of {path} failed ({e.reason}): {e}")
+            self._dead_letter(path, e.reason, str(e))
+            if trace:
+                tracer.finish(trace)
+        except Exception as e:
+            logger.error(f"Failed to process {path}: {str(e)}")
+            self._dead_letter(path, "error", str(e))
+            if trace:
+                tracer.finish(trace)
+        finally:
+            if not hooked:
+                self._set_busy(path, False)
 
+    def remove_file(self, path: str):
+        """Drops every chunk, snippet and manifest entry of a file that no longer exists."""
+        entries = self.manifest.sources_for(path)
+        stale = [f"{e['id']}_{i}" for e in entries for i in range(e["chunks"])]
+        for chunk_id in stale:
+            self.writer.delete(chunk_id)
+        self.snippets.delete_many(stale)
+        for e in entries:
+            self.manifest.remove(e["id"])
+            if self.dedup is not None:
+                self._requeue(self.dedup.remove(e["id"]))
+        self.manifest.remove_dead_letter(path)
+        if entries:
+            logger.info(f"Removed {len(stale)} chunk(s) of deleted file: {path}")
+
+    def move_file(self, old: str, new: str):
+        """
+        Re-keys an indexed file under its new path without re-embedding:
+        vectors and snippets are copied to the new chunk ids, the old ones are
+        deleted and the manifest follows.
+        """
+        self.writer.flush()
+        for entry in self.manifest.sources_for(old):
+            source = new + entry["id"][len(old):]  # Archive members keep their `!member` suffix
+            old_ids = [f"{entry['id']}_{i}" for i in range(entry["chunks"])]
+            if old_ids:
+                texts = []
+                for lane, collection in list(self.db.lanes.items()):
+                    got = collection.get(ids=old_ids, include=["embeddings", "metadatas"])
+                    for old_id, vector, meta in zip(got["ids"], got["embeddings"], got["metadatas"]):
+                        new_id = source + old_id[len(entry["id"]):]
+                        meta = {**meta, "path": new, "source": source,
+                                "filename": os.path.basename(source.rsplit("!", 1)[-1])}
+                        self.writer.upsert(new_id, list(vector), meta, lane=None if lane == DEFAULT_LANE else lane)
+                        text = self.snippets.get(old_id)
+                        if text is not None:
+                            texts.append((new_id, text))
+                        self.writer.delete(old_id)
+                self.snippets.put_many(texts)
+                self.snippets.delete_many(old_ids)
+            self.manifest.record(source, new, entry["sig"], entry["chunks"], entry["size"], entry["mtime"])
+            self.manifest.remove(entry["id"])
+            if self.dedup is not None:
+                self.dedup.rename(entry["id"], source, new)
+        self.writer.flush()
+
+    def purge_under(self, root: str, keep: Iterable[str] = (), page: int = 500,
+                    cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """
+        Drops every indexed file below `root` (a folder no longer watched)
+        except those below a `keep` root. Works through the manifest a page
+        at a time, holding the ingest lock only per page, until done or
+        `cancelled()`; returns the number of files purged.
+        """
+        keep = tuple(os.path.join(k, "") for k in keep)
+        purged, after = 0, ("", "")
+        while not (cancelled and cancelled()):
+            entries = self.manifest.sources_under(root, after, page)
+            if not entries:
+                break
+            after = (entries[-1]["path"], entries[-1]["id"])
+            entries = [e for e in entries if not e["path"].startswith(keep)]
+            with self._ingest_lock:
+                self._purge_entries(entries)
+            purged += len({e["path"] for e in entries})
+        if not any(k.startswith(os.path.join(root, "")) for k in keep):
+            self.manifest.remove_dead_letters_under(root)
+        self._files_purged.inc(purged)
+        return purged
+
+    def _purge_entries(self, entries: List[Dict]):
+        stale = [f"{e['id']}_{i}" for e in entries for i in range(e["chunks"])]
+        for chunk_id in stale:
+            self.writer.delete(chunk_id)
+        self.snippets.delete_many(stale)
+        self.manifest.remove_many([e["id"] for e in entries])
+        for e in entries:
+            if self._chains.pop(e["path"], None) is not None:
+                self._set_busy(e["path"], False)  # A large document cut off mid-way
+            if self.dedup is not None:
+                self._requeue(self.dedup.remove(e["id"]))
+
+    def _extract_local(self, path: str, entry: Optional[Dict], unit: Optional["PageRange"] = None):
+        """In-process extraction; returns (sources, size, mtime, next unit) or None when unchanged."""
+        # The hash covers the same bytes the extractors consume
+        with tracer.span("read_hash"):
+            src = SourceBuffer(path)
+        with src:
+            current_hash = src.hexdigest() if src.buffered else None
+            if entry and entry["sig"] == current_hash:
+                # Touched but identical: remember the new stat so the next event is free
+                self.manifest.record(path, path, current_hash, entry["chunks"], src.size, src.mtime)
+                return None
+            if unit is not None:
+                total, pages = unit.pages, (unit.start, unit.stop)
+            else:
+                total, pages = self.proc.plan_pages(src, self.first_pages if self.defer else 0)
+            sources = self._index_chunks(self.proc.get_smart_chunks(src, pages=pages), path, current_hash,
+                                         first_chunk=unit.chunk_no if unit else 0, whole=pages is None)
+            # Large files are streamed; their hash completes once extraction is done
+            sources[path]["sig"] = src.hexdigest()
+        return sources, src.size, src.mtime, self._next_unit(path, sources, src.size, src.mtime, pages, total, unit)
+
+    def _extract_sandboxed(self, path: str, entry: Optional[Dict], unit: Optional["PageRange"] = None):
+        """Extraction in a supervised worker process; raises ExtractionError on timeout/OOM/crash."""
+        if unit is not None:
+            job = self.sandbox.extract(path, pages=(unit.start, unit.stop))
+            total = unit.pages
+        else:
+            job = self.sandbox.extract(path, known_hash=entry["sig"] if entry else None,
+                                       first_pages=self.first_pages if self.defer else 0)
+            total = job.pages
+        if job.unchanged:
+            self.manifest.record(path, path, job.hash, entry["chunks"], job.size, job.mtime)
+            return None
+        sources = self._index_chunks(job, path, job.hash, first_chunk=unit.chunk_no if unit else 0,
+                                     whole=job.range is None)
+        sources[path]["sig"] = job.hash
+        # Worker-side spans (read_hash, pdf_parse, ocr, ...) happened while we waited in "extract"
+        tracer.current.merge(job.spans, job.counts, nested_in="extract")
+        return sources, job.size, job.mtime, self._next_unit(path, sources, job.size, job.mtime, job.range, total, unit)
+
+    def _next_unit(self, path: str, sources: Dict[str, Dict], size: int, mtime: float,
+                   pages: Optional[tuple], total: Optional[int], unit: Optional["PageRange"]) -> Optional["PageRange"]:
+        """The page range after `pages`, or None once the document is complete."""
+        if pages is None or pages[1] >= total:
+            return None
+        state = sources[path]
+        sig, state["sig"] = state["sig"], ""  # Recorded as incomplete until the last range commits
+        if unit is None:
+            chain = self._chains[path] = object()
+            self._progressive.inc()
+        else:
+            chain = unit.chain
+        stop = min(pages[1] + self.unit_pages, total)
+        return PageRange(path, pages[1], stop, total, state["chunks"], sig, size, mtime, chain)
+
+    def _index_chunks(self, chunks: Iterable[Dict], path: str, file_hash: Optional[str],
+                      first_chunk: int = 0, whole: bool = True) -> Dict[str, Dict]:
+        """
+        Streams extractor chunks into the write buffer under `{source}_{i}` ids.
+        `source` is the file path, or `archive!member` for archive members.
+        Returns {source: {"sig", "chunks", "skipped"}} for every source seen.
+        A page range (`whole=False`) numbers its chunks from `first_chunk`.
+        """
+        sources = {path: {"sig": file_hash, "chunks": first_chunk, "skipped": False}}
+        pending = []
+        # With near-duplicate detection, a source's pieces are held back until it is complete
+        dedup = self.dedup if self.dedup is not None and self.dedup.enabled else None
+        if not whole:
+            # Documents indexed a page range at a time are never complete in one pass
+            if dedup and first_chunk == 0:
+                self._requeue(dedup.remove(path))
+            dedup = None
+        doc = None  # [source, items, chars] of the source being buffered
+        streamed = set()  # Sources too large to buffer: indexed as they arrive, no dedup
+        chunks = iter(chunks)
+        while True:
+            with tracer.span("extract"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            source = chunk.get("source", path)
+            if doc and doc[0] != source:
+                self._index_document(path, doc[0], doc[1])
+                doc = None
+            state = sources.setdefault(source, {"sig": chunk.get("member_sig", file_hash), "chunks": 0, "skipped": False})
+            if chunk.get("type") == "archive_member":
+                state["skipped"] = chunk["skipped"]
+                continue
+
+            text = chunk["text"]
             if self.logic_processor:
-                text = self.logic_processor.process(text)
-
-            # 3. Vectorization & Batching
-            chunk_ids = []
-            chunk_vectors = []
-            chunk_metas = []
-            for i, chunk in enumerate(self.chunk_text(text)):
-                vector = self.engine.encode(chunk)
-                chunk_id = f"{path}_{i}"
+                with tracer.span("transform"):
+                    text = self.logic_processor.process(text)
+            for piece in self.chunk_text(text):
                 meta = {
                     "path": str(path),
-                    "hash": current_hash,
-                    "chunk_id": i
+                    "source": source,
+                    "filename": os.path.basename(source.rsplit("!", 1)[-1]),
+                    "chunk_id": state["chunks"],
+                    "page": chunk.get("page", 1),
+                    # Files too large to buffer only know their hash once fully read
+                    "text_hash": text_hash(piece),
                 }
-                chunk_ids.append(chunk_id)
-                chunk_vectors.append(vector.tolist())
-                chunk_metas.append(meta)
-
-            # 4. Commit to DB (atomic before moving file)
-            if chunk_ids:
-                self.db.collection.upsert(
-                    ids=chunk_ids,
-                    embeddings=chunk_vectors,
-                    metadatas=chunk_metas
-                )
-
-            # 5. POST-PROCESSING: Archive the file
-            from app.core.processor import archive_on_index
-            new_path = archive_on_index(path)
-            # If the path changed, update metadata in DB (optional: update in place or re-upsert)
-            if new_path != path:
-                for meta in chunk_metas:
-                    if meta["path"] == path:
-                        meta["path"] = new_path
-                # Optionally, update DB with new path metadata
-            logger.info(f"File archived to: {new_path}")
+                if state["sig"]:
+                    meta["hash"] = state["sig"]
+                if chunk.get("bbox") and chunk.get("page_size"):
+                    # Page-relative, so previews can mark the block on a render of any size
+                    w, h = chunk["page_size"]
+                    x0, y0, x1, y1 = chunk["bbox"]
+                    meta["bbox"] = f"{x0 / w:.4f},{y0 / h:.4f},{x1 / w:.4f},{y1 / h:.4f}"
+                item = (f"{source}_{state['chunks']}", piece, meta)
+                state["chunks"] += 1
+                if dedup and source not in streamed:
+                    doc = doc or [source, [], 0]
+                    doc[1].append(item)
+                    doc[2] += len(piece)
+                    if doc[2] <= self.dedup_max_chars:
+                        continue
+                    streamed.add(source)
+                    self._requeue(dedup.remove(source))
+                    pending.extend(doc[1])
+                    doc = None
+                else:
+                    pending.append(item)
+                while len(pending) >= self.encode_batch:
+                    self._encode_and_queue(pending[:self.encode_batch])
+                    pending = pending[self.encode_batch:]
+        self._encode_and_queue(pending)
+        if doc:
+            self._index_document(path, doc[0], doc[1])
+        return sources
 
-        except Exception as e:
-            logger.error(f"Failed to process {path}: {str(e)}")
-            self.dead_letter_queue.append(path)
+    def _index_document(self, path: str, source: str, items: List[tuple]):
+        """
+        Links a fully extracted source to a near-duplicate canonical document,
+        if there is one, and embeds only the pieces the canonical doesn't have.
+        Shared pieces get no vector of their own; they resolve to the
+        canonical's chunk through the duplicate index.
+        """
+        with tracer.span("dedup"):
+            sig = self.dedup.signature(text for _, text, _ in items)
+            canonical = self.dedup.find_canonical(source, sig)
+            shared = self.dedup.pieces_of(canonical) if canonical else {}
+            pieces, fresh, aliased = [], [], []
+            for item in items:
+                chunk_id, text, meta = item
+                h = meta["text_hash"]
+                owner = shared.get(h)
+                pieces.append((meta["chunk_id"], h, owner or chunk_id))
+                if owner:
+                    aliased.append(chunk_id)
+                else:
+                    fresh.append(item)
+        for start in range(0, len(fresh), self.encode_batch):
+            self._encode_and_queue(fresh[start:start + self.encode_batch])
+        # An earlier version of this source may have stored these pieces itself
+        for chunk_id in aliased:
+            self.writer.delete(chunk_id)
+        self.snippets.delete_many(aliased)
+        self._requeue(self.dedup.record(source, path, sig, canonical or source, pieces))
+        if canonical:
+            self._dup_linked.inc()
+            self._dup_shared.inc(len(aliased))
+
+    def _requeue(self, members: List[tuple]):
+        """Re-indexes near-duplicates whose canonical changed or vanished."""
+        paths = set()
+        for source, member_path in members:
+            for entry in self.manifest.sources_for(member_path):
+                if entry["id"] in (source, member_path):
+                    # An empty signature forces a full re-extract
+                    self.manifest.record(entry["id"], member_path, "", entry["chunks"])
+            paths.add(member_path)
+        if paths and self.requeue:
+            self.requeue(sorted(paths))
+
+    def _encode_and_queue(self, pending: List[tuple]):
+        if not pending:
+            return
+        groups = {DEFAULT_LANE: pending} if self.router is None else self.router.split(pending)
+        for lane, items in groups.items():
+            engine = self.engine if lane == DEFAULT_LANE else self.router.engines[lane]
+            with tracer.span("encode"):
+                vectors = engine.encode([text for _, text, _ in items])
+            # Includes any backpressure wait on the write buffer
+            with tracer.span("queue_write"):
+                for (chunk_id, _, meta), vector in zip(items, vectors):
+                    self.writer.upsert(chunk_id, vector.tolist(), meta,
+                                       lane=None if lane == DEFAULT_LANE else lane)
+        with tracer.span("snippets"):
+            self.snippets.put_many((chunk_id, text) for chunk_id, text, _ in pending)
+        self._chunks_indexed.inc(len(pending))
+
+    def _record_sources(self, path: str, sources: Dict[str, Dict],
+                        size: Optional[int] = None, mtime: Optional[float] = None):
+        """Updates the manifest and deletes chunk ids the new extraction no longer produced."""
+        known = {e["id"]: e for e in self.manifest.sources_for(path)}
+        stale = []
+        for source_id, state in sources.items():
+            if state["skipped"]:
+                continue
+            old = known.get(source_id)
+            if old:
+                stale.extend(f"{source_id}_{i}" for i in range(state["chunks"], old["chunks"]))
+            if source_id == path:
+                self.manifest.record(source_id, path, state["sig"], state["chunks"], size, mtime)
+            else:
+                self.manifest.record(source_id, path, state["sig"], state["chunks"])
+        # Members that disappeared from an archive (members of skipped nested archives stay)
+        kept = tuple(f"{source_id}!" for source_id, state in sources.items() if state["skipped"])
+        for source_id, old in known.items():
+            if source_id not in sources and not (kept and source_id.startswith(kept)):
+                stale.extend(f"{source_id}_{i}" for i in range(old["chunks"]))
+                self.manifest.remove(source_id)
+        for chunk_id in stale:
+            self.writer.delete(chunk_id)
+        self.snippets.delete_many(stale)
+
+    def _record_ocr(self, trace):
+        """Gate decisions and OCR time of one file (also those made in the sandbox)."""
+        self._ocr_skipped.inc(trace.counts.get("ocr_skipped", 0))
+        self._ocr_run.inc(trace.counts.get("ocr_images", 0))
+        self._ocr_seconds.inc(trace.spans.get("ocr", (0.0, 0))[0])
+        self._ocr_pixels += trace.counts.get("ocr_pixels", 0)
+        skipped = trace.counts.get("ocr_skipped_pixels", 0)
+        if skipped and self._ocr_pixels:
+            # Tesseract time scales with pixel count; price skipped images at the observed rate
+            self._ocr_saved.inc(skipped * self._ocr_seconds.value / self._ocr_pixels)
+
+    def _member_unchanged(self, member_id: str, sig: str) -> bool:
+        entry = self.manifest.get(member_id)
+        unchanged = entry is not None and entry["sig"] == sig
+        metrics.counter("cache_requests_total", labels={"cache": "archive_member", "result": "hit" if unchanged else "miss"}).inc()
+        return unchanged
 
     @profile_performance
     def flush_batch(self):
-        """Commits cached vectors to the database."""
-        if not self._batch_cache["ids"]:
+        """Blocks until all buffered vectors are committed to the database."""
+        if not len(self.writer):
             return
-
-        self.db.collection.upsert(
-            ids=self._batch_cache["ids"],
-            embeddings=self._batch_cache["vectors"],
-            metadatas=self._batch_cache["metas"]
-        )
-        # Clear cache
-        self._batch_cache = {"ids": [], "vectors": [], "metas": []}
+        self.writer.flush()
         logger.info("Batch flushed to Vector DB.")
 
-    def retry_dead_letters(self):
-        """Attempts to re-process files that failed previously."""
-        to_retry = list(self.dead_letter_queue)
-        self.dead_letter_queue.clear()
-        for path in to_retry:
-            self.handle_new_file(path)
\ No newline at end of file
+    def _on_write_error(self, ids: List[str], error: Exception):
+        """
+        Routes files whose chunks failed to commit to the dead-letter queue.
+        Their manifest entries were recorded at extraction time; dropping the
+        hash and stat makes the retry re-index them instead of skipping.
+        """
+        for path in {chunk_id.rsplit("_", 1)[0].split("!", 1)[0] for chunk_id in ids}:
+            for entry in self.manifest.sources_for(path):
+                self.manifest.record(entry["id"], entry["path"], "", entry["chunks"])
+            self._dead_letter(path, "write", str(error))
+
+    def _dead_letter(self, path: str, reason: str, detail: str = ""):
+        """Queues `path` for retry and persists why it failed."""
+        metrics.counter("dead_letters_total", "Files routed to the dead-letter store", {"reason": reason}).inc()
+        if path not in self.dead_letter_queue:
+            self.dead_letter_queue.append(path)
+        self.manifest.add_dead_letter(path, reason, detail)
+
+    def retry_dead_letters(self) -> int:
+        """
+        Re-processes failed files whose backoff has expired; returns how many
+        were retried. Files that failed `max_attempts` times stay in the
+        dead-letter store (and in status) until they are removed.
+        """
+        now = time.time()
+        letters = {d["path"]: d for d in self.manifest.dead_letters()}
+        due, waiting = [], []
+        for path in dict.fromkeys(self.dead_letter_queue + list(letters)):
+            letter = letters.get(path)
+            if letter is None or letter["attempts"] >= self.max_attempts:
+                continue  # Cleared since it failed, or given up on
+            ready = (letter["updated"] or 0) + self.retry_backoff * 2 ** (letter["attempts"] - 1)
+            (due if now >= ready else waiting).append(path)
+        self.dead_letter_queue[:] = waiting
+        for path in due:
+            # Failures re-register themselves (with an incremented attempt count)
+            self.handle_new_file(path)
+            if path not in self.dead_letter_queue:
+                self.manifest.remove_dead_letter(path)
+        return len(due)
+
+    def retry_periodically(self, interval: float, stop: threading.Event) -> threading.Thread:
+        """Retries due dead letters every `interval` seconds until `stop` is set."""
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.retry_dead_letters()
+                except Exception as e:
+                    logger.error(f"Dead-letter retry failed: {e}")
+        thread = threading.Thread(target=loop, name="SLAM-Retry", daemon=True)
+        thread.start()
+        return thread
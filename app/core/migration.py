@@ -0,0 +1,201 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional
+
+from app.utils.diagnostics import logger
+from app.utils.metrics import metrics
+
+CHECKPOINT_KEY = "migration"
+
+
+class ReembedMigration:
+    """
+    Re-embeds the live collection into a new, model-tagged one in the
+    background while searches keep using the old one.
+
+    Each pass diffs the two collections by chunk id, source hash and chunk
+    text hash and re-embeds only what is missing or changed, so a restart simply resumes
+    and chunks indexed meanwhile are caught up by the next pass. The text
+    comes from the snippet store; chunks without a snippet are re-extracted
+    after the swap. The final pass runs with ingestion paused (`quiesce`),
+    then the collection, writer and engine are swapped under `swap_lock`
+    and the old collection is dropped.
+    """
+    PAGE = 256
+    CATCH_UP_ROUNDS = 5
+    CACHE_SIZE = 20000
+
+    def __init__(self, db, engine, quiesce: Callable[[], ContextManager] = nullcontext,
+                 swap_lock: Optional[threading.Lock] = None,
+                 on_swap: Optional[Callable[[object], None]] = None,
+                 enqueue: Optional[Callable[[List[str]], None]] = None,
+                 throttle: float = 0.0):
+        self.db = db
+        self.engine = engine
+        self.quiesce = quiesce
+        self.swap_lock = swap_lock or threading.Lock()
+        self.on_swap = on_swap
+        self.enqueue = enqueue
+        self.throttle = throttle  # Seconds to sleep between pages, leaving CPU to live indexing
+        if engine.model_name == db.active["model"]:
+            raise ValueError(f"{engine.model_name} is already the active model")
+        self.target = {"name": None, "model": engine.model_name, "dim": None}  # Known once the model loads
+        self.state = "pending"
+        self.error = None
+        self.done = 0
+        self.total = 0
+        self._started = None
+        self._reextract = set()
+        self._no_text = set()  # Chunk ids without a snippet; not retried by later passes
+        self._cache: "OrderedDict[str, list]" = OrderedDict()  # text digest -> vector
+        self._stop = threading.Event()
+        self._thread = None
+        self._progress = metrics.gauge("migration_progress_ratio", "Fraction of chunks re-embedded by the running model migration")
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self._run, name="SLAM-Migration", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stops after the current page; the checkpoint stays, so the next start resumes."""
+        self._stop.set()
+
+    def abort(self):
+        """Stops and throws the partial collection away."""
+        self.stop()
+        if self._thread is not None:
+            self._thread.join()
+        if self.target["name"]:
+            self.db.drop_collection(self.target["name"])
+        self.db.manifest.set_meta(CHECKPOINT_KEY, None)
+        self.state = "aborted"
+
+    def status(self) -> Dict:
+        elapsed = time.time() - self._started if self._started else 0.0
+        rate = self.done / elapsed if elapsed and self.done else 0.0
+        return {
+            "state": self.state,
+            "model": self.target["model"],
+            "collection": self.target["name"],
+            "done": self.done,
+            "total": self.total,
+            "percent": round(100.0 * self.done / self.total, 1) if self.total else 0.0,
+            "chunks_per_sec": round(rate, 1),
+            "eta_seconds": round((self.total - self.done) / rate) if rate else None,
+            "error": self.error,
+        }
+
+    # --- Passes ---
+
+    def _run(self):
+        self._started = time.time()
+        try:
+            self.state = "loading_model"
+            self.target = self.db.collection_info(self.engine.model_name, self.engine.dimension)
+            self.db.manifest.set_meta(CHECKPOINT_KEY, {**self.target, "started": self._started})
+            target = self.db.open_collection(self.target)
+            self.state = "copying"
+            delta = self._sync(target)
+            self.state = "catching_up"
+            for _ in range(self.CATCH_UP_ROUNDS):
+                if delta <= self.PAGE or self._stop.is_set():
+                    break
+                delta = self._sync(target)
+            if self._stop.is_set():
+                self.state = "stopped"
+                return
+            self.state = "swapping"
+            with self.quiesce():
+                self.db.writer.flush()
+                self._sync(target)
+                self._swap(target)
+            self.state = "done"
+        except Exception as e:
+            self.state, self.error = "failed", str(e)
+            logger.error(f"Re-embedding into {self.target['name']} failed: {e}")
+
+    def _sync(self, target) -> int:
+        """Makes `target` match the live collection; returns how many chunks it touched."""
+        source = self.db.collection
+        have, want = self._hashes(target), self._hashes(source)
+        todo = [cid for cid, h in want.items()
+                if (cid not in have or have[cid] != h) and cid not in self._no_text]
+        gone = [cid for cid in have if cid not in want]
+        for start in range(0, len(gone), self.PAGE):
+            target.delete(ids=gone[start:start + self.PAGE])
+        self.total = self.done + len(todo)
+        for start in range(0, len(todo), self.PAGE):
+            if self._stop.is_set():
+                break
+            self._copy(source, target, todo[start:start + self.PAGE])
+            self.done += min(self.PAGE, len(todo) - start)
+            self._progress.set(self.done / self.total if self.total else 1.0)
+            if self.throttle:
+                time.sleep(self.throttle)
+        return len(todo) + len(gone)
+
+    def _hashes(self, collection) -> Dict[str, tuple]:
+        out, offset = {}, 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=5000, offset=offset)
+            if not page["ids"]:
+                return out
+            offset += len(page["ids"])
+            for cid, meta in zip(page["ids"], page["metadatas"]):
+                meta = meta or {}
+                out[cid] = (meta.get("hash"), meta.get("text_hash"))
+
+    def _copy(self, source, target, ids: List[str]):
+        got = source.get(ids=ids, include=["metadatas"])
+        texts = self.db.snippets.get_many(got["ids"])
+        keep_ids, keep_meta, keep_text = [], [], []
+        for cid, meta in zip(got["ids"], got["metadatas"]):
+            if cid in texts:
+                keep_ids.append(cid)
+                keep_meta.append(meta)
+                keep_text.append(texts[cid])
+            else:
+                self._no_text.add(cid)
+                self._reextract.add(meta.get("path", cid.rsplit("_", 1)[0]))
+        if keep_ids:
+            target.upsert(ids=keep_ids, embeddings=self._embed(keep_text), metadatas=keep_meta)
+
+    def _embed(self, texts: List[str]) -> List[list]:
+        # Identical chunks (copies, boilerplate pages) are embedded once
+        keys = [hashlib.blake2b(t.encode(), digest_size=16).hexdigest() for t in texts]
+        found = {}
+        for k in keys:
+            if k in self._cache:
+                self._cache.move_to_end(k)
+                found[k] = self._cache[k]
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        if missing:
+            text_of = dict(zip(keys, texts))
+            for k, vector in zip(missing, self.engine.encode([text_of[k] for k in missing])):
+                found[k] = self._cache[k] = vector.tolist()
+                if len(self._cache) > self.CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return [found[k] for k in keys]
+
+    def _swap(self, target):
+        old = self.db.active
+        with self.swap_lock:
+            self.db.activate(self.target, target)
+            if self.on_swap:
+                self.on_swap(self.engine)
+        self.db.manifest.set_meta(CHECKPOINT_KEY, None)
+        self.db.drop_collection(old["name"])
+        self._progress.set(1.0)
+        logger.info(f"Switched search to {self.target['model']} ({self.done} chunks re-embedded); "
+                    f"dropped {old['name']}")
+        if self._reextract:
+            for path in self._reextract:
+                for entry in self.db.manifest.sources_for(path):
+                    # No stored text: force a full re-extract (members included) under the new model
+                    self.db.manifest.record(entry["id"], path, "", entry["chunks"])
+            if self.enqueue:
+                self.enqueue(sorted(self._reextract))
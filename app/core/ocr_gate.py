@@ -0,0 +1,116 @@
+import numpy as np
+from PIL import Image, ImageOps
+
+# EXIF tags written by cameras and phones (Make, Model, ExposureTime in the Exif IFD)
+_MAKE, _MODEL, _EXIF_IFD, _EXPOSURE = 0x010F, 0x0110, 0x8769, 0x829A
+
+
+class TextPresenceGate:
+    """
+    Cheap guess at whether an image contains text worth OCR-ing, from a
+    downsampled grayscale copy. Text (scans, documents, screenshots) shows
+    up as rows dense with sharp horizontal edges alternating with gaps
+    (text lines), usually on a flat background; photos, illustrations and
+    plain UI chrome have few such rows. Camera EXIF lowers the score,
+    icons are rejected by size alone.
+
+    Large images are shrunk by at most `MAX_SHRINK` so small glyphs keep a
+    few pixels of height, and scored in tiles: a caption or a status line
+    only has to stand out within its own tile, and a row's ink is measured
+    over the columns holding the tile's edges rather than its full width.
+
+    `score()` is in [0, 1]; images below `threshold` skip OCR, everything
+    else is OCR-ed as before (0 disables the gate). Scoring stops at the
+    first tile that reaches `sure`.
+    """
+    MAX_SIDE = 384      # Analysis tile size; smaller images are scored whole at this resolution
+    MAX_SHRINK = 3      # Downscale cap, so 12-14px UI text is still ~4px tall
+    MAX_PIXELS = 4_000_000  # Analysis budget; beyond it the shrink cap gives way
+    MIN_SIDE = 32       # Smaller images are icons/bullets
+    EDGE_STEP = 40      # Gray-level jump that counts as a sharp edge
+    INK_ROW = 0.06      # Share of sharp edges that makes a row part of a text line
+    MIN_ROW_EDGES = 6   # Fewer edges are borders or contours, not glyphs
+    LINE_ROWS = 2       # A text line is at least this many inked rows in a row
+
+    def __init__(self, threshold: float = 0.0, sure: float = 0.9):
+        self.threshold = threshold
+        self.sure = sure
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def score(self, img: Image.Image) -> float:
+        """
+        Scores an opened (not yet loaded) image. Calls `draft()`, so
+        reopen the file before OCR-ing it at full resolution.
+        """
+        width, height = img.size
+        if min(width, height) < self.MIN_SIDE:
+            return 0.0
+        camera = self._from_camera(img)
+        shrink = min(max(width, height) / self.MAX_SIDE, self.MAX_SHRINK)
+        shrink = max(shrink, (width * height / self.MAX_PIXELS) ** 0.5, 1.0)
+        size = (max(1, round(width / shrink)), max(1, round(height / shrink)))
+        img.draft("L", size)
+        small = ImageOps.grayscale(img)
+        small.thumbnail(size)
+        a = np.asarray(small, dtype=np.int16)
+
+        # Sharp horizontal edges: glyph strokes, absent from smooth photo gradients
+        edges = np.abs(np.diff(a, axis=1)) > self.EDGE_STEP
+
+        # Tiles overlap by half vertically so a block of lines is whole in at least one
+        best, tile, step = 0.0, self.MAX_SIDE, self.MAX_SIDE // 2
+        for y in range(0, max(1, edges.shape[0] - step), step):
+            for x in range(0, edges.shape[1], tile):
+                best = max(best, self._score_tile(a[y:y + tile, x:x + tile + 1], edges[y:y + tile, x:x + tile]))
+                if best >= self.sure:
+                    break
+            if best >= self.sure:
+                break
+        return float(best * 0.7 if camera else best)
+
+    def _score_tile(self, a: np.ndarray, edges: np.ndarray) -> float:
+        if edges.shape[1] < self.MIN_SIDE:
+            return 0.0
+        density = edges.mean()
+
+        # Text lines: runs of stroke-dense rows between emptier rows. UI borders and
+        # photo contours give a handful of edges per row, text dozens. Density is over
+        # the columns holding the bulk of the edges, so a short caption counts in full.
+        cum = np.cumsum(edges.sum(axis=0))
+        if not cum[-1]:
+            return 0.0
+        x0, x1 = np.searchsorted(cum, cum[-1] * 0.05), np.searchsorted(cum, cum[-1] * 0.95) + 1
+        count = edges[:, x0:x1].sum(axis=1)
+        rows = (count >= self.MIN_ROW_EDGES) & (count > self.INK_ROW * max(x1 - x0, self.MIN_SIDE))
+        bounds = np.flatnonzero(np.diff(np.concatenate(([0], rows.view(np.int8), [0]))))
+        lines = np.count_nonzero(bounds[1::2] - bounds[::2] >= self.LINE_ROWS)
+        if not lines or rows.all():
+            return 0.0
+        # Between text lines rows are nearly empty; dense texture only dips between busier rows
+        gaps = 1.0 - count[~rows].mean() / count[rows].mean()
+
+        # Flat background: share of pixels in the most common gray band
+        hist = np.bincount((a >> 3).ravel(), minlength=32)
+        background = (hist + np.roll(hist, 1) + np.roll(hist, -1)).max() / a.size
+
+        stroke = _ramp(density, 0.005, 0.04) * (1.0 - _ramp(density, 0.25, 0.45))
+        s = _ramp(lines, 0, 2) * (0.6 + 0.2 * _ramp(background, 0.15, 0.5) + 0.2 * stroke)
+        return s * _ramp(gaps, 0.7, 0.85)
+
+    @staticmethod
+    def _from_camera(img: Image.Image) -> bool:
+        try:
+            exif = img.getexif()
+        except Exception:
+            return False
+        if not exif:
+            return False
+        return bool(exif.get(_MAKE) or exif.get(_MODEL) or exif.get_ifd(_EXIF_IFD).get(_EXPOSURE))
+
+
+def _ramp(x: float, low: float, high: float) -> float:
+    """0 at or below `low`, 1 at or above `high`, linear in between."""
+    return float(min(1.0, max(0.0, (x - low) / (high - low))))
@@ -1,14 +1,24 @@
 import os
+import codecs
 import fitz
 import pytesseract
 import pathlib
 from app.utils.diagnostics import logger, profile_performance
-import concurrent.futures
+from app.core.ocr_gate import TextPresenceGate
+from app.core.source import SourceBuffer
+from app.utils.tracing import tracer
 import hashlib
 import zipfile
 import tarfile
+import tempfile
+import shutil
+import gzip
+import bz2
+import lzma
+import posixpath
+import xml.etree.ElementTree as ET
 from PIL import Image, ImageOps
-from typing import Generator, Dict, List, Any, Optional
+from typing import Generator, Dict, List, Any, Optional, Tuple
 
 # Optional dependency for encoding detection
 try:
@@ -21,7 +31,14 @@ except ImportError:
 # --- 🔌 Modern Extractor Architecture ---
 
 class BaseExtractor:
-    """Interface for all file extractors."""
+    """
+    Interface for all file extractors. `path` is a filesystem path or a
+    `SourceBuffer` holding bytes that were already read (and hashed) once.
+    Paged extractors also accept `pages=(start, stop)` in `yield_chunks`
+    and report `page_count`, so large documents can be indexed in ranges.
+    """
+    paged = False
+
     @staticmethod
     def extract_all(processor, path: str, options: dict) -> dict:
         raise NotImplementedError
@@ -30,6 +47,10 @@ class BaseExtractor:
     def yield_chunks(processor, path: str, max_length: int) -> Generator:
         raise NotImplementedError
 
+    @staticmethod
+    def page_count(path) -> Optional[int]:
+        return None
+
 class ProcessorRegistry:
     def __init__(self):
         self._registry: Dict[str, BaseExtractor] = {}
@@ -50,10 +71,12 @@ registry = ProcessorRegistry()
 
 @registry.register(['.pdf'])
 class PDFExtractor(BaseExtractor):
+    paged = True
+
     @staticmethod
     def extract_all(processor, path, options):
         result = {"text": [], "images": [], "metadata": {}}
-        with fitz.open(path) as doc:
+        with PDFExtractor._open(path) as doc:
             result["metadata"] = doc.metadata
             for page in doc:
                 blocks = page.get_text("blocks")
@@ -63,12 +86,32 @@ class PDFExtractor(BaseExtractor):
         return result
 
     @staticmethod
-    def yield_chunks(processor, path, max_length):
-        with fitz.open(path) as doc:
-            for page in doc:
-                for b in page.get_text("blocks"):
+    def yield_chunks(processor, path, max_length, pages: Optional[Tuple[int, int]] = None):
+        with tracer.span("pdf_open"):
+            doc = PDFExtractor._open(path)
+        with doc:
+            start, stop = pages or (0, doc.page_count)
+            for number in range(start, min(stop, doc.page_count)):
+                page = doc[number]
+                with tracer.span("pdf_parse"):
+                    blocks = page.get_text("blocks")
+                tracer.add("pages")
+                size = (page.rect.width, page.rect.height)
+                for b in blocks:
                     if len(b[4].strip()) > 20:
-                        yield {"text": b[4].strip(), "page": page.number + 1, "bbox": b[:4], "type": "pdf_block"}
+                        yield {"text": b[4].strip(), "page": page.number + 1, "bbox": b[:4], "page_size": size,
+                               "type": "pdf_block"}
+
+    @staticmethod
+    def page_count(path) -> int:
+        with PDFExtractor._open(path) as doc:
+            return doc.page_count
+
+    @staticmethod
+    def _open(path):
+        if isinstance(path, SourceBuffer) and path.buffered:
+            return fitz.open(stream=path.data, filetype="pdf")
+        return fitz.open(os.fspath(path))
 
 # --- 🖼️ Implementation: Images ---
 
@@ -76,7 +119,7 @@ class PDFExtractor(BaseExtractor):
 class ImageExtractor(BaseExtractor):
     @staticmethod
     def extract_all(processor, path, options):
-        return {"text": processor._extract_image_text(path), "images": [path], "metadata": {}}
+        return {"text": processor._extract_image_text(path), "images": [os.fspath(path)], "metadata": {}}
 
     @staticmethod
     def yield_chunks(processor, path, max_length):
@@ -84,76 +127,604 @@ class ImageExtractor(BaseExtractor):
         if text.strip():
             yield {"text": text, "page": 1, "type": "ocr_result"}
 
-# --- 📦 Implementation: Archives (ZIP) ---
+# --- 📦 Implementation: Archives (ZIP / TAR / compressed streams) ---
 
-@registry.register(['.zip'])
-class ZipExtractor(BaseExtractor):
-    MAX_SIZE = 100 * 1024 * 1024  # 100MB Safety Limit
+@registry.register(['.zip', '.tar', '.tgz', '.tbz2', '.txz', '.gz', '.bz2', '.xz'])
+class ArchiveExtractor(BaseExtractor):
+    """
+    Streams archive members through the regular extractor registry. Each
+    member is yielded under an `archive!member` source id (nested archives
+    chain further `!` segments) and is skipped when the processor's
+    `skip_member(member_id, sig)` hook reports it unchanged.
+    """
+    MAX_SIZE = 100 * 1024 * 1024        # 100MB Safety Limit per member
+    MAX_TOTAL_SIZE = 4 * 1024 ** 3      # Uncompressed budget per archive tree
+    MAX_RATIO = 200                     # Decompression-bomb guard (uncompressed / compressed)
+    MAX_DEPTH = 3                       # Nested archive limit
+    BLOCK_SIZE = 1024 * 1024            # Copy granularity, bounds memory per member
 
     @staticmethod
     def extract_all(processor, path, options):
         result = {"text": [], "metadata": {"type": "archive"}}
-        with zipfile.ZipFile(path, 'r') as z:
-            for name in z.namelist():
-                if z.getinfo(name).file_size > ZipExtractor.MAX_SIZE: continue
-                if any(name.endswith(ext) for ext in ['.txt', '.md', '.py', '.log']):
-                    with z.open(name) as f:
-                        text = f.read().decode('utf-8', errors='replace')
-                        result["text"].append({"text": text, "filename": name})
+        for chunk in ArchiveExtractor.yield_chunks(processor, path, options.get("max_length", 1500)):
+            if chunk["text"]:
+                result["text"].append({"text": chunk["text"], "filename": chunk["source"].split("!", 1)[1]})
         return result
 
+    @staticmethod
+    def yield_chunks(processor, path, max_length):
+        budget = [min(ArchiveExtractor.MAX_TOTAL_SIZE, os.path.getsize(path) * ArchiveExtractor.MAX_RATIO)]
+        yield from ArchiveExtractor._walk(processor, path, os.fspath(path), max_length, 0, budget)
+
+    @staticmethod
+    def _walk(processor, path, source, max_length, depth, budget):
+        skip = getattr(processor, "skip_member", None)
+        for name, sig, limit, open_member in ArchiveExtractor._members(path):
+            member_id = f"{source}!{name}"
+            unchanged = bool(skip and skip(member_id, sig))
+            # Marker so callers know the member still exists even when nothing is re-extracted
+            yield {"text": "", "type": "archive_member", "source": member_id, "member_sig": sig, "skipped": unchanged}
+            if unchanged:
+                continue
+
+            ext = pathlib.Path(name).suffix.lower()
+            with tracer.span("archive_copy"):
+                tmp_path = ArchiveExtractor._materialize(open_member, ext, min(limit, budget[0]), member_id)
+            if tmp_path is None:
+                continue
+            try:
+                budget[0] -= os.path.getsize(tmp_path)
+                if registry.get(ext) is ArchiveExtractor:
+                    if depth + 1 >= ArchiveExtractor.MAX_DEPTH:
+                        logger.warning(f"Archive nesting too deep, skipping: {member_id}")
+                        continue
+                    yield from ArchiveExtractor._walk(processor, tmp_path, member_id, max_length, depth + 1, budget)
+                    continue
+                if registry.get(ext) is None and not ArchiveExtractor._looks_textual(tmp_path):
+                    continue
+                for chunk in processor._dispatch_chunks(tmp_path, max_length):
+                    yield {**chunk, "source": member_id}
+            finally:
+                os.unlink(tmp_path)
+
+    @staticmethod
+    def _members(path):
+        """Yields (name, signature, size_limit, opener) for every regular file member."""
+        fileobj = path.seekable_stream() if isinstance(path, SourceBuffer) else open(path, 'rb')
+        with fileobj:
+            if zipfile.is_zipfile(fileobj):
+                with zipfile.ZipFile(fileobj, 'r') as z:
+                    for info in z.infolist():
+                        if info.is_dir() or info.flag_bits & 0x1:  # Directories / encrypted
+                            continue
+                        if info.file_size > ArchiveExtractor.MAX_SIZE:
+                            continue
+                        limit = min(ArchiveExtractor.MAX_SIZE, max(info.compress_size, 1) * ArchiveExtractor.MAX_RATIO)
+                        yield info.filename, f"crc:{info.CRC:08x}:{info.file_size}", limit, \
+                            (lambda info=info: z.open(info))
+                return
+            fileobj.seek(0)
+            if tarfile.is_tarfile(fileobj):
+                fileobj.seek(0)
+                # Stream mode: members are read strictly in order, nothing is buffered or seeked
+                with tarfile.open(fileobj=fileobj, mode='r|*') as tf:
+                    for member in tf:
+                        if not member.isfile() or member.size > ArchiveExtractor.MAX_SIZE:
+                            continue
+                        yield member.name, f"tar:{member.chksum}:{int(member.mtime)}:{member.size}", \
+                            ArchiveExtractor.MAX_SIZE, (lambda member=member: tf.extractfile(member))
+                return
+            # Single compressed stream (e.g. app.log.gz): one member named after the stem
+            fileobj.seek(0)
+            name = pathlib.Path(os.fspath(path))
+            opener = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}.get(name.suffix.lower())
+            if opener is None:
+                return
+            st = os.stat(path)
+            limit = min(ArchiveExtractor.MAX_SIZE, max(st.st_size, 1) * ArchiveExtractor.MAX_RATIO)
+            yield name.stem, f"stat:{int(st.st_mtime)}:{st.st_size}", limit, (lambda: opener(fileobj, 'rb'))
+
+    @staticmethod
+    def _materialize(open_member, ext, limit, member_id) -> Optional[str]:
+        """Copies a member to a temp file in fixed-size blocks, aborting past `limit` bytes."""
+        tmp = tempfile.NamedTemporaryFile(suffix=ext, delete=False)
+        written = 0
+        try:
+            with tmp, open_member() as src:
+                for block in iter(lambda: src.read(ArchiveExtractor.BLOCK_SIZE), b""):
+                    written += len(block)
+                    if written > limit:
+                        raise ValueError(f"exceeds {limit} bytes uncompressed")
+                    tmp.write(block)
+            return tmp.name
+        except Exception as e:
+            logger.warning(f"Skipping archive member {member_id}: {e}")
+            os.unlink(tmp.name)
+            return None
+
+    @staticmethod
+    def _looks_textual(path, blocksize=1024) -> bool:
+        with open(path, 'rb') as f:
+            return b'\0' not in f.read(blocksize)
+
+# --- 📝 Implementation: Office documents (OOXML / ODF) ---
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+_TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+_DRAW = "{urn:oasis:names:tc:opendocument:xmlns:drawing:1.0}"
+
+
+def _iter_blocks(stream, tags):
+    """
+    Yields `(element, ancestors)` for every completed element whose tag is in
+    `tags`. Blocks, and anything closed outside a block, are detached as
+    soon as they end, so the tree holds one block at a time however large
+    the part is.
+    """
+    stack, inside = [], 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            inside += elem.tag in tags
+            continue
+        stack.pop()
+        block = elem.tag in tags
+        if block:
+            inside -= 1
+            yield elem, stack
+        if block or not inside:
+            if stack:
+                stack[-1].remove(elem)
+            elem.clear()
+
+
+class OfficeExtractor(BaseExtractor):
+    """
+    Zipped-XML documents. Subclasses stream `(page, text)` blocks (a
+    paragraph, a slide's paragraph, a sheet row) out of the package parts
+    with `_iter_blocks`; blocks are packed into chunks of up to
+    `max_length` characters that never span pages, slides or sheets.
+    """
+    TYPE = "office_text"
+    MAX_RATIO = ArchiveExtractor.MAX_RATIO  # Decompression-bomb guard per part
+
+    @classmethod
+    def extract_all(cls, processor, path, options):
+        chunks = cls.yield_chunks(processor, path, options.get("max_length", 1500))
+        return {"text": [{"text": c["text"], "page": c["page"]} for c in chunks], "metadata": {"type": cls.TYPE}}
+
+    @classmethod
+    def yield_chunks(cls, processor, path, max_length):
+        fileobj = path.seekable_stream() if isinstance(path, SourceBuffer) else open(path, 'rb')
+        with fileobj, zipfile.ZipFile(fileobj) as z:
+            page, parts, size = None, [], 0
+            for number, text in cls._blocks(z):
+                if parts and (number != page or size + len(text) > max_length):
+                    yield {"text": "\n".join(parts), "page": page, "type": cls.TYPE}
+                    parts, size = [], 0
+                page = number
+                parts.append(text)
+                size += len(text) + 1
+            if parts:
+                yield {"text": "\n".join(parts), "page": page, "type": cls.TYPE}
+
+    @classmethod
+    def _blocks(cls, z) -> Generator[Tuple[int, str], None, None]:
+        raise NotImplementedError
+
+    @classmethod
+    def _part(cls, z, name):
+        """Opens a package part as a stream, or None when it is missing or suspiciously compressed."""
+        try:
+            info = z.getinfo(name)
+        except KeyError:
+            return None
+        if info.file_size > max(info.compress_size, 1) * cls.MAX_RATIO:
+            logger.warning(f"Skipping part {name}: compression ratio above {cls.MAX_RATIO}")
+            return None
+        return z.open(info)
+
+    @classmethod
+    def _targets(cls, z, rels: str, base: str) -> Dict[str, str]:
+        """{relationship id: part name} from an OOXML .rels part."""
+        targets = {}
+        stream = cls._part(z, rels)
+        if stream is None:
+            return targets
+        with stream:
+            for rel, _ in _iter_blocks(stream, {_REL + "Relationship"}):
+                target = rel.get("Target", "")
+                targets[rel.get("Id")] = target[1:] if target.startswith("/") else \
+                    posixpath.normpath(posixpath.join(base, target))
+        return targets
+
+    @staticmethod
+    def _ooxml_text(p, t: str, br=()) -> str:
+        out = []
+        for e in p.iter():
+            if e.tag == t:
+                out.append(e.text or "")
+            elif e.tag.endswith("}tab"):
+                out.append("\t")
+            elif e.tag in br:
+                out.append("\n")
+        return "".join(out).strip()
+
+    @staticmethod
+    def _odf_text(elem) -> str:
+        out = [elem.text or ""]
+        for child in elem:
+            if child.tag == _TEXT + "s":
+                out.append(" " * int(child.get(_TEXT + "c", 1)))
+            elif child.tag == _TEXT + "tab":
+                out.append("\t")
+            elif child.tag == _TEXT + "line-break":
+                out.append("\n")
+            else:
+                out.append(OfficeExtractor._odf_text(child))
+            out.append(child.tail or "")
+        return "".join(out)
+
+@registry.register(['.docx', '.docm'])
+class DocxExtractor(OfficeExtractor):
+    """Body paragraphs (including table cells), then footnotes and endnotes."""
+    TYPE = "docx_paragraph"
+    PARTS = ("word/document.xml", "word/footnotes.xml", "word/endnotes.xml")
+
+    @classmethod
+    def _blocks(cls, z):
+        for name in cls.PARTS:
+            stream = cls._part(z, name)
+            if stream is None:
+                continue
+            with stream:
+                for p, _ in _iter_blocks(stream, {_W + "p"}):
+                    text = cls._ooxml_text(p, _W + "t", (_W + "br", _W + "cr"))
+                    if text:
+                        yield 1, text
+
+@registry.register(['.pptx', '.pptm'])
+class PptxExtractor(OfficeExtractor):
+    """Text of each slide in presentation order; `page` is the slide number."""
+    TYPE = "pptx_slide"
+
+    @classmethod
+    def _blocks(cls, z):
+        for number, name in enumerate(cls._slides(z), 1):
+            stream = cls._part(z, name)
+            if stream is None:
+                continue
+            with stream:
+                for p, _ in _iter_blocks(stream, {_A + "p"}):
+                    text = cls._ooxml_text(p, _A + "t", (_A + "br",))
+                    if text:
+                        yield number, text
+
+    @classmethod
+    def _slides(cls, z) -> List[str]:
+        targets = cls._targets(z, "ppt/_rels/presentation.xml.rels", "ppt")
+        stream = cls._part(z, "ppt/presentation.xml")
+        if stream is not None:
+            with stream:
+                slides = [targets.get(s.get(_R + "id")) for s, _ in _iter_blocks(stream, {_P + "sldId"})]
+            if slides and all(slides):
+                return slides
+        # No usable slide list: fall back to the part names (slide1.xml, slide2.xml, ...)
+        names = [n for n in z.namelist() if n.startswith("ppt/slides/slide") and n.endswith(".xml")]
+        return sorted(names, key=lambda n: int("".join(filter(str.isdigit, posixpath.basename(n))) or 0))
+
+@registry.register(['.xlsx', '.xlsm'])
+class XlsxExtractor(OfficeExtractor):
+    """
+    One block per non-empty row, cells tab-separated, preceded by the sheet
+    name; `page` is the sheet's position. Only the shared-string table is
+    held in memory (it is deduplicated, so it grows with distinct strings,
+    not with rows).
+    """
+    TYPE = "xlsx_rows"
+
+    @classmethod
+    def _blocks(cls, z):
+        shared = cls._shared_strings(z)
+        targets = cls._targets(z, "xl/_rels/workbook.xml.rels", "xl")
+        stream = cls._part(z, "xl/workbook.xml")
+        if stream is None:
+            return
+        with stream:
+            sheets = [(s.get("name", ""), targets.get(s.get(_R + "id"))) for s, _ in _iter_blocks(stream, {_S + "sheet"})]
+        for number, (title, name) in enumerate(sheets, 1):
+            stream = cls._part(z, name) if name else None
+            if stream is None:
+                continue
+            yield number, title
+            with stream:
+                for row, _ in _iter_blocks(stream, {_S + "row"}):
+                    cells = [v for v in (cls._cell(c, shared) for c in row.iter(_S + "c")) if v]
+                    if cells:
+                        yield number, "\t".join(cells)
+
+    @classmethod
+    def _shared_strings(cls, z) -> List[str]:
+        stream = cls._part(z, "xl/sharedStrings.xml")
+        if stream is None:
+            return []
+        with stream:
+            # Phonetic runs (rPh) are reading aids, not cell text
+            return ["".join(t.text or "" for r in [si] + [e for e in si if e.tag == _S + "r"]
+                            for t in r if t.tag == _S + "t")
+                    for si, _ in _iter_blocks(stream, {_S + "si"})]
+
+    @staticmethod
+    def _cell(c, shared: List[str]) -> str:
+        kind = c.get("t")
+        if kind == "inlineStr":
+            return "".join(t.text or "" for t in c.iter(_S + "t")).strip()
+        v = c.find(_S + "v")
+        if v is None or v.text is None:
+            return ""
+        if kind == "s":
+            index = int(v.text)
+            return shared[index].strip() if index < len(shared) else ""
+        if kind == "b":
+            return "TRUE" if v.text == "1" else "FALSE"
+        return v.text.strip()
+
+@registry.register(['.odt'])
+class OdtExtractor(OfficeExtractor):
+    """Paragraphs and headings of content.xml (lists, tables and notes included)."""
+    TYPE = "odt_paragraph"
+
+    @classmethod
+    def _blocks(cls, z):
+        stream = cls._part(z, "content.xml")
+        if stream is None:
+            return
+        with stream:
+            for p, _ in _iter_blocks(stream, {_TEXT + "p", _TEXT + "h"}):
+                text = cls._odf_text(p).strip()
+                if text:
+                    yield 1, text
+
+@registry.register(['.odp'])
+class OdpExtractor(OfficeExtractor):
+    """Paragraphs per slide (draw:page); `page` is the slide number."""
+    TYPE = "odp_slide"
+
+    @classmethod
+    def _blocks(cls, z):
+        stream = cls._part(z, "content.xml")
+        if stream is None:
+            return
+        done = 0  # Slides closed so far
+        with stream:
+            for elem, ancestors in _iter_blocks(stream, {_DRAW + "page", _TEXT + "p", _TEXT + "h"}):
+                if elem.tag == _DRAW + "page":
+                    done += 1
+                    continue
+                text = cls._odf_text(elem).strip()
+                if text and any(a.tag == _DRAW + "page" for a in ancestors):
+                    yield done + 1, text
+
+@registry.register(['.ods'])
+class OdsExtractor(OfficeExtractor):
+    """
+    Like xlsx: one block per non-empty row, preceded by the sheet name.
+    Repeated cells and rows (number-*-repeated) are read once.
+    """
+    TYPE = "ods_rows"
+
+    @classmethod
+    def _blocks(cls, z):
+        stream = cls._part(z, "content.xml")
+        if stream is None:
+            return
+        done, named = 0, False  # Sheets closed so far; current sheet's name emitted
+        with stream:
+            for elem, ancestors in _iter_blocks(stream, {_TABLE + "table", _TABLE + "table-row"}):
+                if elem.tag == _TABLE + "table":
+                    done, named = done + 1, False
+                    continue
+                cells = ["\n".join(cls._odf_text(p).strip() for p in cell.iter(_TEXT + "p")).strip()
+                         for cell in elem if cell.tag in (_TABLE + "table-cell", _TABLE + "covered-table-cell")]
+                cells = [c for c in cells if c]
+                if not cells:
+                    continue
+                if not named:
+                    table = next(a for a in reversed(ancestors) if a.tag == _TABLE + "table")
+                    named = True
+                    yield done + 1, table.get(_TABLE + "name", "")
+                yield done + 1, "\t".join(cells)
+
 # --- 🚀 The Main Processor Engine ---
 
 class FileProcessor:
-    def __init__(self, ocr_lang='eng', max_workers=4):
+    TEXT_BLOCK_SIZE = 1024 * 1024  # Buffered read size for streaming text
+    SNIFF_SIZE = 4096              # Bytes handed to chardet
+
+    def __init__(self, ocr_lang='eng', max_workers=4, max_text_bytes=0, ocr_gate_threshold=0.0):
         self.ocr_lang = ocr_lang
+        # Images scoring below the threshold are assumed textless and skip tesseract (0 = OCR all)
+        self.ocr_gate = TextPresenceGate(ocr_gate_threshold)
         self.tess_config = r'--oem 3 --psm 3'
         self.max_workers = max_workers
+        # Upper bound on bytes read from a single text file (0 = read everything)
+        self.max_text_bytes = max_text_bytes
+        # Optional hook `skip_member(member_id, sig) -> bool` used by archive extraction
+        self.skip_member = None
 
-    @profile_performance
-    def get_smart_chunks(self, path: str) -> Generator:
-        ext = pathlib.Path(path).suffix.lower()
+    # Timed per yielded chunk, so only a sample of files pays for it
+    @profile_performance(sample_every=8)
+    def get_smart_chunks(self, path, pages: Optional[Tuple[int, int]] = None) -> Generator:
+        """
+        `path` may be a filesystem path or an already-read `SourceBuffer`.
+        `pages=(start, stop)` limits paged formats to that range of pages.
+        """
+        yield from self._dispatch_chunks(path, 1500, pages)
+
+    def plan_pages(self, path, first_pages: int) -> Tuple[Optional[int], Optional[Tuple[int, int]]]:
+        """
+        (page count, first page range) for a paged document with more than
+        `first_pages` pages, which is then indexed a range at a time;
+        (None, None) for anything indexed whole.
+        """
+        extractor = registry.get(pathlib.Path(os.fspath(path)).suffix.lower())
+        if first_pages <= 0 or extractor is None or not extractor.paged:
+            return None, None
+        total = extractor.page_count(path)
+        if total <= first_pages:
+            return None, None
+        return total, (0, first_pages)
+
+    def _dispatch_chunks(self, path, max_length: int, pages: Optional[Tuple[int, int]] = None) -> Generator:
+        ext = pathlib.Path(os.fspath(path)).suffix.lower()
         extractor = registry.get(ext)
-        if extractor:
-            yield from extractor.yield_chunks(self, path, 1500)
+        if extractor and pages is not None and extractor.paged:
+            yield from extractor.yield_chunks(self, path, max_length, pages)
+        elif extractor:
+            yield from extractor.yield_chunks(self, path, max_length)
         else:
-            # Default text fallback
-            text = self._extract_plain_text(path)
-            if text: yield {"text": text, "page": 1, "type": "raw_text"}
+            # Default text fallback, streamed so large files stay fully searchable
+            for text in self._iter_plain_text(path, max_length):
+                yield {"text": text, "page": 1, "type": "raw_text"}
 
     def _extract_image_text(self, path):
-        with Image.open(path) as img:
-            processed_img = ImageOps.grayscale(img)
-            return pytesseract.image_to_string(processed_img, lang=self.ocr_lang, config=self.tess_config)
+        open_image = lambda: Image.open(self._binary_reader(path) if isinstance(path, SourceBuffer) else path)
+        if self.ocr_gate.enabled:
+            with open_image() as img:
+                pixels = img.width * img.height
+                with tracer.span("ocr_gate"):
+                    score = self.ocr_gate.score(img)
+            if score < self.ocr_gate.threshold:
+                tracer.add("ocr_skipped")
+                tracer.add("ocr_skipped_pixels", pixels)
+                return ""
+            tracer.add("ocr_images")
+            tracer.add("ocr_pixels", pixels)
+        with open_image() as img:
+            with tracer.span("image_decode"):
+                processed_img = ImageOps.grayscale(img)
+            with tracer.span("ocr"):
+                return pytesseract.image_to_string(processed_img, lang=self.ocr_lang, config=self.tess_config)
 
-    @profile_performance
-    def _extract_plain_text(self, path, max_length=10000):
-        # Auto-encoding detection logic
+    @profile_performance(sample_every=8)
+    def _extract_plain_text(self, path, max_length=None):
+        """Returns the (capped) text of a file as one string; prefer `_iter_plain_text`."""
+        parts, total = [], 0
+        for piece in self._iter_plain_text(path, 8192):
+            parts.append(piece)
+            total += len(piece)
+            if max_length and total >= max_length:
+                break
+        text = "".join(parts)
+        return text[:max_length] if max_length else text
+
+    def _iter_plain_text(self, path, max_length) -> Generator[str, None, None]:
+        """
+        Streams a text file as pieces of at most `max_length` characters.
+        The file is opened once: the first block feeds encoding detection and
+        decoding alike, and memory stays bounded by TEXT_BLOCK_SIZE.
+        """
+        try:
+            with self._binary_reader(path) as f:
+                with tracer.span("text_decode"):
+                    block = f.read(self.TEXT_BLOCK_SIZE)
+                decoder = codecs.getincrementaldecoder(self._detect_encoding(block))(errors='replace')
+                consumed, tail = 0, ""
+                while block:
+                    if self.max_text_bytes:
+                        block = block[:self.max_text_bytes - consumed]
+                    consumed += len(block)
+                    with tracer.span("text_decode"):
+                        buf = tail + decoder.decode(block)
+                    pos = 0
+                    while len(buf) - pos >= max_length:
+                        cut = self._split_point(buf, pos, max_length)
+                        yield buf[pos:cut]
+                        pos = cut
+                    tail = buf[pos:]
+                    if self.max_text_bytes and consumed >= self.max_text_bytes:
+                        break
+                    with tracer.span("text_decode"):
+                        block = f.read(self.TEXT_BLOCK_SIZE)
+                tail += decoder.decode(b"", final=True)
+                if tail.strip():
+                    yield tail
+        except OSError as e:
+            logger.error(f"Could not read {path}: {e}")
+
+    @staticmethod
+    def _binary_reader(path):
+        """Binary stream for a path or `SourceBuffer`; the buffer is never re-read from disk."""
+        if isinstance(path, SourceBuffer):
+            return path.stream()
+        return open(path, 'rb')
+
+    def _detect_encoding(self, sample: bytes) -> str:
         enc = 'utf-8'
-        if chardet:
-            with open(path, 'rb') as f:
-                enc = chardet.detect(f.read(4096))['encoding'] or 'utf-8'
-        
+        if chardet and sample:
+            enc = chardet.detect(sample[:self.SNIFF_SIZE])['encoding'] or 'utf-8'
+        # An ASCII-only sample says nothing about later bytes; UTF-8 is a safe superset
+        if enc.lower() == 'ascii':
+            enc = 'utf-8'
         try:
-            with open(path, 'r', encoding=enc, errors='replace') as f:
-                return f.read(max_length)
-        except:
-            return ""
+            codecs.lookup(enc)
+        except LookupError:
+            enc = 'utf-8'
+        return enc
+
+    @staticmethod
+    def _split_point(buf: str, start: int, max_length: int) -> int:
+        """Prefers to cut at a newline or space in the second half of the window."""
+        end = start + max_length
+        for sep in ('\n', ' '):
+            cut = buf.rfind(sep, start + max_length // 2, end)
+            if cut != -1:
+                return cut + 1
+        return end
 
     @profile_performance
-    def batch_extract(self, paths: List[str]):
-        """Hybrid Batch: Uses ProcessPool for CPU heavy tasks."""
-        results = {}
-        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_path = {executor.submit(self._extract_all_wrapper, p): p for p in paths}
-            for future in concurrent.futures.as_completed(future_to_path):
-                results[future_to_path[future]] = future.result()
-        return results
-
-    @staticmethod
-    def _extract_all_wrapper(path):
-        # Helper for pickling in ProcessPool
-        p = FileProcessor()
-        ext = pathlib.Path(path).suffix.lower()
-        extractor = registry.get(ext)
-        return extractor.extract_all(p, path, {}) if extractor else None
\ No newline at end of file
+    def batch_extract(self, paths: List[str], timeout: float = 120.0, max_rss_mb: int = 2048):
+        """
+        Hybrid Batch: each file is extracted in a supervised worker process with
+        a per-file timeout and memory ceiling. Failed files map to
+        {"error": reason, "detail": ...} instead of blocking the batch.
+        """
+        from app.core.sandbox import SupervisorPool
+        pool = SupervisorPool(
+            self.max_workers, timeout=timeout, max_rss_mb=max_rss_mb,
+            processor_kwargs={"ocr_lang": self.ocr_lang, "max_text_bytes": self.max_text_bytes,
+                              "ocr_gate_threshold": self.ocr_gate.threshold},
+        )
+        try:
+            return pool.map(paths)
+        finally:
+            pool.close()
+
+
+# --- 🗄️ Post-Index Archiving ---
+
+ARCHIVE_DIR_NAME = "_slam_archive"
+
+
+def archive_on_index(path: str, archive_dir: Optional[str] = None) -> str:
+    """
+    Moves an indexed file into `archive_dir` (default: `_slam_archive` next to
+    it) and returns the new path. Name clashes get a numeric suffix. The
+    caller re-keys the index (`SLAMBackend.move_file`).
+    """
+    folder = archive_dir or os.path.join(os.path.dirname(os.path.abspath(path)), ARCHIVE_DIR_NAME)
+    os.makedirs(folder, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    target = os.path.join(folder, stem + ext)
+    n = 1
+    while os.path.exists(target):
+        target = os.path.join(folder, f"{stem}_{n}{ext}")
+        n += 1
+    shutil.move(path, target)
+    return target
@@ -0,0 +1,190 @@
+import hashlib
+import io
+import itertools
+import os
+import queue
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import fitz
+from PIL import Image
+
+from app.utils.diagnostics import logger
+from app.utils.metrics import metrics
+
+PDF_EXTENSIONS = {'.pdf'}
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.tiff', '.bmp'}
+
+PRIORITY_CLICK = 0
+PRIORITY_PREFETCH = 1
+
+
+def renderable(meta: Dict) -> bool:
+    """Files on disk (not archive members) that are PDFs or images."""
+    path = meta.get("path", "")
+    if meta.get("source", path) != path:
+        return False
+    ext = os.path.splitext(path)[1].lower()
+    return ext in PDF_EXTENSIONS or ext in IMAGE_EXTENSIONS
+
+
+def parse_bbox(meta: Dict) -> Optional[Tuple[float, float, float, float]]:
+    """
+    `bbox` is stored as "x0,y0,x1,y1" in fractions of the page size (Chroma
+    metadata must be scalar), so it maps onto a render of any resolution.
+    """
+    raw = meta.get("bbox")
+    if not raw:
+        return None
+    try:
+        x0, y0, x1, y1 = (float(v) for v in raw.split(","))
+        return x0, y0, x1, y1
+    except ValueError:
+        return None
+
+
+class RenderCache:
+    """
+    Size-capped on-disk LRU of PNG renders keyed by content hash and page.
+    Recency is the file mtime, refreshed on every hit, so the LRU order
+    survives restarts.
+    """
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes = {}
+        for name in os.listdir(directory):
+            if name.endswith(".png"):
+                self._sizes[name] = os.path.getsize(os.path.join(directory, name))
+        self._total = sum(self._sizes.values())
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        path = self.path_for(key)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data) - self._sizes.get(f"{key}.png", 0)
+            self._sizes[f"{key}.png"] = len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+        return path
+
+    def _evict(self):
+        # Oldest access first, down to 90% of the cap so eviction isn't triggered on every put
+        def mtime(name):
+            try:
+                return os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                return 0.0
+        for name in sorted(self._sizes, key=mtime):
+            if self._total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            self._total -= self._sizes.pop(name)
+
+
+class RenderService:
+    """
+    Renders PDF pages and image thumbnails on one background thread (fitz is
+    not thread-safe). Requests are served click-first, then prefetches;
+    `cancel_prefetch()` drops prefetches queued for an older result list.
+    Callbacks run on the render thread with the PNG path, or None on failure.
+    """
+    WIDTH = 280  # Matches the preview panel
+
+    def __init__(self, cache_dir: str = "./slam_db/render_cache", max_bytes: int = 256 * 1024 * 1024):
+        self.cache = RenderCache(cache_dir, max_bytes)
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()  # FIFO within a priority
+        self._prefetch_gen = 0
+        self._hits = metrics.counter("cache_requests_total", labels={"cache": "render", "result": "hit"})
+        self._misses = metrics.counter("cache_requests_total", labels={"cache": "render", "result": "miss"})
+        self._latency = metrics.histogram("render_seconds", "Latency of one page/thumbnail render")
+        self._thread = threading.Thread(target=self._run, name="SLAM-Render", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def key(meta: Dict) -> str:
+        """Content hash + page; falls back to the file's stat when no hash was recorded."""
+        content = meta.get("hash")
+        if not content:
+            try:
+                st = os.stat(meta["path"])
+                content = hashlib.sha256(f"{meta['path']}:{st.st_size}:{st.st_mtime}".encode()).hexdigest()
+            except OSError:
+                content = hashlib.sha256(meta["path"].encode()).hexdigest()
+        return f"{content[:32]}_p{meta.get('page', 1)}_w{RenderService.WIDTH}"
+
+    def cached(self, meta: Dict) -> Optional[str]:
+        """Cheap lookup the GUI may call directly: the PNG path if already rendered."""
+        path = self.cache.get(self.key(meta))
+        if path is not None:
+            self._hits.inc()
+        return path
+
+    def request(self, meta: Dict, callback: Callable[[Optional[str]], None],
+                priority: int = PRIORITY_CLICK):
+        gen = self._prefetch_gen
+        self._queue.put((priority, next(self._seq), gen, meta, callback))
+
+    def prefetch(self, meta: Dict):
+        self.request(meta, lambda path: None, PRIORITY_PREFETCH)
+
+    def cancel_prefetch(self):
+        self._prefetch_gen += 1
+
+    def _run(self):
+        while True:
+            priority, _, gen, meta, callback = self._queue.get()
+            if priority == PRIORITY_PREFETCH and gen != self._prefetch_gen:
+                continue
+            try:
+                path = self._render(meta)
+            except Exception as e:
+                logger.warning(f"Render of {meta.get('path')} failed: {e}")
+                path = None
+            try:
+                callback(path)
+            except Exception as e:
+                logger.error(f"Render callback failed: {e}")
+
+    def _render(self, meta: Dict) -> str:
+        key = self.key(meta)
+        path = self.cache.get(key)
+        if path is not None:
+            self._hits.inc()
+            return path
+        self._misses.inc()
+        with self._latency.time():
+            if os.path.splitext(meta["path"])[1].lower() in PDF_EXTENSIONS:
+                with fitz.open(meta["path"]) as doc:
+                    page = doc[max(0, min(int(meta.get("page", 1)) - 1, len(doc) - 1))]
+                    zoom = self.WIDTH / page.rect.width
+                    data = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+            else:
+                with Image.open(meta["path"]) as img:
+                    img.thumbnail((self.WIDTH, self.WIDTH * 2))
+                    if img.mode not in ("RGB", "RGBA", "L"):
+                        img = img.convert("RGB")
+                    buf = io.BytesIO()
+                    img.save(buf, format="PNG")
+                    data = buf.getvalue()
+        return self.cache.put(key, data)
@@ -0,0 +1,283 @@
+import time
+import multiprocessing
+import concurrent.futures
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import psutil
+
+from app.utils.diagnostics import logger
+
+
+# --- ⚠️ Failure Types ---
+
+class ExtractionError(Exception):
+    """Raised when a sandboxed extraction fails; `reason` is stored with the dead letter."""
+    reason = "error"
+
+
+class ExtractionTimeout(ExtractionError):
+    reason = "timeout"
+
+
+class ExtractionMemoryError(ExtractionError):
+    reason = "memory"
+
+
+class ExtractionCrash(ExtractionError):
+    reason = "crash"
+
+
+# --- 👷 Worker Process ---
+
+def _worker_main(conn, processor_kwargs: Dict[str, Any], manifest_path: Optional[str], batch_size: int):
+    """Child process loop: extract one file per request and stream chunks back."""
+    from app.core.processor import FileProcessor
+    from app.core.source import SourceBuffer
+    from app.utils.tracing import tracer
+
+    proc = FileProcessor(**processor_kwargs)
+    if manifest_path:
+        from app.database.manifest import FileManifest
+        manifest = FileManifest(manifest_path)
+
+        def skip_member(member_id, sig):
+            entry = manifest.get(member_id)
+            return entry is not None and entry["sig"] == sig
+        proc.skip_member = skip_member
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if msg[0] == "stop":
+            return
+        _, path, known_hash, pages, first_pages = msg
+        try:
+            # Spans are shipped back with "done" and merged into the parent's trace
+            with tracer.trace(path, persist=False) as trace:
+                with tracer.span("read_hash"):
+                    src = SourceBuffer(path)
+                with src:
+                    file_hash = src.hexdigest() if src.buffered else None
+                    header = {"hash": file_hash, "size": src.size, "mtime": src.mtime, "pages": None, "range": pages}
+                    if known_hash and file_hash == known_hash:
+                        conn.send(("unchanged", header))
+                        continue
+                    if pages is None:
+                        # Large paged documents start with their first pages only
+                        header["pages"], header["range"] = proc.plan_pages(src, first_pages)
+                    conn.send(("header", header))
+                    batch = []
+                    for chunk in proc.get_smart_chunks(src, pages=header["range"]):
+                        batch.append(chunk)
+                        if len(batch) >= batch_size:
+                            conn.send(("chunks", batch))
+                            batch = []
+                    if batch:
+                        conn.send(("chunks", batch))
+                    conn.send(("done", {"hash": src.hexdigest(), "spans": trace.spans, "counts": trace.counts}))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+# --- 🛡️ Supervisor ---
+
+class ExtractionJob:
+    """
+    One file being extracted by a supervised worker. `hash`, `size`, `mtime`
+    and `unchanged` are known on creation; iterating yields the chunks.
+    `range` is the page range being extracted (None for the whole file) and
+    `pages` the document's page count when the worker chose the range.
+    """
+    def __init__(self, supervisor: "ExtractionSupervisor", path: str, header: Dict, unchanged: bool):
+        self.supervisor = supervisor
+        self.path = path
+        self.hash = header["hash"]
+        self.size = header["size"]
+        self.mtime = header["mtime"]
+        self.unchanged = unchanged
+        self.pages = header.get("pages")
+        self.range = header.get("range")
+        self.spans: Dict[str, List[float]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self.unchanged:
+            return
+        finished = False
+        try:
+            while True:
+                kind, payload = self.supervisor._recv(self.path)
+                if kind == "chunks":
+                    yield from payload
+                elif kind == "done":
+                    self.hash = payload["hash"]
+                    self.spans, self.counts = payload["spans"], payload["counts"]
+                    finished = True
+                    return
+                else:
+                    finished = True
+                    raise ExtractionError(payload)
+        finally:
+            if not finished:
+                # Consumer stopped early or the worker was killed: the next file gets a fresh process
+                self.supervisor._kill()
+
+
+class ExtractionSupervisor:
+    """
+    Runs `FileProcessor` extraction in a child process so one malformed PDF,
+    huge TIFF or hung tesseract cannot stall the indexer. Each file gets a
+    wall-clock budget (time spent waiting on the worker) and an RSS ceiling;
+    violations kill the worker and raise an `ExtractionError` subclass. The
+    worker is recycled every `recycle_after` files to contain native leaks.
+    """
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, timeout: float = 120.0, max_rss_mb: int = 2048, recycle_after: int = 200,
+                 processor_kwargs: Optional[Dict[str, Any]] = None, manifest_path: Optional[str] = None,
+                 batch_size: int = 64):
+        self.timeout = timeout
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.recycle_after = recycle_after
+        self.processor_kwargs = processor_kwargs or {}
+        self.manifest_path = manifest_path
+        self.batch_size = batch_size
+        self._ctx = multiprocessing.get_context("spawn")
+        self._proc = None
+        self._conn = None
+        self._files_done = 0
+        self._waited = 0.0
+        self._last_rss_check = 0.0
+        self.stats = {"files": 0, "timeouts": 0, "memory_kills": 0, "crashes": 0, "restarts": 0}
+
+    def extract(self, path: str, known_hash: Optional[str] = None,
+                pages: Optional[Tuple[int, int]] = None, first_pages: int = 0) -> ExtractionJob:
+        """
+        Starts extracting `path`; returns as soon as the worker has read and
+        hashed it. `pages` extracts one page range; otherwise paged documents
+        longer than `first_pages` (if set) are cut to their first pages.
+        """
+        if self._proc is None or not self._proc.is_alive() or self._files_done >= self.recycle_after:
+            self._restart()
+        self._files_done += 1
+        self.stats["files"] += 1
+        self._waited = 0.0
+        self._conn.send(("extract", path, known_hash, pages, first_pages))
+        kind, payload = self._recv(path)
+        if kind == "error":
+            raise ExtractionError(payload)
+        return ExtractionJob(self, path, payload, unchanged=(kind == "unchanged"))
+
+    def _recv(self, path: str):
+        while True:
+            start = time.monotonic()
+            ready = self._conn.poll(self.POLL_INTERVAL)
+            self._waited += time.monotonic() - start
+            # RSS is sampled at most once per interval, even while chunks stream in
+            if start - self._last_rss_check >= self.POLL_INTERVAL:
+                self._last_rss_check = start
+                self._check_rss()
+            if ready:
+                try:
+                    return self._conn.recv()
+                except (EOFError, OSError):
+                    self.stats["crashes"] += 1
+                    self._proc.join(1)
+                    code = self._proc.exitcode
+                    self._kill()
+                    raise ExtractionCrash(f"worker died (exit code {code})")
+            if not self._proc.is_alive():
+                self.stats["crashes"] += 1
+                code = self._proc.exitcode
+                self._kill()
+                raise ExtractionCrash(f"worker died (exit code {code})")
+            if self._waited > self.timeout:
+                self.stats["timeouts"] += 1
+                self._kill()
+                raise ExtractionTimeout(f"extraction exceeded {self.timeout:.0f}s")
+
+    def _check_rss(self):
+        rss = self._worker_rss()
+        if rss > self.max_rss:
+            self.stats["memory_kills"] += 1
+            self._kill()
+            raise ExtractionMemoryError(f"worker RSS {rss / 2**20:.0f}MB exceeded {self.max_rss / 2**20:.0f}MB")
+
+    def _worker_rss(self) -> int:
+        try:
+            return psutil.Process(self._proc.pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
+    def _restart(self):
+        self._kill()
+        parent_conn, child_conn = self._ctx.Pipe()
+        self._proc = self._ctx.Process(
+            target=_worker_main, name="SLAM-Extractor", daemon=True,
+            args=(child_conn, self.processor_kwargs, self.manifest_path, self.batch_size),
+        )
+        self._proc.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._files_done = 0
+        self.stats["restarts"] += 1
+
+    def _kill(self):
+        if self._proc is None:
+            return
+        if self._proc.is_alive():
+            self._proc.kill()
+        self._proc.join(5)
+        self._conn.close()
+        self._proc = None
+
+    def close(self):
+        if self._proc is not None and self._proc.is_alive():
+            try:
+                self._conn.send(("stop",))
+                self._proc.join(2)
+            except (OSError, ValueError):
+                pass
+        self._kill()
+
+
+class SupervisorPool:
+    """Fixed set of supervisors for batch extraction, one per thread."""
+    def __init__(self, size: int, **supervisor_kwargs):
+        self._local = threading.local()
+        self._all: List[ExtractionSupervisor] = []
+        self._lock = threading.Lock()
+        self.size = size
+        self.supervisor_kwargs = supervisor_kwargs
+
+    def _supervisor(self) -> ExtractionSupervisor:
+        sup = getattr(self._local, "sup", None)
+        if sup is None:
+            sup = self._local.sup = ExtractionSupervisor(**self.supervisor_kwargs)
+            with self._lock:
+                self._all.append(sup)
+        return sup
+
+    def _extract_one(self, path: str) -> Dict:
+        try:
+            job = self._supervisor().extract(path)
+            chunks = list(job)
+            return {"text": chunks, "metadata": {"hash": job.hash, "size": job.size}}
+        except ExtractionError as e:
+            logger.error(f"Sandboxed extraction of {path} failed ({e.reason}): {e}")
+            return {"error": e.reason, "detail": str(e)}
+
+    def map(self, paths: List[str]) -> Dict[str, Dict]:
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.size) as executor:
+            future_to_path = {executor.submit(self._extract_one, p): p for p in paths}
+            for future in concurrent.futures.as_completed(future_to_path):
+                results[future_to_path[future]] = future.result()
+        return results
+
+    def close(self):
+        for sup in self._all:
+            sup.close()
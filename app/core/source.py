@@ -0,0 +1,107 @@
+import io
+import os
+import hashlib
+import pathlib
+from typing import Optional
+
+
+class HashingReader(io.RawIOBase):
+    """Sequential file-like wrapper that hashes every byte read through it."""
+    def __init__(self, f, sha):
+        self._f = f
+        self._sha = sha
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self._sha.update(data)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        # The owning SourceBuffer closes the underlying file once hashing is complete
+        pass
+
+
+class SourceBuffer:
+    """
+    Opens a file exactly once for the whole ingestion path. The SHA-256 is
+    computed over the same bytes the extractors consume:
+
+    * files up to `buffer_limit` are read with large sequential reads into
+      memory and handed to fitz/PIL/text decoders as bytes or BytesIO;
+    * larger files are exposed as a sequential hashing stream; the hash is
+      finished by draining whatever the extractor did not read.
+    """
+    READ_SIZE = 4 * 1024 * 1024
+    DEFAULT_BUFFER_LIMIT = 256 * 1024 * 1024
+
+    def __init__(self, path: str, buffer_limit: Optional[int] = None):
+        self.path = str(path)
+        self.ext = pathlib.Path(self.path).suffix.lower()
+        self._sha = hashlib.sha256()
+        self._file = open(self.path, 'rb', buffering=0)
+        st = os.fstat(self._file.fileno())
+        self.size, self.mtime = st.st_size, st.st_mtime
+        self.data: Optional[bytes] = None
+        self._reader: Optional[HashingReader] = None
+
+        limit = self.DEFAULT_BUFFER_LIMIT if buffer_limit is None else buffer_limit
+        if self.size <= limit:
+            self.data = self._read_all()
+            self._file.close()
+        else:
+            self._reader = HashingReader(io.BufferedReader(self._file, self.READ_SIZE), self._sha)
+
+    @property
+    def buffered(self) -> bool:
+        return self.data is not None
+
+    @property
+    def bytes_read(self) -> int:
+        return len(self.data) if self.buffered else self._reader.bytes_read
+
+    def _read_all(self) -> bytes:
+        buf = bytearray()
+        for block in iter(lambda: self._file.read(self.READ_SIZE), b""):
+            self._sha.update(block)
+            buf += block
+        return bytes(buf)
+
+    def stream(self):
+        """Binary stream over the content: a BytesIO when buffered, else the one-shot hashing reader."""
+        if self.buffered:
+            return io.BytesIO(self.data)
+        return self._reader
+
+    def seekable_stream(self):
+        """Like `stream()`, but re-opens large files by path when the consumer needs to seek."""
+        if self.buffered:
+            return io.BytesIO(self.data)
+        return open(self.path, 'rb')
+
+    def hexdigest(self) -> str:
+        if not self.buffered:
+            for _ in iter(lambda: self._reader.read(self.READ_SIZE), b""):
+                pass
+        return self._sha.hexdigest()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __fspath__(self):
+        return self.path
@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.database.dedup import text_hash
+from app.utils.diagnostics import logger
+from app.utils.metrics import metrics
+
+
+class IndexCompactor:
+    """
+    Reconciles the Chroma collections (every lane), snippet store and manifest with the
+    filesystem, fsck-style. Drift categories:
+
+    * orphan       - chunk whose source has no manifest entry
+    * excess       - chunk index beyond the manifest's chunk count (file shrank)
+    * missing_file - chunk or manifest entry of a file that is gone
+    * stale_hash   - chunk embedded from another version of the file (or, for
+                     files too large to hash up front, of its stored snippet)
+    * incomplete   - manifest promises more chunks than the collection holds
+    * orphan_snippet, dead_letter - leftovers of deleted chunks/files
+
+    `run(dry_run=True)` only reports. Otherwise stale chunks and snippets
+    are deleted in bulk through the write-behind buffer, and files needing a
+    re-extract are invalidated in the manifest and passed to `enqueue`.
+    Paths for which `is_busy(path)` is true are being indexed and are skipped.
+    """
+    PAGE = 1000
+
+    def __init__(self, db, is_busy: Optional[Callable[[str], bool]] = None,
+                 enqueue: Optional[Callable[[List[str]], None]] = None):
+        self.db = db
+        self.writer = db.writer
+        self.manifest = db.manifest
+        self.snippets = db.snippets
+        self.dedup = getattr(db, "dedup", None)
+        self.is_busy = is_busy or (lambda path: False)
+        self.enqueue = enqueue
+        self.lock = threading.Lock()  # One pass at a time; model migration swaps under it too
+
+    def run(self, dry_run: bool = False) -> Dict:
+        with self.lock:
+            return self._run(dry_run)
+
+    def _run(self, dry_run: bool) -> Dict:
+        start = time.perf_counter()
+        # Pinned: a model migration may swap the default lane mid-pass
+        collections = list(self.db.lanes.values())
+        self.writer.flush()
+        counts = {k: 0 for k in ("orphan", "excess", "missing_file", "stale_hash", "incomplete",
+                                 "orphan_snippet", "dead_letter", "manifest_missing_file")}
+        stale: List[str] = []
+        stale_meta_bytes = 0
+        reindex, invalidate, drop_entries = set(), {}, set()
+        seen_ids, seen_per_source = set(), {}
+        scanned = skipped_busy = 0
+        exists_cache: Dict[str, bool] = {}
+
+        def exists(path):
+            if path not in exists_cache:
+                exists_cache[path] = os.path.lexists(path)
+            return exists_cache[path]
+
+        vector_bytes = 0
+        for collection in collections:
+            dim_bytes = self._vector_bytes(collection)
+            # Offsets shift while ingestion writes, so page through a snapshot of the ids instead
+            all_ids = collection.get(include=[])["ids"]
+            for start in range(0, len(all_ids), self.PAGE):
+                page = collection.get(ids=all_ids[start:start + self.PAGE], include=["metadatas"])
+                ids = page["ids"]
+                unhashed = [cid for cid, m in zip(ids, page["metadatas"])
+                             if m and not m.get("hash") and m.get("text_hash")]
+                texts = self.snippets.get_many(unhashed) if unhashed else {}
+                for chunk_id, meta in zip(ids, page["metadatas"]):
+                    scanned += 1
+                    meta = meta or {}
+                    source = meta.get("source") or meta.get("path") or chunk_id.rsplit("_", 1)[0]
+                    path = meta.get("path") or source.split("!", 1)[0]
+                    seen_ids.add(chunk_id)
+                    seen_per_source[source] = seen_per_source.get(source, 0) + 1
+                    if self.is_busy(path):
+                        skipped_busy += 1
+                        continue
+                    # Decisions use the live manifest: files may finish indexing during the scan
+                    entry = self.manifest.get(source)
+                    kind = None
+                    if not exists(path):
+                        kind = "missing_file"
+                    elif entry is None:
+                        kind = "orphan"
+                        reindex.add(path)
+                    elif int(meta.get("chunk_id", 0)) >= entry["chunks"]:
+                        kind = "excess"
+                    elif ((meta.get("hash") and entry["sig"] and meta["hash"] != entry["sig"])
+                          or (chunk_id in texts and text_hash(texts[chunk_id]) != meta["text_hash"])):
+                        kind = "stale_hash"
+                        invalidate[source] = entry
+                        reindex.add(path)
+                    if kind and not self.is_busy(path):
+                        counts[kind] += 1
+                        stale.append(chunk_id)
+                        stale_meta_bytes += len(json.dumps(meta))
+                        vector_bytes += dim_bytes
+
+        for entry in self.manifest.all_sources():
+            if self.is_busy(entry["path"]):
+                continue
+            if not exists(entry["path"]):
+                counts["manifest_missing_file"] += 1
+                drop_entries.add(entry["id"])
+            elif seen_per_source.get(entry["id"], 0) < entry["chunks"]:
+                live = self.manifest.get(entry["id"])
+                # Pieces shared with a near-duplicate have no vector of their own
+                shared = self.dedup.shared_count(entry["id"]) if self.dedup is not None else 0
+                if live and live["chunks"] - shared > seen_per_source.get(entry["id"], 0):
+                    if live["sig"]:
+                        counts["incomplete"] += 1
+                        invalidate[entry["id"]] = live
+                    reindex.add(entry["path"])  # Invalidated by an earlier pass, still pending
+
+        orphan_snippets = []
+        for chunk_id in self.snippets.ids():
+            if chunk_id in seen_ids or self.writer.get_pending(chunk_id):
+                continue
+            if self.is_busy(chunk_id.rsplit("_", 1)[0].split("!", 1)[0]):
+                continue
+            orphan_snippets.append(chunk_id)
+        # Chunks committed since the id snapshot have a vector after all
+        for start in range(0, len(orphan_snippets), self.PAGE):
+            batch = orphan_snippets[start:start + self.PAGE]
+            for collection in collections:
+                seen_ids.update(collection.get(ids=batch, include=[])["ids"])
+        orphan_snippets = [chunk_id for chunk_id in orphan_snippets if chunk_id not in seen_ids]
+        counts["orphan_snippet"] = len(orphan_snippets)
+
+        dead = [d["path"] for d in self.manifest.dead_letters() if not exists(d["path"])]
+        counts["dead_letter"] = len(dead)
+
+        snippet_ids = stale + orphan_snippets
+        reclaimed = {
+            "vectors": vector_bytes + stale_meta_bytes,
+            "snippets": self.snippets.stored_bytes(snippet_ids),
+        }
+
+        if not dry_run:
+            for chunk_id in stale:
+                self.writer.delete(chunk_id)
+            self.snippets.delete_many(snippet_ids)
+            for source_id in drop_entries:
+                self.manifest.remove(source_id)
+                if self.dedup is not None:
+                    # Members that shared its pieces are re-extracted in full
+                    for member, member_path in self.dedup.remove(source_id):
+                        for entry in self.manifest.sources_for(member_path):
+                            if entry["id"] in (member, member_path):
+                                invalidate[entry["id"]] = entry
+                        reindex.add(member_path)
+            for path in reindex:
+                # The file's own entry too, or an unchanged archive would skip its members
+                top = invalidate.get(path) or self.manifest.get(path)
+                if top:
+                    invalidate[path] = top
+            for source_id, entry in invalidate.items():
+                # An empty signature forces a full re-extract instead of a stat/hash skip
+                self.manifest.record(source_id, entry["path"], "", entry["chunks"])
+            for path in dead:
+                self.manifest.remove_dead_letter(path)
+            self.writer.flush()
+            for kind, n in counts.items():
+                if n:
+                    metrics.counter("compactor_fixed_total", "Index drift fixed by the compactor", {"kind": kind}).inc(n)
+            if self.enqueue and reindex:
+                self.enqueue(sorted(reindex))
+
+        report = {
+            "dry_run": dry_run,
+            "scanned_chunks": scanned,
+            "skipped_busy": skipped_busy,
+            "drift": counts,
+            "stale_chunks": len(stale),
+            "reindex": len(reindex),
+            "reindex_sample": sorted(reindex)[:20],
+            "reclaimed_bytes": {**reclaimed, "total": sum(reclaimed.values())},
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        verb = "would reclaim" if dry_run else "reclaimed"
+        logger.info(f"Index {'verify' if dry_run else 'compaction'}: {len(stale)} stale chunk(s), "
+                    f"{len(orphan_snippets)} orphan snippet(s), {verb} ~{report['reclaimed_bytes']['total'] / 2**20:.1f} MB")
+        return report
+
+    @staticmethod
+    def _vector_bytes(collection) -> int:
+        sample = collection.get(limit=1, include=["embeddings"])
+        embeddings = sample.get("embeddings")
+        return len(embeddings[0]) * 4 if embeddings is not None and len(embeddings) else 0
+
+    def run_periodically(self, interval: float, stop: threading.Event) -> threading.Thread:
+        """Background compaction every `interval` seconds until `stop` is set."""
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.run()
+                except Exception as e:
+                    logger.error(f"Index compaction failed: {e}")
+        thread = threading.Thread(target=loop, name="SLAM-Compactor", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,283 @@
+import hashlib
+import os
+import re
+import sqlite3
+import zlib
+from threading import Lock
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+_MAX = np.uint64(0xFFFFFFFF)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+class MinHasher:
+    """
+    MinHash over word 3-shingles. Shingles are crc32-hashed, then permuted
+    with `num_perm` multiply-shift hash functions in numpy, so a signature
+    costs about as much as one pass over the words.
+    """
+    def __init__(self, num_perm: int = 64, shingle: int = 3, max_words: int = 200_000, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.max_words = max_words
+        self._a = rng.randint(1, 2**32, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, 2**32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, texts: Iterable[str]) -> np.ndarray:
+        words = []
+        for text in texts:
+            words.extend(_WORD.findall(text.lower()))
+            if len(words) >= self.max_words:
+                break
+        k = self.shingle
+        shingles = np.fromiter(
+            (zlib.crc32(" ".join(words[i:i + k]).encode()) for i in range(max(1, len(words) - k + 1))),
+            dtype=np.uint64,
+        )
+        sig = np.full(self.num_perm, _MAX, dtype=np.uint64)
+        for start in range(0, len(shingles), 8192):
+            block = shingles[start:start + 8192]
+            # (a*x + b) mod 2^64, top 32 bits: a universal family without a modulus
+            hashed = (self._a[:, None] * block[None, :] + self._b[:, None]) >> np.uint64(32)
+            np.minimum(sig, hashed.min(axis=1), out=sig)
+        return sig.astype(np.uint32)
+
+
+class DuplicateIndex:
+    """
+    Near-duplicate documents (drafts, exports, lightly edited copies).
+
+    Every indexed source gets a MinHash signature, banded into an LSH table.
+    A new source whose estimated Jaccard similarity to an existing canonical
+    document reaches `threshold` is linked to it as a member. Pieces are
+    recorded by text hash with the chunk id that owns their vector, so a
+    member stores only the pieces that differ from its canonical and points
+    at the canonical's chunks for the rest.
+    """
+    def __init__(self, db_path: str, threshold: float = 0.8, num_perm: int = 64, bands: int = 8):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS docs (
+                   source    TEXT PRIMARY KEY,
+                   path      TEXT NOT NULL,
+                   sig       BLOB NOT NULL,
+                   canonical TEXT NOT NULL
+               );
+               CREATE INDEX IF NOT EXISTS docs_canonical ON docs(canonical);
+               CREATE TABLE IF NOT EXISTS bands (
+                   band   INTEGER NOT NULL,
+                   bucket TEXT NOT NULL,
+                   source TEXT NOT NULL
+               );
+               CREATE INDEX IF NOT EXISTS bands_bucket ON bands(band, bucket);
+               CREATE INDEX IF NOT EXISTS bands_source ON bands(source);
+               CREATE TABLE IF NOT EXISTS pieces (
+                   source    TEXT NOT NULL,
+                   chunk_no  INTEGER NOT NULL,
+                   text_hash TEXT NOT NULL,
+                   owner     TEXT NOT NULL,
+                   PRIMARY KEY (source, chunk_no)
+               );
+               CREATE INDEX IF NOT EXISTS pieces_owner ON pieces(owner);"""
+        )
+        self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def signature(self, texts: Iterable[str]) -> np.ndarray:
+        return self.hasher.signature(texts)
+
+    def _buckets(self, sig: np.ndarray) -> List[Tuple[int, str]]:
+        return [(b, hashlib.blake2b(sig[b * self.rows:(b + 1) * self.rows].tobytes(), digest_size=8).hexdigest())
+                for b in range(self.bands)]
+
+    def find_canonical(self, source: str, sig: np.ndarray) -> Optional[str]:
+        """The most similar canonical document at or above the threshold, if any."""
+        buckets = self._buckets(sig)
+        with self._lock:
+            candidates = set()
+            for band, bucket in buckets:
+                rows = self._conn.execute(
+                    "SELECT d.canonical FROM bands b JOIN docs d ON d.source = b.source "
+                    "WHERE b.band = ? AND b.bucket = ?", (band, bucket)
+                ).fetchall()
+                candidates.update(r[0] for r in rows)
+            candidates.discard(source)
+            best, best_sim = None, self.threshold
+            for canonical in candidates:
+                row = self._conn.execute(
+                    "SELECT sig FROM docs WHERE source = ? AND canonical = source", (canonical,)
+                ).fetchone()
+                if row is None:
+                    continue
+                sim = float(np.mean(np.frombuffer(row[0], dtype=np.uint32) == sig))
+                if sim >= best_sim:
+                    best, best_sim = canonical, sim
+        return best
+
+    def pieces_of(self, source: str) -> Dict[str, str]:
+        """{text_hash: owning chunk id} for a document's stored pieces."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT text_hash, owner FROM pieces WHERE source = ? AND owner = source || '_' || chunk_no", (source,)
+            ).fetchall()
+        return dict(rows)
+
+    def record(self, source: str, path: str, sig: np.ndarray, canonical: str,
+               pieces: List[Tuple[int, str, str]]) -> List[Tuple[str, str]]:
+        """
+        Stores a (re)indexed document and its pieces as (chunk_no, text_hash,
+        owner chunk id). Returns the former members when the document was a
+        canonical: their shared pieces may no longer match and need a re-index.
+        """
+        with self._lock:
+            orphaned = self._conn.execute(
+                "SELECT source, path FROM docs WHERE canonical = ? AND source != ?", (source, source)
+            ).fetchall()
+            self._delete_locked(source)
+            self._conn.execute("UPDATE docs SET canonical = source WHERE canonical = ?", (source,))
+            self._conn.execute("INSERT INTO docs (source, path, sig, canonical) VALUES (?, ?, ?, ?)",
+                               (source, path, sig.tobytes(), canonical))
+            if canonical == source:
+                # Only canonicals are LSH candidates; members are found through them
+                self._conn.executemany("INSERT INTO bands (band, bucket, source) VALUES (?, ?, ?)",
+                                       [(b, bucket, source) for b, bucket in self._buckets(sig)])
+            self._conn.executemany(
+                "INSERT INTO pieces (source, chunk_no, text_hash, owner) VALUES (?, ?, ?, ?)",
+                [(source, no, h, owner) for no, h, owner in pieces],
+            )
+            self._conn.commit()
+        return orphaned
+
+    def remove(self, source: str) -> List[Tuple[str, str]]:
+        """Forgets a document; returns its members (source, path), which lost their shared pieces."""
+        with self._lock:
+            orphaned = self._conn.execute(
+                "SELECT source, path FROM docs WHERE canonical = ? AND source != ?", (source, source)
+            ).fetchall()
+            self._delete_locked(source)
+            self._conn.execute("UPDATE docs SET canonical = source WHERE canonical = ?", (source,))
+            self._conn.commit()
+        return orphaned
+
+    def _delete_locked(self, source: str):
+        self._conn.execute("DELETE FROM docs WHERE source = ?", (source,))
+        self._conn.execute("DELETE FROM bands WHERE source = ?", (source,))
+        self._conn.execute("DELETE FROM pieces WHERE source = ?", (source,))
+
+    def rename(self, old: str, new: str, new_path: str):
+        """Re-keys a moved document, including members' references to its chunks."""
+        with self._lock:
+            self._conn.execute("UPDATE docs SET source = ?, path = ? WHERE source = ?", (new, new_path, old))
+            self._conn.execute("UPDATE docs SET canonical = ? WHERE canonical = ?", (new, old))
+            self._conn.execute("UPDATE bands SET source = ? WHERE source = ?", (new, old))
+            self._conn.execute("UPDATE pieces SET source = ? WHERE source = ?", (new, old))
+            self._conn.execute(
+                "UPDATE pieces SET owner = ? || substr(owner, ?) WHERE substr(owner, 1, ?) = ?",
+                (new, len(old) + 1, len(old) + 1, old + "_"),
+            )
+            self._conn.commit()
+
+    def dump(self) -> Iterator[list]:
+        """
+        Streams documents, then pieces, as plain rows for snapshots:
+        ["doc", source, path, sig (hex), canonical] and ["piece", source, chunk_no, text_hash, owner].
+        """
+        with self._lock:
+            for s, p, sig, c in self._conn.execute("SELECT source, path, sig, canonical FROM docs"):
+                yield ["doc", s, p, sig.hex(), c]
+            for row in self._conn.execute("SELECT source, chunk_no, text_hash, owner FROM pieces"):
+                yield ["piece", *row]
+
+    def load(self, rows: Iterable[list], rename: Callable[[str], str] = lambda s: s, batch: int = 1000):
+        """Adds dumped rows, rewriting sources, paths and chunk ids with `rename`; LSH bands are rebuilt."""
+        rows = iter(rows)
+        while True:
+            page = list(islice(rows, batch))
+            if not page:
+                return
+            docs = [(rename(s), rename(p), bytes.fromhex(sig), rename(c))
+                    for kind, s, p, sig, c in page if kind == "doc"]
+            pieces = [(rename(s), n, h, rename(o)) for kind, s, n, h, o in page if kind == "piece"]
+            with self._lock:
+                for source, _, _, _ in docs:
+                    self._delete_locked(source)
+                self._conn.executemany("INSERT INTO docs (source, path, sig, canonical) VALUES (?, ?, ?, ?)", docs)
+                self._conn.executemany(
+                    "INSERT INTO bands (band, bucket, source) VALUES (?, ?, ?)",
+                    [(b, bucket, source) for source, _, sig, canonical in docs if canonical == source
+                     for b, bucket in self._buckets(np.frombuffer(sig, dtype=np.uint32))],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO pieces (source, chunk_no, text_hash, owner) VALUES (?, ?, ?, ?)", pieces
+                )
+                self._conn.commit()
+
+    def shared_count(self, source: str) -> int:
+        """Pieces of `source` whose vector lives in another document's chunk."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM pieces WHERE source = ? AND owner != source || '_' || chunk_no", (source,)
+            ).fetchone()
+        return row[0]
+
+    def has_groups(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM docs WHERE canonical != source LIMIT 1").fetchone() is not None
+
+    def groups(self, sources: List[str]) -> Dict[str, str]:
+        """{source: canonical} for the given sources (sources not recorded map to themselves)."""
+        out = {s: s for s in sources}
+        with self._lock:
+            for start in range(0, len(sources), 500):
+                part = sources[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT source, canonical FROM docs WHERE source IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                out.update(rows)
+        return out
+
+    def member_paths(self, canonical: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM docs WHERE canonical = ? ORDER BY path", (canonical,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def collapse(self, results: List[Dict], n: int) -> List[Dict]:
+        """
+        Keeps the best hit per duplicate group, in rank order, and lists the
+        group's other files under "duplicates".
+        """
+        sources = [r["metadata"].get("source", r["metadata"].get("path", "")) for r in results]
+        group_of = self.groups(list(dict.fromkeys(sources)))
+        seen, out = set(), []
+        for result, source in zip(results, sources):
+            group = group_of.get(source, source)
+            if group in seen:
+                continue
+            seen.add(group)
+            path = result["metadata"].get("path")
+            others = [p for p in self.member_paths(group) if p != path]
+            out.append({**result, "duplicates": others} if others else result)
+            if len(out) == n:
+                break
+        return out
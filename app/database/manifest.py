@@ -0,0 +1,173 @@
+import json
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class FileManifest:
+    """
+    Records what has been indexed for every source id: a file path, or an
+    `archive!member` id for archive members. Used to skip unchanged sources
+    and to find chunk ids that no longer belong to anything.
+    """
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sources (
+                   id      TEXT PRIMARY KEY,
+                   path    TEXT NOT NULL,
+                   sig     TEXT NOT NULL,
+                   chunks  INTEGER NOT NULL DEFAULT 0,
+                   size    INTEGER,
+                   mtime   REAL,
+                   updated REAL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sources_path ON sources(path)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS dead_letters (
+                   path     TEXT PRIMARY KEY,
+                   reason   TEXT NOT NULL,
+                   detail   TEXT,
+                   attempts INTEGER NOT NULL DEFAULT 1,
+                   updated  REAL
+               )"""
+        )
+        # Small JSON settings owned by the index (active collection, migration checkpoints)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def get(self, source_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, path, sig, chunks, size, mtime FROM sources WHERE id = ?", (source_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("id", "path", "sig", "chunks", "size", "mtime"), row))
+
+    def record(self, source_id: str, path: str, sig: str, chunks: int,
+               size: Optional[int] = None, mtime: Optional[float] = None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (id, path, sig, chunks, size, mtime, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source_id, path, sig, chunks, size, mtime, time.time()),
+            )
+            self._conn.commit()
+
+    def record_many(self, rows: List[Dict]):
+        """Bulk `record` in one transaction (snapshot import)."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sources (id, path, sig, chunks, size, mtime, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(r["id"], r["path"], r["sig"], r["chunks"], r["size"], r["mtime"], now) for r in rows],
+            )
+            self._conn.commit()
+
+    def remove(self, source_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+            self._conn.commit()
+
+    def sources_for(self, path: str) -> List[Dict]:
+        """All entries belonging to a file on disk (the file itself and its archive members)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, path, sig, chunks, size, mtime FROM sources WHERE path = ?", (path,)
+            ).fetchall()
+        return [dict(zip(("id", "path", "sig", "chunks", "size", "mtime"), r)) for r in rows]
+
+    def all_sources(self) -> List[Dict]:
+        """Every entry; used by the compactor to reconcile the collection."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, path, sig, chunks, size, mtime FROM sources").fetchall()
+        return [dict(zip(("id", "path", "sig", "chunks", "size", "mtime"), r)) for r in rows]
+
+    def sources_under(self, root: str, after: Tuple[str, str] = ("", ""), limit: int = 1000) -> List[Dict]:
+        """
+        Entries of files below the directory `root`, ordered by (path, id) and
+        paged with `after=(path, id)` of the last entry seen; an index range
+        scan, so it stays fast on very large manifests.
+        """
+        low = os.path.join(root, "")
+        high = low[:-1] + chr(ord(low[-1]) + 1)  # Every path with the `root/` prefix sorts below this
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, path, sig, chunks, size, mtime FROM sources "
+                "WHERE path >= ? AND path < ? AND (path > ? OR (path = ? AND id > ?)) "
+                "ORDER BY path, id LIMIT ?",
+                (low, high, after[0], after[0], after[1], limit),
+            ).fetchall()
+        return [dict(zip(("id", "path", "sig", "chunks", "size", "mtime"), r)) for r in rows]
+
+    def incomplete_paths(self) -> List[str]:
+        """
+        Files recorded without a hash or stat: partly indexed (a large document
+        whose remaining page ranges were still queued) or invalidated for a
+        re-index that has not happened yet.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT path FROM sources WHERE sig = '' AND size IS NULL ORDER BY path"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def remove_many(self, source_ids: List[str]):
+        with self._lock:
+            self._conn.executemany("DELETE FROM sources WHERE id = ?", [(i,) for i in source_ids])
+            self._conn.commit()
+
+    # --- Dead letters: files that could not be indexed, with the reason ---
+
+    def add_dead_letter(self, path: str, reason: str, detail: str = ""):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO dead_letters (path, reason, detail, attempts, updated) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT(path) DO UPDATE SET reason = excluded.reason, detail = excluded.detail, "
+                "attempts = attempts + 1, updated = excluded.updated",
+                (path, reason, detail, time.time()),
+            )
+            self._conn.commit()
+
+    def remove_dead_letter(self, path: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM dead_letters WHERE path = ?", (path,))
+            self._conn.commit()
+
+    def remove_dead_letters_under(self, root: str):
+        low = os.path.join(root, "")
+        with self._lock:
+            self._conn.execute("DELETE FROM dead_letters WHERE path >= ? AND path < ?",
+                               (low, low[:-1] + chr(ord(low[-1]) + 1)))
+            self._conn.commit()
+
+    def dead_letters(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, reason, detail, attempts, updated FROM dead_letters ORDER BY updated DESC"
+            ).fetchall()
+        return [dict(zip(("path", "reason", "detail", "attempts", "updated"), r)) for r in rows]
+
+    # --- Index metadata: JSON values by key ---
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value: Any):
+        with self._lock:
+            if value is None:
+                self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+            self._conn.commit()
@@ -0,0 +1,287 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from app.database.vector_db import DEFAULT_LANE
+from app.utils.diagnostics import logger
+
+FORMAT = 2
+HEADER = "snapshot.json"
+MANIFEST_FIELDS = ("id", "path", "sig", "chunks", "size", "mtime")
+# Fixed sentences embedded at export: the importing side must reproduce them
+PROBES = [
+    "The quarterly report is attached for review.",
+    "Install the package and restart the service.",
+    "Die Rechnung wurde gestern verschickt.",
+]
+PROBE_MIN_COSINE = 0.99
+PAGE = 4096
+_CHUNK_NO = re.compile(r"_\d+")
+
+# --- 📤 Export ---
+
+
+def export_snapshot(db, dest: str, engines: Optional[Dict[str, object]] = None, dtype: str = "float16") -> Dict:
+    """
+    Writes the index to the directory `dest`:
+
+    * snapshot.json - format, model per lane, probe vectors, file checksums
+    * manifest.jsonl.gz - the file manifest, one row per line
+    * <lane>.vectors.npy - one contiguous (chunks x dim) array per lane
+    * <lane>.chunks.jsonl.gz - [chunk id, metadata, snippet text] per line,
+      row-aligned with the vectors
+    * dedup.jsonl.gz - near-duplicate groups and shared pieces
+
+    Side files are written and read a page at a time, so neither side
+    holds more than `PAGE` chunks in memory. The manifest is written before
+    the vectors, so a file re-indexed during the export is at worst older
+    in the manifest than in the vectors and gets re-indexed after import.
+    Callers pause ingestion so the collections hold still while they are
+    paged out.
+    """
+    os.makedirs(dest, exist_ok=True)
+    db.writer.flush()
+    started = time.time()
+    files = ["manifest.jsonl.gz"]
+    _write_rows(dest, "manifest.jsonl.gz", ([r[k] for k in MANIFEST_FIELDS] for r in db.manifest.all_sources()))
+    lanes = {}
+    for lane, collection in list(db.lanes.items()):
+        info = db.lane_info(lane)
+        count = _export_lane(db, collection, info, dest, lane, dtype, files)
+        engine = (engines or {}).get(lane)
+        lanes[lane] = {
+            "collection": info,
+            "count": count,
+            "probe": [v.tolist() for v in engine.encode(PROBES)] if engine is not None else None,
+        }
+    if db.dedup is not None:
+        files.append("dedup.jsonl.gz")
+        _write_rows(dest, "dedup.jsonl.gz", db.dedup.dump())
+    header = {"format": FORMAT, "created": started, "dtype": dtype, "lanes": lanes,
+              "files": {name: _sha256(os.path.join(dest, name)) for name in files}}
+    with open(os.path.join(dest, HEADER), "w") as f:
+        json.dump(header, f, indent=2)
+    summary = {"path": dest, "chunks": sum(l["count"] for l in lanes.values()),
+               "files": len(files), "seconds": round(time.time() - started, 1)}
+    logger.info(f"Exported snapshot to {dest}: {summary['chunks']} chunks in {summary['seconds']}s")
+    return summary
+
+
+def _export_lane(db, collection, info: Dict, dest: str, lane: str, dtype: str, files: List[str]) -> int:
+    count = collection.count()
+    name, side = f"{lane}.vectors.npy", f"{lane}.chunks.jsonl.gz"
+    vectors = np.lib.format.open_memmap(os.path.join(dest, name), mode="w+", dtype=dtype,
+                                        shape=(count, info["dim"]))
+    offset = 0
+    with _open_rows(dest, side, "wt") as out:
+        while offset < count:
+            page = collection.get(include=["embeddings", "metadatas"], limit=PAGE, offset=offset)
+            n = min(len(page["ids"]), count - offset)
+            if n == 0:
+                break
+            ids = page["ids"][:n]
+            vectors[offset:offset + n] = np.asarray(page["embeddings"][:n], dtype=np.float32)
+            texts = db.snippets.get_many(ids)
+            for chunk_id, meta in zip(ids, page["metadatas"][:n]):
+                out.write(_dumps([chunk_id, meta or {}, texts.get(chunk_id)]))
+            offset += n
+    vectors.flush()
+    del vectors
+    if offset != count:
+        raise RuntimeError(f"{info['name']} changed during export ({offset} of {count} chunks read)")
+    files += [name, side]
+    return count
+
+# --- 📥 Import ---
+
+
+def import_snapshot(db, src: str, remap: Optional[Dict[str, str]] = None,
+                    engines: Optional[Dict[str, object]] = None) -> Dict:
+    """
+    Bulk-loads a snapshot into the store. `remap` rewrites path prefixes
+    ({old: new}) in ids, metadata, the manifest and the duplicate index.
+    Lanes whose model differs from this index's are not loaded; their
+    files are marked for re-indexing. Everything is validated (checksums,
+    models, probe vectors) before the first write. Returns a summary whose
+    "paths" lists the imported files, for `reconcile`.
+    """
+    with open(os.path.join(src, HEADER)) as f:
+        header = json.load(f)
+    if header.get("format") != FORMAT:
+        raise ValueError(f"unsupported snapshot format {header.get('format')}")
+    for name, digest in header["files"].items():
+        if _sha256(os.path.join(src, name)) != digest:
+            raise ValueError(f"snapshot file {name} is corrupt (checksum mismatch)")
+
+    load, skip = [], []
+    for lane, meta in header["lanes"].items():
+        theirs, ours = meta["collection"], db.lane_info(lane)
+        same = ours is not None and (ours["model"], ours["dim"]) == (theirs["model"], theirs["dim"])
+        if not same and lane == DEFAULT_LANE:
+            raise ValueError(f"snapshot was built with {theirs['model']}; this index uses "
+                             f"{db.active['model']} (set embedding_model to match, or switch models after import)")
+        if not same or lane not in db.lanes:
+            skip.append(lane)
+            continue
+        engine = (engines or {}).get(lane)
+        if engine is not None and meta["probe"] and _probe_cosine(engine, meta["probe"]) < PROBE_MIN_COSINE:
+            raise ValueError(f"{theirs['model']} here embeds differently from the exporting machine")
+        load.append(lane)
+
+    rename = _remapper(remap or {})
+    started = time.time()
+    db.writer.flush()
+    chunks, reindex = 0, set()
+    for lane in header["lanes"]:
+        rows = _read_rows(src, f"{lane}.chunks.jsonl.gz")
+        if lane in skip:
+            reindex.update(rename(meta["path"]) for _, meta, _ in rows if meta.get("path"))
+            continue
+        vectors = np.load(os.path.join(src, f"{lane}.vectors.npy"), mmap_mode="r")
+        chunks += _import_lane(db, db.lanes[lane], rows, vectors, rename)
+
+    paths = set()
+    for page in _pages(_read_rows(src, "manifest.jsonl.gz")):
+        rows = [dict(zip(MANIFEST_FIELDS, r)) for r in page]
+        for row in rows:
+            row["id"], row["path"] = rename(row["id"]), rename(row["path"])
+            if row["path"] in reindex:
+                row["sig"], row["size"], row["mtime"] = "", None, None  # Its chunks in a skipped lane are gone
+            paths.add(row["path"])
+        db.manifest.record_many(rows)
+    if db.dedup is not None and "dedup.jsonl.gz" in header["files"]:
+        db.dedup.load(_read_rows(src, "dedup.jsonl.gz"), rename)
+
+    paths = sorted(paths)
+    summary = {"chunks": chunks, "files": len(paths), "skipped_lanes": skip,
+               "seconds": round(time.time() - started, 1), "paths": paths}
+    logger.info(f"Imported snapshot {src}: {chunks} chunks, {len(paths)} files in {summary['seconds']}s")
+    return summary
+
+
+def _import_lane(db, collection, rows: Iterable[list], vectors: np.ndarray, rename: Callable[[str], str]) -> int:
+    start = 0
+    for page in _pages(rows):
+        ids, metas, texts = [], [], []
+        for chunk_id, meta, text in page:
+            for k in ("path", "source"):
+                if k in meta:
+                    meta[k] = rename(meta[k])
+            ids.append(rename(chunk_id))
+            metas.append(meta)
+            texts.append(text)
+        end = start + len(ids)
+        collection.upsert(ids=ids, embeddings=np.asarray(vectors[start:end], dtype=np.float32).tolist(),
+                          metadatas=metas)
+        db.snippets.put_many((cid, text) for cid, text in zip(ids, texts) if text is not None)
+        start = end
+    return start
+
+
+def reconcile(db, paths: Iterable[str], enqueue: Callable[[List[str]], None],
+              file_hash: Callable[[str], str], batch: int = 1000) -> Dict:
+    """
+    Checks imported files against the disk. A matching stat is trusted; a
+    differing stat with the same size is settled by hashing the file
+    (copies get new mtimes) and, when the content matches, only the stat is
+    recorded. Changed or missing files are queued for (re)indexing.
+    """
+    counts = {"unchanged": 0, "rehashed": 0, "queued": 0}
+    todo = []
+    for path in paths:
+        entry = db.manifest.get(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is not None and entry is not None and entry["sig"]:
+            if (entry["size"], entry["mtime"]) == (st.st_size, st.st_mtime):
+                counts["unchanged"] += 1
+                continue
+            if entry["size"] == st.st_size and file_hash(path) == entry["sig"]:
+                db.manifest.record(path, path, entry["sig"], entry["chunks"], st.st_size, st.st_mtime)
+                counts["rehashed"] += 1
+                continue
+        todo.append(path)
+        counts["queued"] += 1
+        if len(todo) >= batch:
+            enqueue(todo)
+            todo = []
+    if todo:
+        enqueue(todo)
+    return counts
+
+# --- Helpers ---
+
+
+def _remapper(remap: Dict[str, str]) -> Callable[[str], str]:
+    """
+    Rewrites whole leading path components only: /home/a=/x leaves /home/ab
+    alone. An exact file path also renames its chunk ids (`path_3`) and
+    archive members (`path!member`).
+    """
+    strip = lambda p: p.rstrip(os.sep) or os.sep
+    prefixes = sorted(((strip(old), strip(new)) for old, new in remap.items()), key=lambda kv: len(kv[0]), reverse=True)
+
+    def rename(value: str) -> str:
+        for old, new in prefixes:
+            if value == old:
+                return new
+            if value.startswith(os.path.join(old, "")):
+                return os.path.join(new, value[len(os.path.join(old, "")):])
+            rest = value[len(old):]
+            if value.startswith(old) and (rest.startswith("!") or _CHUNK_NO.fullmatch(rest)):
+                return new + rest
+        return value
+    return rename
+
+
+def _pages(rows: Iterable, size: int = PAGE) -> Iterator[list]:
+    rows = iter(rows)
+    while True:
+        page = list(islice(rows, size))
+        if not page:
+            return
+        yield page
+
+
+def _dumps(row) -> str:
+    return json.dumps(row, separators=(",", ":")) + "\n"
+
+
+def _open_rows(root: str, name: str, mode: str):
+    return gzip.open(os.path.join(root, name), mode, encoding="utf-8", compresslevel=6)
+
+
+def _write_rows(dest: str, name: str, rows: Iterable) -> None:
+    with _open_rows(dest, name, "wt") as f:
+        for row in rows:
+            f.write(_dumps(row))
+
+
+def _read_rows(src: str, name: str) -> Iterator:
+    with _open_rows(src, name, "rt") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(4 * 1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _probe_cosine(engine, probe: List[List[float]]) -> float:
+    ours = np.asarray(engine.encode(PROBES), dtype=np.float32)
+    theirs = np.asarray(probe, dtype=np.float32)
+    cos = (ours * theirs).sum(axis=1) / (np.linalg.norm(ours, axis=1) * np.linalg.norm(theirs, axis=1) + 1e-12)
+    return float(cos.min())
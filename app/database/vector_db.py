@@ -1,28 +1,179 @@
+import os
+import re
 import chromadb
+from chromadb.config import Settings
 from threading import Lock
+from typing import Dict, List, Optional, Set
+from app.database.dedup import DuplicateIndex
+from app.database.manifest import FileManifest
+from app.database.snippets import SnippetStore
+from app.database.write_buffer import WriteBehindBuffer
+
+# Pre-versioning installs: one unnamed-model collection built with the default model
+LEGACY_COLLECTION = {"name": "local_files", "model": "all-MiniLM-L6-v2", "dim": 384}
+
+# Embedding lanes: one collection per model; language routing adds the multilingual one
+DEFAULT_LANE = "default"
+MULTI_LANE = "multi"
+
 
 class VectorStore:
     _instance = None
     _lock = Lock()
 
-    def __new__(cls):
+    def __new__(cls, path: str = "./slam_db", memory_limit_mb: int = 0):
+        # Arguments only matter for the first instantiation (benchmarks point `path` at a temp dir)
         with cls._lock:
             if cls._instance is None:
                 cls._instance = super(VectorStore, cls).__new__(cls)
-                cls._instance.client = chromadb.PersistentClient(path="./slam_db")
-                cls._instance.collection = cls._instance.client.get_or_create_collection(
-                    name="local_files", metadata={"hnsw:space": "cosine"}
-                )
+                cls._instance.path = path
+                settings = Settings()
+                if memory_limit_mb:
+                    # Chroma evicts least-recently-used index segments beyond this limit
+                    settings = Settings(chroma_segment_cache_policy="LRU",
+                                        chroma_memory_limit_bytes=memory_limit_mb * 2**20)
+                cls._instance.client = chromadb.PersistentClient(path=path, settings=settings)
+                cls._instance.manifest = FileManifest(os.path.join(path, "manifest.sqlite3"))
+                # Collections are versioned by model; the manifest remembers which one is live
+                cls._instance.active = cls._instance.manifest.get_meta("active_collection", LEGACY_COLLECTION)
+                cls._instance.collection = cls._instance.open_collection(cls._instance.active)
+                # All writes go through one group-committing writer thread
+                cls._instance.writer = WriteBehindBuffer(cls._instance.collection)
+                cls._instance.lanes = {DEFAULT_LANE: cls._instance.collection}
+                # Chunk text for previews lives outside Chroma, compressed
+                cls._instance.snippets = SnippetStore(os.path.join(path, "snippets.sqlite3"))
+                # Near-duplicate groups and the pieces members share with their canonical
+                cls._instance.dedup = DuplicateIndex(os.path.join(path, "dedup.sqlite3"))
             return cls._instance
 
-    def query(self, query_vector, n=10):
-        results = self.collection.query(query_embeddings=[query_vector.tolist()], n_results=n)
+    # --- 🏷️ Versioned Collections ---
+
+    @staticmethod
+    def collection_info(model_name: str, dim: int) -> Dict:
+        """Name and tags of the collection holding `model_name` vectors."""
+        slug = re.sub(r"[^a-z0-9]+", "-", model_name.rsplit("/", 1)[-1].lower()).strip("-")
+        return {"name": f"chunks-{slug}-{dim}"[:63], "model": model_name, "dim": dim}
+
+    def open_collection(self, info: Dict):
+        metadata = {"hnsw:space": "cosine"}
+        if info["name"] != LEGACY_COLLECTION["name"]:
+            metadata.update(model=info["model"], dim=info["dim"])
+        return self.client.get_or_create_collection(name=info["name"], metadata=metadata)
+
+    def activate(self, info: Dict, collection):
+        """Points queries and the writer at `collection`; callers pause ingestion around it."""
+        self.writer.retarget(collection)
+        self.collection = collection
+        self.lanes[DEFAULT_LANE] = collection
+        self.active = info
+        self.manifest.set_meta("active_collection", info)
+
+    def lane_info(self, lane: str) -> Optional[Dict]:
+        return self.active if lane == DEFAULT_LANE else self.manifest.get_meta(f"lane:{lane}")
+
+    def open_lane(self, lane: str, info: Dict):
+        """Adds a secondary lane; the writer routes `upsert(..., lane=lane)` to it."""
+        collection = self.open_collection(info)
+        self.writer.retarget(collection, lane)
+        self.lanes[lane] = collection
+        self.manifest.set_meta(f"lane:{lane}", info)
+        return collection
+
+    def close_lane(self, lane: str) -> Set[str]:
+        """
+        Drops a secondary lane (its model changed or routing was turned off)
+        and returns the paths that had chunks in it, for re-indexing.
+        """
+        info = self.lane_info(lane)
+        if info is None:
+            return set()
+        collection = self.lanes.get(lane) or self.open_collection(info)
+        paths, offset = set(), 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=5000, offset=offset)
+            if not page["ids"]:
+                break
+            offset += len(page["ids"])
+            paths.update(m["path"] for m in page["metadatas"] if m and m.get("path"))
+        self.writer.retarget(None, lane)
+        self.lanes.pop(lane, None)
+        self.drop_collection(info["name"])
+        self.manifest.set_meta(f"lane:{lane}", None)
+        return paths
+
+    def drop_collection(self, name: str):
+        try:
+            self.client.delete_collection(name)
+        except ValueError:
+            pass  # Already gone
+
+    def upsert(self, id, vector, metadata):
+        """Queues a write; it is committed with others by the write-behind buffer."""
+        self.writer.upsert(id, vector, metadata)
+
+    def delete(self, id):
+        self.writer.delete(id)
+
+    def flush(self):
+        """Blocks until all queued writes are persisted."""
+        self.writer.flush()
+
+    # --- 💾 Snapshots ---
+
+    def export_snapshot(self, dest: str, engines=None, dtype: str = "float16") -> Dict:
+        """Writes vectors, metadata, snippets and the manifest to `dest` (see app.database.snapshot)."""
+        from app.database.snapshot import export_snapshot
+        return export_snapshot(self, dest, engines=engines, dtype=dtype)
+
+    def import_snapshot(self, src: str, remap: Optional[Dict[str, str]] = None, engines=None) -> Dict:
+        """Bulk-loads a snapshot written by `export_snapshot`, rewriting path prefixes per `remap`."""
+        from app.database.snapshot import import_snapshot
+        return import_snapshot(self, src, remap=remap, engines=engines)
+
+    def query(self, query_vector, n=10, collection=None):
+        # `collection` pins a query to the one its vector's model belongs to during a swap
+        results = (collection or self.collection).query(query_embeddings=[query_vector.tolist()], n_results=n)
+        return self._format(results, 0)
+
+    def query_batch(self, query_vectors, n=10, block=256, collection=None):
+        """
+        Yields one result list per query vector, in order. Vectors are sent
+        `block` at a time as a single multi-embedding Chroma query.
+        """
+        collection = collection or self.collection
+        for start in range(0, len(query_vectors), block):
+            part = query_vectors[start:start + block]
+            results = collection.query(query_embeddings=[v.tolist() for v in part], n_results=n)
+            for q in range(len(part)):
+                yield self._format(results, q)
+
+    @staticmethod
+    def _format(results, q):
         output = []
-        if not results['ids'][0]: return []
-        for i in range(len(results['ids'][0])):
-            dist = results['distances'][0][i]
+        if not results['ids'][q]: return []
+        for i in range(len(results['ids'][q])):
+            dist = results['distances'][q][i]
             output.append({
-                "metadata": results['metadatas'][0][i],
+                "id": results['ids'][q][i],
+                "metadata": results['metadatas'][q][i],
                 "score": round(max(0, 100 - (dist * 100)), 1)
             })
-        return output
\ No newline at end of file
+        return output
+
+
+def fuse_results(result_lists: List[List[Dict]], n: int = 10, k: int = 60) -> List[Dict]:
+    """
+    Merges ranked lists from different lanes by reciprocal rank fusion: scores
+    from different models are not comparable, ranks are. Each result keeps its
+    own score for display.
+    """
+    lists = [r for r in result_lists if r]
+    if len(lists) <= 1:
+        return lists[0][:n] if lists else []
+    fused = {}
+    for results in lists:
+        for rank, result in enumerate(results):
+            entry = fused.setdefault(result["id"], [0.0, result])
+            entry[0] += 1.0 / (k + rank + 1)
+    ranked = sorted(fused.values(), key=lambda e: e[0], reverse=True)
+    return [result for _, result in ranked[:n]]
@@ -0,0 +1,244 @@
+import atexit
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.diagnostics import logger
+from app.utils.metrics import metrics
+
+
+class WriteBehindBuffer:
+    """
+    Single-writer, write-behind buffer in front of a Chroma collection.
+
+    Producers queue upserts/deletes; one background thread commits them as
+    grouped `upsert`/`delete` calls. Repeated operations on the same id are
+    coalesced (last one wins), the buffer flushes on size, age or shutdown,
+    and producers block once `max_pending` operations are waiting.
+    """
+    def __init__(self, collection, max_batch: int = 256, max_age: float = 2.0,
+                 max_pending: int = 4096,
+                 on_error: Optional[Callable[[List[str], Exception], None]] = None):
+        self.collection = collection
+        self.lanes: Dict[str, Any] = {}  # Secondary collections, addressed by `upsert(..., lane=...)`
+        self.max_batch = max_batch
+        self.max_age = max_age
+        self.max_pending = max(max_pending, max_batch)
+        self.on_error = on_error
+
+        self._pending: Dict[str, tuple] = {}    # id -> ("upsert", vector, meta) | ("delete",)
+        self._in_flight: Dict[str, tuple] = {}  # batch currently being committed
+        # (on success, on failure) callbacks of the current batch
+        self._hooks: List[Tuple[Callable[[], None], Optional[Callable[[], None]]]] = []
+        self._oldest: Optional[float] = None
+        self._cond = threading.Condition()
+        self._flush_gen = 0
+        self._done_gen = 0
+        self._closed = False
+        self.stats = {"ops": 0, "coalesced": 0, "commits": 0, "written": 0}
+
+        self._upsert_latency = metrics.histogram("upsert_seconds", "Latency of one grouped Chroma commit")
+        self._written = metrics.counter("vector_writes_total", "Upserts/deletes committed to Chroma")
+        metrics.gauge("write_buffer_pending", "Operations waiting in the write-behind buffer", fn=self.__len__)
+
+        self._thread = threading.Thread(target=self._run, name="SLAM-Writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- Producer API ---
+
+    def upsert(self, id: str, vector: List[float], metadata: Dict[str, Any], lane: Optional[str] = None):
+        self._put(id, ("upsert", vector, metadata, lane))
+
+    def delete(self, id: str):
+        self._put(id, ("delete",))
+
+    def _put(self, id: str, op: tuple):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindBuffer is closed")
+            # Backpressure: wait for the writer to drain a full buffer (never on the
+            # writer thread itself, e.g. from a commit hook, which would deadlock)
+            while (len(self._pending) >= self.max_pending and id not in self._pending
+                   and threading.current_thread() is not self._thread):
+                self._cond.wait()
+            if self._pending.pop(id, None) is not None:
+                self.stats["coalesced"] += 1
+            self._pending[id] = op
+            self.stats["ops"] += 1
+            if self._oldest is None:
+                # First op of a batch: wake the writer so it arms the age timer
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+            elif len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+    def after_commit(self, callback: Callable[[], None], on_failure: Optional[Callable[[], None]] = None):
+        """
+        Runs `callback` on the writer thread once everything queued so far is
+        committed, or `on_failure` instead if that commit fails.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindBuffer is closed")
+            self._hooks.append((callback, on_failure))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+
+    def retarget(self, collection, lane: Optional[str] = None):
+        """
+        Commits everything queued, then sends later writes for `lane` (None:
+        the default collection) to `collection`; None removes a secondary lane.
+        """
+        self.flush()
+        with self._cond:
+            if lane is None:
+                self.collection = collection
+            elif collection is None:
+                self.lanes.pop(lane, None)
+            else:
+                self.lanes[lane] = collection
+
+    def get_pending(self, id: str) -> Optional[tuple]:
+        """Returns the not-yet-committed operation for `id`, if any (read-your-writes)."""
+        with self._cond:
+            return self._pending.get(id) or self._in_flight.get(id)
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending) + len(self._in_flight)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until everything queued before this call is committed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_gen += 1
+            gen = self._flush_gen
+            self._cond.notify_all()
+            while self._done_gen < gen:
+                if not self._thread.is_alive():
+                    self._drain_locked()
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Flushes remaining operations and stops the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            if self._pending or self._hooks:
+                # Writer died or timed out: commit synchronously so nothing is lost
+                self._drain_locked()
+        atexit.unregister(self.close)
+
+    # --- Writer thread ---
+
+    def _due(self) -> bool:
+        if not self._pending and not self._hooks:
+            return False
+        if len(self._pending) >= self.max_batch or self._flush_gen > self._done_gen:
+            return True
+        return time.monotonic() - self._oldest >= self.max_age
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    if self._flush_gen > self._done_gen and not self._pending and not self._hooks:
+                        self._done_gen = self._flush_gen
+                        self._cond.notify_all()
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(0.0, self.max_age - (time.monotonic() - self._oldest))
+                    self._cond.wait(timeout)
+                batch, self._pending, self._oldest = self._pending, {}, None
+                hooks, self._hooks = self._hooks, []
+                self._in_flight = batch
+                gen = self._flush_gen
+                closing = self._closed
+                self._cond.notify_all()  # Wake producers blocked on backpressure
+
+            # Success hooks only run for batches that made it to disk
+            self._run_hooks(hooks, not batch or self._commit(batch))
+
+            with self._cond:
+                self._in_flight = {}
+                self._done_gen = max(self._done_gen, gen)
+                self._cond.notify_all()
+                if closing and not self._pending and not self._hooks:
+                    return
+
+    def _drain_locked(self):
+        batch, self._pending, self._oldest = self._pending, {}, None
+        hooks, self._hooks = self._hooks, []
+        self._run_hooks(hooks, not batch or self._commit(batch))
+        self._done_gen = self._flush_gen
+        self._cond.notify_all()
+
+    def _commit(self, batch: Dict[str, tuple]) -> bool:
+        ups: Dict[Optional[str], tuple] = {}  # lane -> (ids, vectors, metas)
+        del_ids = []
+        for id, op in batch.items():
+            if op[0] == "upsert":
+                ids, vectors, metas = ups.setdefault(op[3], ([], [], []))
+                ids.append(id)
+                vectors.append(op[1])
+                metas.append(op[2])
+            else:
+                del_ids.append(id)
+        targets = {None: self.collection, **self.lanes}
+        for lane in [lane for lane in ups if lane not in targets]:
+            # Closed (retargeted to None) while its upserts were queued: only those ops fail
+            ids = ups.pop(lane)[0]
+            logger.warning(f"Write-behind dropped {len(ids)} upsert(s) for closed lane {lane}")
+            self._report(ids, LookupError(f"lane {lane} is closed"))
+        try:
+            with self._upsert_latency.time():
+                if del_ids:
+                    self.collection.delete(ids=del_ids)
+                    for collection in self.lanes.values():
+                        present = collection.get(ids=del_ids, include=[])["ids"]
+                        if present:
+                            collection.delete(ids=present)
+                for lane, (ids, vectors, metas) in ups.items():
+                    for other, collection in targets.items():
+                        if other != lane:
+                            # A re-indexed chunk may have changed lanes (e.g. its language)
+                            moved = collection.get(ids=ids, include=[])["ids"]
+                            if moved:
+                                collection.delete(ids=moved)
+                    targets[lane].upsert(ids=ids, embeddings=vectors, metadatas=metas)
+            self._written.inc(len(batch))
+            self.stats["commits"] += 1
+            self.stats["written"] += len(batch)
+            return True
+        except Exception as e:
+            logger.error(f"Write-behind commit of {len(batch)} ops failed: {e}")
+            self._report(list(batch.keys()), e)
+            return False
+
+    def _report(self, ids: List[str], error: Exception):
+        if self.on_error:
+            try:
+                self.on_error(ids, error)
+            except Exception as cb_err:
+                logger.error(f"Write-behind error callback failed: {cb_err}")
+
+    def _run_hooks(self, hooks: List[tuple], committed: bool):
+        for on_success, on_failure in hooks:
+            hook = on_success if committed else on_failure
+            if hook is None:
+                continue
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Write-behind commit hook failed: {e}")
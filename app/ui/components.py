@@ -1,28 +1,127 @@
-from PyQt6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRectF, QSize
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen
 
-class FileResultCard(QWidget):
-    def __init__(self, filename, path, score, parent=None):
+# --- 📋 Search Results: model + delegate (no per-row widgets) ---
+
+class ResultListModel(QAbstractListModel):
+    """Flat list of query results (`{"metadata": ..., "score": ...}`), appended in batches."""
+    ResultRole = Qt.ItemDataRole.UserRole
+    PathRole = Qt.ItemDataRole.UserRole + 1
+    ScoreRole = Qt.ItemDataRole.UserRole + 2
+
+    def __init__(self, parent=None):
         super().__init__(parent)
-        layout = QHBoxLayout(self)
-        icon_label = QLabel("📄")
-        icon_label.setStyleSheet("font-size: 24px;")
-        info_layout = QVBoxLayout()
-        name_label = QLabel(filename)
-        name_label.setStyleSheet("color: #ffffff; font-weight: bold; font-size: 14px;")
-        path_label = QLabel(path)
-        path_label.setStyleSheet("color: #888888; font-size: 11px;")
-        info_layout.addWidget(name_label)
-        info_layout.addWidget(path_label)
-        score_label = QLabel(f"{int(score)}%")
-        color = "#4caf50" if score > 70 else "#ff9800"
-        score_label.setStyleSheet(f"""
-            color: {color}; 
-            background-color: rgba(0,0,0,0.2); 
-            padding: 5px; 
-            border-radius: 5px; 
-            font-weight: bold;
-        """)
-        layout.addWidget(icon_label)
-        layout.addLayout(info_layout, stretch=1)
-        layout.addWidget(score_label)
+        self._results = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._results)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._results):
+            return None
+        result = self._results[index.row()]
+        meta = result["metadata"]
+        duplicates = result.get("duplicates", [])
+        if role == Qt.ItemDataRole.DisplayRole:
+            name = meta.get("filename", "")
+            return f"{name}  (+{len(duplicates)} similar)" if duplicates else name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            # Near-duplicates collapsed into this result
+            return "\n".join([meta.get("path", "")] + duplicates)
+        if role == self.PathRole:
+            return meta.get("path", "")
+        if role == self.ScoreRole:
+            return result["score"]
+        if role == self.ResultRole:
+            return result
+        return None
+
+    def append_results(self, results):
+        """Adds rows at the end; the view only lays out and paints what is visible."""
+        if not results:
+            return
+        first = len(self._results)
+        self.beginInsertRows(QModelIndex(), first, first + len(results) - 1)
+        self._results.extend(results)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._results = []
+        self.endResetModel()
+
+    def result(self, row):
+        return self._results[row]
+
+
+class ResultDelegate(QStyledItemDelegate):
+    """Paints a result card (icon, filename, elided path, score pill) straight onto the view."""
+    ROW_HEIGHT = 64
+    MARGIN = 4
+    PADDING = 12
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Fonts, pens and metrics are built once, not per paint
+        self.name_font = QFont()
+        self.name_font.setPixelSize(14)
+        self.name_font.setBold(True)
+        self.path_font = QFont()
+        self.path_font.setPixelSize(11)
+        self.icon_font = QFont()
+        self.icon_font.setPixelSize(24)
+        self.score_font = QFont(self.name_font)
+        self.score_font.setPixelSize(12)
+        self.name_metrics = QFontMetrics(self.name_font)
+        self.path_metrics = QFontMetrics(self.path_font)
+        self.card = QColor("#1e1e1e")
+        self.card_selected = QColor("#2c2c2c")
+        self.accent = QPen(QColor("#3d5afe"), 1)
+        self.name_color = QColor("#ffffff")
+        self.path_color = QColor("#888888")
+        self.pill = QColor(0, 0, 0, 51)
+        self.good = QColor("#4caf50")
+        self.fair = QColor("#ff9800")
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = QRectF(option.rect).adjusted(0, self.MARGIN, 0, -self.MARGIN)
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+
+        painter.setPen(self.accent if selected else Qt.PenStyle.NoPen)
+        painter.setBrush(self.card_selected if selected else self.card)
+        painter.drawRoundedRect(rect, 8, 8)
+
+        inner = rect.adjusted(self.PADDING, 0, -self.PADDING, 0)
+        painter.setFont(self.icon_font)
+        painter.setPen(self.name_color)
+        painter.drawText(QRectF(inner.left(), inner.top(), 32, inner.height()), Qt.AlignmentFlag.AlignVCenter, "📄")
+
+        score = index.data(ResultListModel.ScoreRole) or 0
+        score_text = f"{int(score)}%"
+        pill_w = 52
+        pill = QRectF(inner.right() - pill_w, inner.center().y() - 13, pill_w, 26)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.pill)
+        painter.drawRoundedRect(pill, 5, 5)
+        painter.setFont(self.score_font)
+        painter.setPen(self.good if score > 70 else self.fair)
+        painter.drawText(pill, Qt.AlignmentFlag.AlignCenter, score_text)
+
+        text_left = inner.left() + 44
+        text_w = int(pill.left() - 12 - text_left)
+        mid = inner.center().y()
+        name = self.name_metrics.elidedText(index.data() or "", Qt.TextElideMode.ElideRight, text_w)
+        path = self.path_metrics.elidedText(index.data(ResultListModel.PathRole) or "", Qt.TextElideMode.ElideMiddle, text_w)
+        painter.setFont(self.name_font)
+        painter.setPen(self.name_color)
+        painter.drawText(QRectF(text_left, mid - 20, text_w, 20), Qt.AlignmentFlag.AlignBottom, name)
+        painter.setFont(self.path_font)
+        painter.setPen(self.path_color)
+        painter.drawText(QRectF(text_left, mid + 2, text_w, 18), Qt.AlignmentFlag.AlignTop, path)
+        painter.restore()
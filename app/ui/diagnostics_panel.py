@@ -0,0 +1,114 @@
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QHeaderView, QPushButton
+from PyQt6.QtCore import QTimer
+
+from app.utils.diagnostics import status_snapshot
+from app.utils.tracing import slow_report
+
+
+class DiagnosticsDialog(QDialog):
+    """
+    Live view of the backend's status snapshot, refreshed once per second.
+    `status_fn` is the daemon's `status` call for a thin client.
+    """
+    ROWS = [
+        ("Files / sec", lambda s: f"{s['files_per_sec']:.1f}"),
+        ("Chunks / sec", lambda s: f"{s['chunks_per_sec']:.1f}"),
+        ("Encode p50 / p95", lambda s: _latency(s["encode_latency"])),
+        ("Upsert p50 / p95", lambda s: _latency(s["upsert_latency"])),
+        ("Index queue depth", lambda s: f"{s['queue_depth']:.0f}"),
+        ("Write buffer pending", lambda s: f"{s['write_buffer_pending']:.0f}"),
+        ("Manifest hit rate", lambda s: f"{s['hit_rates']['manifest']:.0%}"),
+        ("Archive member hit rate", lambda s: f"{s['hit_rates']['archive_member']:.0%}"),
+        ("Snippet cache hit rate", lambda s: f"{s['hit_rates']['snippet']:.0%}"),
+        ("Resident memory", lambda s: f"{s['resident_bytes'] / 2**20:.0f} MB"),
+        ("OCR skipped by gate", lambda s: _ocr_gate(s)),
+        ("Model migration", lambda s: _migration(s.get("migration"))),
+    ]
+
+    def __init__(self, parent=None, status_fn=status_snapshot):
+        super().__init__(parent)
+        self.status_fn = status_fn
+        self.setWindowTitle("SLAM Diagnostics")
+        self.setMinimumWidth(420)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("<b>Indexing & Search Metrics</b>"))
+        self.table = QTableWidget(len(self.ROWS), 2)
+        self.table.setHorizontalHeaderLabels(["Metric", "Value"])
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        for row, (label, _) in enumerate(self.ROWS):
+            self.table.setItem(row, 0, QTableWidgetItem(label))
+            self.table.setItem(row, 1, QTableWidgetItem("-"))
+        layout.addWidget(self.table)
+
+        self.slow_btn = QPushButton("🐢 Slow Files")
+        self.slow_btn.clicked.connect(lambda: SlowFilesDialog(self).exec())
+        layout.addWidget(self.slow_btn)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        try:
+            status = self.status_fn()
+        except Exception as e:
+            self.table.item(0, 1).setText(f"unavailable ({e})")
+            return
+        for row, (_, value) in enumerate(self.ROWS):
+            self.table.item(row, 1).setText(value(status))
+
+
+class SlowFilesDialog(QDialog):
+    """Slowest indexed files and file types, read from the trace store."""
+    def __init__(self, parent=None, top: int = 20):
+        super().__init__(parent)
+        self.setWindowTitle("Slow Files")
+        self.resize(760, 560)
+        report = slow_report(top=top)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("<b>Slowest Files</b>"))
+        layout.addWidget(_table(["Seconds", "Stage", "Path"], [
+            (f"{r['total']:.2f}", r["dominant_stage"], r["path"]) for r in report["slow_files"]
+        ]))
+        layout.addWidget(QLabel("<b>By File Type</b>"))
+        layout.addWidget(_table(["Type", "Files", "Mean s", "P95 s", "s / MB", "Stage"], [
+            (t["ext"], str(t["files"]), f"{t['mean']:.3f}", f"{t['p95']:.3f}", f"{t['sec_per_mb']:.3f}", t["dominant_stage"])
+            for t in report["slow_types"]
+        ]))
+
+
+def _table(headers, rows):
+    table = QTableWidget(len(rows), len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.verticalHeader().setVisible(False)
+    table.horizontalHeader().setStretchLastSection(True)
+    for r, row in enumerate(rows):
+        for c, value in enumerate(row):
+            table.setItem(r, c, QTableWidgetItem(value))
+    return table
+
+
+def _latency(p50_p95):
+    if not p50_p95:
+        return "-"
+    return f"{p50_p95[0] * 1000:.1f} / {p50_p95[1] * 1000:.1f} ms"
+
+
+def _migration(m):
+    if not m:
+        return "-"
+    if m["state"] not in ("copying", "catching_up"):
+        return f"{m['model']}: {m['state']}"
+    eta = f", ~{m['eta_seconds'] / 60:.0f} min left" if m["eta_seconds"] is not None else ""
+    return f"{m['model']}: {m['percent']:.0f}% ({m['done']}/{m['total']}){eta}"
+
+
+def _ocr_gate(s):
+    seen = s.get("ocr_skipped", 0) + s.get("ocr_run", 0)
+    if not seen:
+        return "-"
+    return f"{s['ocr_skipped'] / seen:.0%} of {seen:.0f} images (~{s['ocr_seconds_saved']:.0f} s saved)"
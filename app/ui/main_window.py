@@ -1,31 +1,91 @@
 
+import threading
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from app.utils.laucher import open_file
 from app.ui.styles import STYLE_SHEET
-from app.ui.components import FileResultCard
-from app.ui.preview_panel import PreviewPanel
+from app.ui.components import ResultListModel, ResultDelegate
+from app.ui.preview_panel import PreviewPanel, highlight_html
+from app.ui.diagnostics_panel import DiagnosticsDialog
+from app.core.render import RenderService, renderable, parse_bbox
 
 
 class SearchThread(QThread):
-    results_ready = pyqtSignal(list)
-    def __init__(self, backend, query):
+    """
+    Streams results in batches: a small top-k query is shown first, then the
+    rest of the full result set follows. `generation` lets the GUI drop
+    batches from a superseded search that were already queued.
+    """
+    results_ready = pyqtSignal(int, list)
+    search_done = pyqtSignal(int)
+    search_failed = pyqtSignal(int, str)
+    FIRST_PAGE = 20
+    MAX_RESULTS = 200
+    BATCH = 50
+
+    def __init__(self, backend, query, generation=0):
         super().__init__()
         self.backend = backend
         self.query = query
+        self.generation = generation
         self._is_running = True
 
     def run(self):
         if not self._is_running:
             return
-        v = self.backend.engine.encode(self.query)
-        self.results_ready.emit(self.backend.db.query(v))
+        try:
+            self._search()
+        except Exception as e:
+            self.search_failed.emit(self.generation, str(e))
+
+    def _search(self):
+        # `backend` is the in-process SLAMBackend or a SLAMClient talking to the daemon
+        first = self.backend.search(self.query, n=self.FIRST_PAGE)
+        self.results_ready.emit(self.generation, first)
+        if self._is_running and len(first) == self.FIRST_PAGE:
+            shown = {(r["metadata"].get("path"), r["metadata"].get("chunk_id")) for r in first}
+            rest = [r for r in self.backend.search(self.query, n=self.MAX_RESULTS)
+                    if (r["metadata"].get("path"), r["metadata"].get("chunk_id")) not in shown]
+            for i in range(0, len(rest), self.BATCH):
+                if not self._is_running:
+                    return
+                self.results_ready.emit(self.generation, rest[i:i + self.BATCH])
+        self.search_done.emit(self.generation)
 
     def stop(self):
         self._is_running = False
 
 
+class PreviewThread(QThread):
+    """Fetches one chunk's text from the snippet store and highlights it off the UI thread."""
+    preview_ready = pyqtSignal(int, str, str)
+
+    def __init__(self, backend, result, query, token):
+        super().__init__()
+        self.backend = backend
+        self.result = result
+        self.query = query
+        self.token = token
+
+    def run(self):
+        meta = self.result['metadata']
+        snippet = self.result.get('snippet')
+        if snippet is None and self.result.get('id'):
+            try:
+                snippet = self.backend.snippet(self.result['id'])
+            except Exception:
+                snippet = None  # Daemon unavailable: shown as "no preview"
+        body = highlight_html(snippet, self.query) if snippet is not None else ""
+        self.preview_ready.emit(self.token, meta.get('filename', ''), body)
+
+
+class RenderBridge(QObject):
+    """Carries RenderService callbacks (render thread) to the GUI thread."""
+    rendered = pyqtSignal(int, str)
+
 
+class SLAMGui(QMainWindow):
+    PREFETCH_ROWS = 12
 
     def __init__(self, backend):
         super().__init__()
@@ -46,6 +106,11 @@ class SearchThread(QThread):
         title.setStyleSheet("font-size: 20px; color: white; font-weight: bold;")
         header.addWidget(title)
         header.addStretch()
+        self.diagnostics_btn = QPushButton("📊")
+        self.diagnostics_btn.setFixedSize(40, 40)
+        self.diagnostics_btn.setToolTip("Indexing and search diagnostics")
+        self.diagnostics_btn.clicked.connect(self.show_diagnostics)
+        header.addWidget(self.diagnostics_btn)
         self.settings_btn = QPushButton("⚙")
         self.settings_btn.setFixedSize(40, 40)
         header.addWidget(self.settings_btn)
@@ -60,8 +125,15 @@ class SearchThread(QThread):
 
         # Results and Preview Area
         content_splitter = QSplitter()
-        self.results_list = QListWidget()
-        self.results_list.itemClicked.connect(self.show_preview)
+        self.results_model = ResultListModel(self)
+        self.results_list = QListView()
+        self.results_list.setObjectName("results")
+        self.results_list.setModel(self.results_model)
+        self.results_list.setItemDelegate(ResultDelegate(self.results_list))
+        self.results_list.setUniformItemSizes(True)
+        self.results_list.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.results_list.clicked.connect(self.show_preview)
+        self.results_list.verticalScrollBar().valueChanged.connect(self.schedule_prefetch)
         content_splitter.addWidget(self.results_list)
         self.preview_panel = PreviewPanel()
         content_splitter.addWidget(self.preview_panel)
@@ -76,6 +148,19 @@ class SearchThread(QThread):
         self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.exec_search)
         self.thread = None
+        self.search_generation = 0
+        self.preview_token = 0
+        self.preview_threads = set()
+        self.preview_meta = {}
+
+        # Page renders / thumbnails: off-thread, disk-cached, prefetched for visible rows
+        self.renderer = RenderService()
+        self.render_bridge = RenderBridge()
+        self.render_bridge.rendered.connect(self.display_render)
+        self.prefetched = set()
+        self.prefetch_timer = QTimer()
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.prefetch_visible)
 
         # Theme support: sync with config
         self.config = getattr(self.backend, 'config', None)
@@ -94,40 +179,108 @@ class SearchThread(QThread):
         pass
 
     def start_timer(self):
+        if not self.timer.isActive():
+            # First keystroke of a query: reload an idle-unloaded model while the user types.
+            # Off the UI thread, since the client connection may be busy with a search.
+            threading.Thread(target=self._warm_backend, daemon=True).start()
         self.timer.stop()
         self.timer.start(350)
 
+    def _warm_backend(self):
+        try:
+            self.backend.warm()
+        except Exception:
+            pass  # Best effort; the search itself reports real failures
+
     def exec_search(self):
         if self.thread is not None and self.thread.isRunning():
             self.thread.stop()
             self.thread.wait()
         self.status_bar.setText("Searching...")
-        self.thread = SearchThread(self.backend, self.search_bar.text())
+        self.search_generation += 1
+        self.results_model.clear()
+        self.renderer.cancel_prefetch()
+        self.prefetched.clear()
+        self.thread = SearchThread(self.backend, self.search_bar.text(), self.search_generation)
         self.thread.results_ready.connect(self.display_results)
+        self.thread.search_done.connect(self.search_finished)
+        self.thread.search_failed.connect(self.search_error)
         self.thread.start()
 
-    def display_results(self, results):
-        self.results = results
-        self.results_list.clear()
-        for idx, item in enumerate(results):
-            meta = item['metadata']
-            card = FileResultCard(meta['filename'], meta['path'], item['score'])
-            list_item = QListWidgetItem(self.results_list)
-            list_item.setSizeHint(card.sizeHint())
-            list_item.setData(Qt.ItemDataRole.UserRole, meta['path'])
-            list_item.setData(Qt.ItemDataRole.UserRole + 1, idx)
-            self.results_list.addItem(list_item)
-            self.results_list.setItemWidget(list_item, card)
-        self.status_bar.setText(f"{len(results)} result(s) found.")
-
-    def show_preview(self, item):
-        idx = item.data(Qt.ItemDataRole.UserRole + 1)
-        if idx is not None and 0 <= idx < len(self.results):
-            meta = self.results[idx]['metadata']
-            snippet = self.results[idx].get('snippet', '')
-            query = self.search_bar.text()
-            self.preview_panel.update_preview(meta.get('filename', ''), snippet, query)
+    def display_results(self, generation, results):
+        if generation != self.search_generation:
+            return  # Batch from a superseded search
+        self.results_model.append_results(results)
+        self.status_bar.setText(f"{self.results_model.rowCount()} result(s) so far...")
+        self.schedule_prefetch()
+
+    def search_finished(self, generation):
+        if generation == self.search_generation:
+            self.status_bar.setText(f"{self.results_model.rowCount()} result(s) found.")
+
+    def search_error(self, generation, message):
+        if generation == self.search_generation:
+            self.status_bar.setText(f"Search failed: {message}")
+
+    def show_preview(self, index):
+        if not index.isValid():
+            return
+        result = self.results_model.result(index.row())
+        self.preview_token += 1
+        self.preview_panel.show_message(result['metadata'].get('filename', ''), "Loading...")
+        thread = PreviewThread(self.backend, result, self.search_bar.text(), self.preview_token)
+        thread.preview_ready.connect(self.display_preview)
+        # Keep a reference until the thread is done; older clicks are ignored by token
+        self.preview_threads.add(thread)
+        thread.finished.connect(lambda: self.preview_threads.discard(thread))
+        thread.start()
+
+        meta = self.preview_meta = result['metadata']
+        self.preview_panel.clear_image()
+        if renderable(meta):
+            cached = self.renderer.cached(meta)
+            if cached:
+                self.preview_panel.show_image(cached, parse_bbox(meta))
+            else:
+                token = self.preview_token
+                self.renderer.request(meta, lambda path: self.render_bridge.rendered.emit(token, path or ""))
+
+    def display_render(self, token, path):
+        if token != self.preview_token or not path:
+            return
+        self.preview_panel.show_image(path, parse_bbox(self.preview_meta))
+
+    def schedule_prefetch(self):
+        self.prefetch_timer.start(150)
+
+    def prefetch_visible(self):
+        """Queues renders for the rows currently on screen (low priority, deduplicated)."""
+        rows = self.results_model.rowCount()
+        if not rows:
+            return
+        first = self.results_list.indexAt(QPoint(1, 1)).row()
+        last = self.results_list.indexAt(QPoint(1, self.results_list.viewport().height() - 2)).row()
+        first = max(first, 0)
+        last = rows - 1 if last < 0 else last
+        for row in range(first, min(last + 1, first + self.PREFETCH_ROWS)):
+            meta = self.results_model.result(row)['metadata']
+            if renderable(meta):
+                key = self.renderer.key(meta)
+                if key not in self.prefetched:
+                    self.prefetched.add(key)
+                    self.renderer.prefetch(meta)
+
+    def display_preview(self, token, filename, body):
+        if token != self.preview_token:
+            return
+        if body:
+            self.preview_panel.show_html(filename, body)
+        else:
+            self.preview_panel.show_message(filename, "No preview stored for this result. Re-index the file to add one.")
+
+    def show_diagnostics(self):
+        DiagnosticsDialog(self, status_fn=self.backend.status).exec()
 
     def clear_results(self):
-        self.results_list.clear()
+        self.results_model.clear()
         self.status_bar.setText("Results cleared.")
\ No newline at end of file
@@ -1,4 +1,31 @@
+import html
+import re
 from PyQt6.QtWidgets import QFrame, QVBoxLayout, QTextEdit, QLabel
+from PyQt6.QtGui import QColor, QPainter, QPen, QPixmap
+from PyQt6.QtCore import QRectF
+
+HIGHLIGHT = "<span style='background-color: #3d5afe; color: white;'>{}</span>"
+
+
+def highlight_html(snippet, query):
+    """
+    Escapes `snippet` and highlights every query term (case-insensitive) in a
+    single regex pass. Pure function, so it can run off the UI thread.
+    """
+    terms = sorted({t for t in re.findall(r"\w+", query.lower()) if len(t) > 1}, key=len, reverse=True)
+    if not terms:
+        body = html.escape(snippet)
+    else:
+        pattern = re.compile("|".join(map(re.escape, terms)), re.IGNORECASE)
+        parts, pos = [], 0
+        for m in pattern.finditer(snippet):
+            parts.append(html.escape(snippet[pos:m.start()]))
+            parts.append(HIGHLIGHT.format(html.escape(m.group())))
+            pos = m.end()
+        parts.append(html.escape(snippet[pos:]))
+        body = "".join(parts)
+    return f"<div style='white-space: pre-wrap;'>{body}</div>"
+
 
 class PreviewPanel(QFrame):
     def __init__(self, parent=None):
@@ -10,15 +37,47 @@ class PreviewPanel(QFrame):
         self.title = QLabel("Document Preview")
         self.title.setStyleSheet("color: white; font-weight: bold; font-size: 14px;")
         
+        # Rendered page / thumbnail of the selected result (see RenderService)
+        self.image = QLabel()
+        self.image.setVisible(False)
+
         self.text_area = QTextEdit()
         self.text_area.setReadOnly(True)
         self.text_area.setStyleSheet("background-color: transparent; border: none; color: #ccc;")
         
         layout.addWidget(self.title)
+        layout.addWidget(self.image)
         layout.addWidget(self.text_area)
 
     def update_preview(self, filename, snippet, query):
+        self.show_html(filename, highlight_html(snippet, query))
+
+    def show_html(self, filename, body):
+        """Shows already escaped/highlighted HTML (see `highlight_html`)."""
+        self.title.setText(f"Preview: {filename}")
+        self.text_area.setHtml(body)
+
+    def show_image(self, png_path, bbox=None):
+        """Shows a render; `bbox` (page fractions) marks the matching block on PDF pages."""
+        pixmap = QPixmap(png_path)
+        if pixmap.isNull():
+            self.clear_image()
+            return
+        if bbox:
+            x0, y0, x1, y1 = bbox
+            w, h = pixmap.width(), pixmap.height()
+            painter = QPainter(pixmap)
+            painter.setPen(QPen(QColor("#3d5afe"), 2))
+            painter.fillRect(QRectF(x0 * w, y0 * h, (x1 - x0) * w, (y1 - y0) * h), QColor(61, 90, 254, 50))
+            painter.drawRect(QRectF(x0 * w, y0 * h, (x1 - x0) * w, (y1 - y0) * h))
+            painter.end()
+        self.image.setPixmap(pixmap)
+        self.image.setVisible(True)
+
+    def clear_image(self):
+        self.image.clear()
+        self.image.setVisible(False)
+
+    def show_message(self, filename, message):
         self.title.setText(f"Preview: {filename}")
-        # Simple HTML highlighting for the query word
-        highlighted = snippet.replace(query, f"<span style='background-color: #3d5afe; color: white;'>{query}</span>")
-        self.text_area.setHtml(highlighted)
+        self.text_area.setPlainText(message)
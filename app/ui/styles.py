@@ -17,6 +17,12 @@ QLineEdit:focus {
     border: 1px solid #3d5afe;
 }
 
+QListView#results {
+    background-color: transparent;
+    border: none;
+    outline: none;
+}
+
 QListWidget {
     background-color: transparent;
     border: none;
@@ -1,12 +1,42 @@
 
 import json
 import os
+import threading
 
 
 class ConfigManager:
     def __init__(self, config_file="config.json"):
         self.config_file = config_file
-        self.defaults = {"watched_folders": [], "theme": "light"}
+        self.defaults = {
+            "watched_folders": [], "theme": "light", "max_text_bytes": 0,
+            # Changing it re-embeds the index in the background; search stays on the old model until the swap
+            "embedding_model": "all-MiniLM-L6-v2",
+            # Set (e.g. "paraphrase-multilingual-MiniLM-L12-v2") to route non-English chunks to
+            # that model in a second collection; English stays on embedding_model
+            "multilingual_model": "",
+            # Sandboxed extraction: per-file seconds, worker RSS ceiling, files before recycling
+            "extract_timeout": 120, "extract_max_rss_mb": 2048, "extract_recycle_after": 200,
+            # Prometheus text endpoint on localhost (0 disables it)
+            "metrics_port": 9464,
+            # Daemon-side index garbage collection (0 disables it)
+            "compact_interval_hours": 24,
+            # Unload the embedding model after this many idle minutes (0 keeps it resident);
+            # torch intra-op threads (0 = one per core); process RSS budget in MB (0 = unlimited)
+            "model_idle_minutes": 10, "torch_threads": 0, "memory_budget_mb": 0,
+            # MinHash similarity at which a file is linked to an existing one and only its
+            # differing chunks are embedded; results show one hit per group (0 disables it)
+            "near_duplicate_threshold": 0.8,
+            # Images whose text-presence score (0-1, from a downsampled copy) is below this
+            # skip OCR (0, the default, OCRs every image); try 0.3 once it is checked
+            # against a sample of your own images
+            "ocr_gate_threshold": 0,
+            # Paged documents (PDF) longer than the first count are searchable after their first
+            # pages; the rest is indexed in ranges of the unit size at low priority (0 disables)
+            "progressive_first_pages": 50, "progressive_unit_pages": 100,
+            # Failed files are retried in the background at most this many times (0: never), with a
+            # backoff that starts at the given seconds and doubles after every further failure
+            "dead_letter_max_attempts": 5, "dead_letter_backoff_seconds": 60,
+        }
         self.settings = self.load_config()
         self._last_mtime = self._get_mtime()
 
@@ -27,6 +57,39 @@ class ConfigManager:
         return self.defaults.copy()
 
 
+    def reload(self):
+        """Re-reads the file if it changed on disk (edited by hand or by another process)."""
+        if self._get_mtime() is None:
+            return  # No file (yet): keep what is in memory
+        try:
+            self.settings = self.load_config()
+        except ValueError:
+            self._last_mtime = None  # Caught mid-write: read it again on the next call
+
+    def watch(self, on_change, stop, interval=2.0):
+        """
+        Calls `on_change({key: (old, new)})` from a background thread whenever
+        settings change, whether config.json was rewritten or `settings` was
+        edited in place and saved. Polls every `interval` seconds until `stop` is set.
+        """
+        def snapshot():
+            return json.loads(json.dumps(self.settings))
+
+        def loop():
+            seen = snapshot()
+            while not stop.wait(interval):
+                self.reload()
+                current = snapshot()
+                changes = {k: (seen.get(k), current.get(k)) for k in seen.keys() | current.keys()
+                           if seen.get(k) != current.get(k)}
+                if changes:
+                    seen = current
+                    on_change(changes)
+
+        thread = threading.Thread(target=loop, name="SLAM-ConfigWatch", daemon=True)
+        thread.start()
+        return thread
+
     def save_config(self):
         with open(self.config_file, 'w') as f:
             json.dump(self.settings, f, indent=4)
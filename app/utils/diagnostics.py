@@ -1,36 +1,126 @@
 import time
+import queue
+import atexit
+import inspect
+import itertools
 import psutil
 import logging
+import logging.handlers
 import platform
 from functools import wraps
 from pathlib import Path
 
-# Setup unified logging
+from app.utils.metrics import metrics
+
+class DeferredFileMixin:
+    """For `delay=True` file handlers: creates the log folder on the first write, not at import."""
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class _FileHandler(DeferredFileMixin, logging.FileHandler):
+    pass
+
+
+# Setup unified logging: callers only enqueue records, a listener thread does the file I/O
 log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
-logging.basicConfig(
-    filename=log_dir / "slam.log",
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+_log_queue = queue.SimpleQueue()
+_file_handler = _FileHandler(log_dir / "slam.log", delay=True)
+_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener = logging.handlers.QueueListener(_log_queue, _file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+# The queue handler only renders the message (args, traceback); the timestamped line is built once, by the file handler
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger("SLAM_Core")
 
-def profile_performance(func):
-    """Decorator to measure execution time and memory usage."""
+# RSS is read at export time only, never on the hot path
+_process = psutil.Process()
+metrics.gauge("process_resident_bytes", "Resident set size of the SLAM process",
+              fn=lambda: _process.memory_info().rss)
+
+SLOW_CALL_SECONDS = 5.0
+
+
+def profile_performance(func=None, *, sample_every: int = 1):
+    """
+    Decorator recording call counts and a latency histogram per function.
+    Only every `sample_every`-th call is timed. Generator functions are timed
+    over the time spent producing items, not the consumer's time in between.
+    """
+    if func is None:
+        return lambda f: profile_performance(f, sample_every=sample_every)
+
+    labels = {"func": func.__qualname__}
+    calls = metrics.counter("function_calls_total", "Calls of profiled functions", labels)
+    hist = metrics.histogram("function_duration_seconds", "Latency of profiled functions", labels)
+    ticker = itertools.count()
+
+    def observe(elapsed):
+        hist.observe(elapsed)
+        if elapsed > SLOW_CALL_SECONDS:
+            logger.warning(f"SLOW: {func.__qualname__} took {elapsed:.2f}s")
+
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def gen_wrapper(*args, **kwargs):
+            calls.inc()
+            if next(ticker) % sample_every:
+                return (yield from func(*args, **kwargs))
+            elapsed = 0.0
+            it = func(*args, **kwargs)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(it)
+                    except StopIteration as stop:
+                        elapsed += time.perf_counter() - start
+                        observe(elapsed)
+                        return stop.value
+                    elapsed += time.perf_counter() - start
+                    yield item
+            finally:
+                it.close()
+        return gen_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.perf_counter()
-        start_mem = psutil.Process().memory_info().rss / (1024 * 1024)
-        
-        result = func(*args, **kwargs)
-        
-        end_time = time.perf_counter()
-        end_mem = psutil.Process().memory_info().rss / (1024 * 1024)
-        
-        logger.info(f"FUNC: {func.__name__} | TIME: {end_time-start_time:.4f}s | MEM: {end_mem-start_mem:+.2f}MB")
-        return result
+        calls.inc()
+        if next(ticker) % sample_every:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observe(time.perf_counter() - start)
     return wrapper
 
+def status_snapshot():
+    """Headline indexing/search numbers, JSON-serializable (served over IPC as `status`)."""
+    def latency(name):
+        hist = metrics.histogram(name)
+        return [hist.percentile(0.5), hist.percentile(0.95)] if hist.count else None
+
+    return {
+        "files_per_sec": metrics.counter("files_indexed_total").rate(),
+        "chunks_per_sec": metrics.counter("chunks_indexed_total").rate(),
+        "files_indexed": metrics.counter("files_indexed_total").value,
+        "encode_latency": latency("encode_seconds"),
+        "upsert_latency": latency("upsert_seconds"),
+        "queue_depth": metrics.gauge("index_queue_depth").value,
+        "write_buffer_pending": metrics.gauge("write_buffer_pending").value,
+        "hit_rates": {cache: metrics.hit_rate(cache) for cache in ("manifest", "archive_member", "snippet")},
+        "resident_bytes": metrics.gauge("process_resident_bytes").value,
+        "ocr_skipped": metrics.counter("ocr_gate_total", labels={"decision": "skip"}).value,
+        "ocr_run": metrics.counter("ocr_gate_total", labels={"decision": "ocr"}).value,
+        "ocr_seconds_saved": metrics.counter("ocr_seconds_saved_total").value,
+    }
+
+
 class SystemHealth:
     @staticmethod
     def get_report():
@@ -38,5 +128,5 @@ class SystemHealth:
             "os": platform.system(),
             "cpu_usage": psutil.cpu_percent(),
             "ram_available": f"{psutil.virtual_memory().available / (1024**3):.2f} GB",
-            "threads": psutil.Process().num_threads()
+            "threads": _process.num_threads()
         }
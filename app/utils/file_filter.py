@@ -16,9 +16,9 @@ EXCLUDE_EXTENSIONS = {
     # Archives
     '.zip', '.tar', '.gz', '.rar', '.7z', '.bz2', '.xz',
     # Documents
-    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.rtf', '.odt', '.ods', '.odp',
+    '.pdf', '.doc', '.xls', '.ppt', '.rtf',
     # Misc
-    '.db', '.sqlite', '.log', '.tmp', '.swp', '.bak',
+    '.db', '.sqlite', '.sqlite3', '.log', '.tmp', '.swp', '.bak',
 }
 
 def is_text_file(filepath, blocksize=1024):
@@ -0,0 +1,86 @@
+import ctypes
+import ctypes.util
+import gc
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import psutil
+
+from app.utils.diagnostics import logger
+from app.utils.metrics import metrics
+
+
+def trim_heap():
+    """
+    Collects garbage and hands freed heap pages back to the OS. Without the
+    malloc_trim, glibc keeps a released model's arenas mapped and RSS barely moves.
+    """
+    gc.collect()
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        libc.malloc_trim(0)
+    except (OSError, AttributeError):
+        pass  # Not glibc (macOS, Windows, musl): the allocator decides on its own
+
+
+class MemoryBudget:
+    """
+    Process-wide resident memory budget. Components register a `release`
+    callable (returning True if it freed something) with a priority; when RSS
+    exceeds the budget the watchdog releases them cheapest-to-rebuild first
+    (lowest priority) until RSS is back under the low-water mark.
+    """
+    LOW_WATER = 0.9
+
+    def __init__(self, budget_mb: int = 0, interval: float = 15.0):
+        self.budget_mb = budget_mb
+        self.interval = interval
+        self._process = psutil.Process()
+        self._releasers: List[Tuple[int, str, Callable[[], bool]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, release: Callable[[], bool], priority: int = 50):
+        with self._lock:
+            self._releasers.append((priority, name, release))
+            self._releasers.sort(key=lambda r: r[0])
+
+    def rss_mb(self) -> float:
+        return self._process.memory_info().rss / 2**20
+
+    def check(self) -> List[str]:
+        """One enforcement pass; returns the names of the components released."""
+        if not self.budget_mb or self.rss_mb() <= self.budget_mb:
+            return []
+        released = []
+        with self._lock:
+            releasers = list(self._releasers)
+        for _, name, release in releasers:
+            try:
+                if not release():
+                    continue
+            except Exception as e:
+                logger.error(f"Memory release of {name} failed: {e}")
+                continue
+            released.append(name)
+            metrics.counter("memory_releases_total", "Components shed to meet the memory budget", {"component": name}).inc()
+            trim_heap()
+            if self.rss_mb() <= self.budget_mb * self.LOW_WATER:
+                break
+        if released:
+            logger.info(f"Memory budget {self.budget_mb} MB exceeded; released {', '.join(released)} "
+                        f"(now {self.rss_mb():.0f} MB)")
+        return released
+
+    def start(self, stop: threading.Event) -> Optional[threading.Thread]:
+        if not self.budget_mb:
+            return None
+
+        def loop():
+            while not stop.wait(self.interval):
+                self.check()
+        thread = threading.Thread(target=loop, name="SLAM-MemoryBudget", daemon=True)
+        thread.start()
+        return thread
+
+
+memory = MemoryBudget()
@@ -0,0 +1,204 @@
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# --- 📈 Metric Types ---
+
+class Counter:
+    """Monotonic counter. Keeps ~1 snapshot/sec so recent rates can be computed."""
+    def __init__(self, name: str, help: str = "", labels: Tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.value = 0
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=120)  # (monotonic time, value)
+
+    def inc(self, n: float = 1):
+        with self._lock:
+            self.value += n
+            now = time.monotonic()
+            if not self._history or now - self._history[-1][0] >= 1.0:
+                self._history.append((now, self.value))
+
+    def rate(self, window: float = 30.0) -> float:
+        """Average increase per second over roughly the last `window` seconds."""
+        with self._lock:
+            now, value = time.monotonic(), self.value
+            past = [(t, v) for t, v in self._history if now - t <= window]
+        if not past or now - past[0][0] < 1e-3:
+            return 0.0
+        t0, v0 = past[0]
+        return (value - v0) / (now - t0)
+
+
+class Gauge:
+    """Point-in-time value, either set explicitly or read from a callback at export time."""
+    def __init__(self, name: str, help: str = "", labels: Tuple = (), fn: Optional[Callable[[], float]] = None):
+        self.name, self.help, self.labels = name, help, labels
+        self.fn = fn
+        self._value = 0.0
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        if self.fn is not None:
+            try:
+                return float(self.fn())
+            except Exception:
+                return float("nan")
+        return self._value
+
+
+# Exponential latency buckets from 100µs to ~100s
+DEFAULT_BUCKETS = tuple(0.0001 * 2 ** i for i in range(21))
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are interpolated within buckets."""
+    def __init__(self, name: str, help: str = "", labels: Tuple = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * ((rank - seen) / c)
+            seen += c
+        return self.buckets[-1]
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+# --- 🗂️ Registry ---
+
+class MetricsRegistry:
+    """Process-wide get-or-create registry of counters, gauges and histograms."""
+    def __init__(self, prefix: str = "slam_"):
+        self.prefix = prefix
+        self._metrics: Dict[Tuple[str, Tuple], object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, labels: Optional[Dict[str, str]], **kwargs):
+        key = (self.prefix + name, tuple(sorted((labels or {}).items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = cls(key[0], help, key[1], **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None,
+              fn: Optional[Callable[[], float]] = None) -> Gauge:
+        gauge = self._get(Gauge, name, help, labels)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Histogram:
+        return self._get(Histogram, name, help, labels)
+
+    def timer(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None):
+        """`with metrics.timer("encode_seconds"): ...`"""
+        return self.histogram(name, help, labels).time()
+
+    def collect(self) -> List[object]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def hit_rate(self, cache: str) -> float:
+        """Fraction of `cache_requests_total{cache=..., result="hit"}` among all requests."""
+        hits = self.counter("cache_requests_total", labels={"cache": cache, "result": "hit"}).value
+        misses = self.counter("cache_requests_total", labels={"cache": cache, "result": "miss"}).value
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (v0.0.4)."""
+        lines, typed = [], set()
+        for m in sorted(self.collect(), key=lambda m: (m.name, m.labels)):
+            kind = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}[type(m)]
+            if m.name not in typed:
+                typed.add(m.name)
+                if m.help:
+                    lines.append(f"# HELP {m.name} {m.help}")
+                lines.append(f"# TYPE {m.name} {kind}")
+            if isinstance(m, Histogram):
+                cumulative = 0
+                for bound, c in zip(list(m.buckets) + ["+Inf"], m.counts):
+                    cumulative += c
+                    le = bound if bound == "+Inf" else f"{bound:g}"
+                    lines.append(f"{m.name}_bucket{_labels(m.labels, ('le', le))} {cumulative}")
+                lines.append(f"{m.name}_sum{_labels(m.labels)} {m.sum}")
+                lines.append(f"{m.name}_count{_labels(m.labels)} {m.count}")
+            else:
+                lines.append(f"{m.name}{_labels(m.labels)} {m.value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Tuple, *extra: Tuple[str, str]) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+metrics = MetricsRegistry()
+
+
+# --- 🌐 Prometheus Endpoint ---
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes should not spam the log
+
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves /metrics on localhost from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="SLAM-Metrics", daemon=True).start()
+    return server
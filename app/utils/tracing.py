@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import queue
+import atexit
+import argparse
+import logging
+import logging.handlers
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.utils.diagnostics import DeferredFileMixin, log_dir
+
+
+# --- 🧵 Trace Records ---
+
+class Trace:
+    """Timing record for one indexed path: summed span durations plus byte/page/chunk counts."""
+    __slots__ = ("path", "ext", "started", "total", "spans", "counts", "status", "persist")
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.ext = Path(self.path).suffix.lower() or "(none)"
+        self.started = time.time()
+        self.total = 0.0
+        self.spans: Dict[str, List[float]] = {}  # name -> [seconds, count]
+        self.counts: Dict[str, int] = {}
+        self.status = "ok"
+        self.persist = True
+
+    def add_span(self, name: str, seconds: float, count: int = 1):
+        span = self.spans.setdefault(name, [0.0, 0])
+        span[0] += seconds
+        span[1] += count
+
+    def add(self, key: str, n: int = 1):
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def merge(self, spans: Dict[str, List[float]], counts: Dict[str, int], nested_in: Optional[str] = None):
+        """
+        Folds in spans/counts recorded elsewhere (e.g. by a sandboxed worker
+        process). With `nested_in`, the merged time is subtracted from that
+        span so it keeps holding self time only.
+        """
+        for name, (seconds, count) in spans.items():
+            self.add_span(name, seconds, count)
+        if nested_in and nested_in in self.spans:
+            inner = sum(seconds for seconds, _ in spans.values())
+            self.spans[nested_in][0] = max(0.0, self.spans[nested_in][0] - inner)
+        for key, n in counts.items():
+            self.add(key, n)
+
+    def to_dict(self) -> Dict:
+        return {
+            "path": self.path, "ext": self.ext, "started": self.started, "total": round(self.total, 6),
+            "status": self.status, "spans": {k: [round(v[0], 6), v[1]] for k, v in self.spans.items()},
+            "counts": self.counts,
+        }
+
+
+class _TraceFileHandler(DeferredFileMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class TraceStore:
+    """Rotating JSON-lines store; records are written by a background listener thread."""
+    def __init__(self, directory: Path, max_bytes: int = 10 * 1024 * 1024, backups: int = 5):
+        self.directory = Path(directory)
+        self.path = self.directory / "traces.jsonl"
+        self._queue = queue.SimpleQueue()
+        handler = _TraceFileHandler(self.path, maxBytes=max_bytes, backupCount=backups, delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+        atexit.register(self._listener.stop)
+        self._logger = logging.getLogger("SLAM_Traces")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(logging.handlers.QueueHandler(self._queue))
+
+    def write(self, trace: Trace):
+        self._logger.info(json.dumps(trace.to_dict()))
+
+    def load(self) -> Iterator[Dict]:
+        return load_traces(self.directory)
+
+
+def load_traces(directory: Path) -> Iterator[Dict]:
+    """Yields trace records from the current and rotated files, oldest first."""
+    files = sorted(Path(directory).glob("traces.jsonl*"), key=os.path.getmtime)
+    for f in files:
+        with open(f) as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+class Tracer:
+    """
+    Thread-local tracing. `trace(path)` opens a record for the current thread;
+    `span(name)` and `add(key)` are no-ops when no trace is active, so
+    extractors can be instrumented unconditionally. Spans record self time:
+    a nested span's duration is not counted again in its parent. Never keep a
+    span open across a `yield`, or the consumer's work lands inside it.
+    """
+    def __init__(self, store: Optional[TraceStore] = None):
+        self.store = store
+        self._local = threading.local()
+
+    @property
+    def current(self) -> Optional[Trace]:
+        return getattr(self._local, "trace", None)
+
+    @contextmanager
+    def trace(self, path: str, persist: bool = True):
+        trace = Trace(path)
+        trace.persist = persist
+        previous, self._local.trace = self.current, trace
+        previous_stack, self._local.stack = getattr(self._local, "stack", None), []
+        start = time.perf_counter()
+        try:
+            yield trace
+        except BaseException:
+            trace.status = "error"
+            raise
+        finally:
+            trace.total = time.perf_counter() - start
+            self._local.trace, self._local.stack = previous, previous_stack
+            if trace.persist:
+                self.finish(trace)
+
+    def finish(self, trace: Trace):
+        if self.store is not None:
+            self.store.write(trace)
+
+    @contextmanager
+    def span(self, name: str):
+        trace = self.current
+        if trace is None:
+            yield
+            return
+        frame = [time.perf_counter(), 0.0]  # start, time spent in nested spans
+        stack = self._local.stack
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            trace.add_span(name, elapsed - frame[1])
+            if stack:
+                stack[-1][1] += elapsed
+
+    def add(self, key: str, n: int = 1):
+        trace = self.current
+        if trace is not None:
+            trace.add(key, n)
+
+
+tracer = Tracer(TraceStore(log_dir / "traces"))
+
+
+# --- 🐢 Slow-File Report ---
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def slow_report(directory: Optional[Path] = None, top: int = 20) -> Dict:
+    """Top slow files and per-extension latency, with the dominant stage of each."""
+    latest: Dict[str, Dict] = {}
+    for record in load_traces(directory or tracer.store.directory):
+        latest[record["path"]] = record  # Most recent trace per path
+
+    def dominant(spans):
+        return max(spans.items(), key=lambda kv: kv[1][0])[0] if spans else "-"
+
+    slow_files = sorted(latest.values(), key=lambda r: r["total"], reverse=True)[:top]
+    by_type: Dict[str, Dict] = {}
+    for r in latest.values():
+        t = by_type.setdefault(r["ext"], {"files": 0, "totals": [], "bytes": 0, "stages": {}})
+        t["files"] += 1
+        t["totals"].append(r["total"])
+        t["bytes"] += r["counts"].get("bytes", 0)
+        for name, (seconds, _) in r["spans"].items():
+            t["stages"][name] = t["stages"].get(name, 0.0) + seconds
+    types = []
+    for ext, t in by_type.items():
+        seconds = sum(t["totals"])
+        types.append({
+            "ext": ext, "files": t["files"], "mean": seconds / t["files"], "p95": _percentile(t["totals"], 0.95),
+            "sec_per_mb": seconds / (t["bytes"] / 2**20) if t["bytes"] else 0.0,
+            "dominant_stage": max(t["stages"], key=t["stages"].get) if t["stages"] else "-",
+        })
+    types.sort(key=lambda t: t["mean"], reverse=True)
+    return {
+        "slow_files": [{"path": r["path"], "total": r["total"], "dominant_stage": dominant(r["spans"]),
+                        "counts": r["counts"], "status": r["status"]} for r in slow_files],
+        "slow_types": types[:top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SLAM slow-file report from indexing traces")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--dir", default=str(log_dir / "traces"), help="trace store directory")
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = slow_report(Path(args.dir), args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'SECONDS':>9}  {'STAGE':<14} PATH")
+    for r in report["slow_files"]:
+        print(f"{r['total']:9.2f}  {r['dominant_stage']:<14} {r['path']}")
+    print()
+    print(f"{'EXT':<8} {'FILES':>6} {'MEAN s':>8} {'P95 s':>8} {'s/MB':>8}  STAGE")
+    for t in report["slow_types"]:
+        print(f"{t['ext']:<8} {t['files']:>6} {t['mean']:8.3f} {t['p95']:8.3f} {t['sec_per_mb']:8.3f}  {t['dominant_stage']}")
+
+
+if __name__ == "__main__":
+    main()
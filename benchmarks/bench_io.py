@@ -0,0 +1,80 @@
+"""
+Bytes read per indexed byte: hash-then-extract (two reads) vs SourceBuffer (one read).
+
+Counts read() syscall bytes via psutil's `read_chars` (Linux /proc/<pid>/io rchar),
+so page-cache hits are counted too.
+
+    python -m benchmarks.bench_io --files 200 --size-kb 512
+"""
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+
+import psutil
+
+from app.core.processor import FileProcessor
+from app.core.source import SourceBuffer
+
+
+def make_corpus(root, n_files, size_kb, seed=0):
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(5000)]
+    paths = []
+    for i in range(n_files):
+        path = os.path.join(root, f"doc_{i}.txt")
+        with open(path, "w") as f:
+            written = 0
+            while written < size_kb * 1024:
+                line = " ".join(rng.choices(words, k=12)) + "\n"
+                written += f.write(line)
+        paths.append(path)
+    return paths
+
+
+def read_chars():
+    return psutil.Process().io_counters().read_chars
+
+
+def two_pass(proc, path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(8192), b""):
+            sha.update(block)
+    for _ in proc.get_smart_chunks(path):
+        pass
+    return sha.hexdigest()
+
+
+def single_pass(proc, path):
+    with SourceBuffer(path) as src:
+        for _ in proc.get_smart_chunks(src):
+            pass
+        return src.hexdigest()
+
+
+def measure(fn, proc, paths):
+    start = read_chars()
+    for p in paths:
+        fn(proc, p)
+    return read_chars() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=512)
+    args = parser.parse_args()
+
+    proc = FileProcessor()
+    with tempfile.TemporaryDirectory() as root:
+        paths = make_corpus(root, args.files, args.size_kb)
+        indexed = sum(os.path.getsize(p) for p in paths)
+        for label, fn in (("hash + extract", two_pass), ("single pass", single_pass)):
+            read = measure(fn, proc, paths)
+            print(f"{label:15}: {read / indexed:.2f} bytes read per indexed byte")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Extraction throughput and peak Python memory for the streaming office
+extractors (docx, pptx, xlsx, odt, odp, ods) on large synthetic documents.
+
+Documents are written part by part straight into the zip, so generating a
+big spreadsheet needs no more memory than extracting it. Peak memory is
+measured with tracemalloc in a second pass, so timings are not slowed by it.
+
+    python -m benchmarks.bench_office --scale 4
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+
+from app.core.processor import FileProcessor
+from benchmarks.corpus import ZIP_DATE, vocabulary
+
+# Per unit of `scale`
+PARAGRAPHS = 20000
+SLIDES = 200
+ROWS = 50000
+SHEETS = 3
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+_R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_A = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+_P = 'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+_S = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+_REL = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+_ODF = ('xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+        'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+        'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+        'xmlns:draw="urn:oasis:names:tc:opendocument:xmlns:drawing:1.0"')
+
+
+class _Package:
+    """Writes zip parts incrementally (one `zf.open(..., "w")` stream per part)."""
+    def __init__(self, path):
+        self.zf = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+
+    def part(self, name, chunks):
+        info = zipfile.ZipInfo(name, ZIP_DATE)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with self.zf.open(info, "w", force_zip64=True) as f:
+            for chunk in chunks:
+                f.write(chunk.encode())
+
+    def close(self):
+        self.zf.close()
+
+
+def _rels(targets):
+    items = "".join(f'<Relationship Id="{rid}" Target="{t}" Type="x"/>' for rid, t in targets)
+    return [f'<?xml version="1.0"?><Relationships {_REL}>{items}</Relationships>']
+
+
+def _line(rng, words, lo=8, hi=18):
+    return escape(" ".join(rng.choices(words, k=rng.randint(lo, hi))).capitalize() + ".")
+
+
+def write_docx(path, rng, words, scale):
+    pkg = _Package(path)
+    paragraphs = (f"<w:p><w:r><w:t>{_line(rng, words)}</w:t></w:r></w:p>" for _ in range(PARAGRAPHS * scale))
+    pkg.part("word/document.xml", [f'<?xml version="1.0"?><w:document {_W}><w:body>', *paragraphs,
+                                   "</w:body></w:document>"])
+    pkg.close()
+
+
+def write_pptx(path, rng, words, scale):
+    pkg = _Package(path)
+    n = SLIDES * scale
+    ids = "".join(f'<p:sldId id="{256 + i}" r:id="rId{i + 1}"/>' for i in range(n))
+    pkg.part("ppt/presentation.xml", [f'<?xml version="1.0"?><p:presentation {_P} {_R}><p:sldIdLst>{ids}'
+                                      "</p:sldIdLst></p:presentation>"])
+    pkg.part("ppt/_rels/presentation.xml.rels", _rels((f"rId{i + 1}", f"slides/slide{i + 1}.xml") for i in range(n)))
+    for i in range(n):
+        body = "".join(f"<a:p><a:r><a:t>{_line(rng, words)}</a:t></a:r></a:p>" for _ in range(12))
+        pkg.part(f"ppt/slides/slide{i + 1}.xml", [f'<?xml version="1.0"?><p:sld {_P} {_A}><p:cSld><p:spTree>'
+                                                  f"<p:sp><p:txBody>{body}</p:txBody></p:sp>"
+                                                  "</p:spTree></p:cSld></p:sld>"])
+    pkg.close()
+
+
+def write_xlsx(path, rng, words, scale):
+    pkg = _Package(path)
+    strings = [escape(w) for w in words]
+    pkg.part("xl/sharedStrings.xml", [f'<?xml version="1.0"?><sst {_S}>',
+                                      *(f"<si><t>{w}</t></si>" for w in strings), "</sst>"])
+    sheets = "".join(f'<sheet name="Sheet{i + 1}" sheetId="{i + 1}" r:id="rId{i + 1}"/>' for i in range(SHEETS))
+    pkg.part("xl/workbook.xml", [f'<?xml version="1.0"?><workbook {_S} {_R}><sheets>{sheets}</sheets></workbook>'])
+    pkg.part("xl/_rels/workbook.xml.rels", _rels((f"rId{i + 1}", f"worksheets/sheet{i + 1}.xml") for i in range(SHEETS)))
+
+    def rows():
+        for r in range(ROWS * scale // SHEETS):
+            cells = "".join(f'<c r="{col}{r + 1}" t="s"><v>{rng.randrange(len(strings))}</v></c>' for col in "ABCD")
+            yield f'<row r="{r + 1}">{cells}<c r="E{r + 1}"><v>{rng.random() * 1000:.2f}</v></c></row>'
+    for i in range(SHEETS):
+        pkg.part(f"xl/worksheets/sheet{i + 1}.xml", [f'<?xml version="1.0"?><worksheet {_S}><sheetData>', *rows(),
+                                                      "</sheetData></worksheet>"])
+    pkg.close()
+
+
+def _odf(path, body):
+    pkg = _Package(path)
+    pkg.part("content.xml", [f'<?xml version="1.0"?><office:document-content {_ODF}><office:body>', *body,
+                             "</office:body></office:document-content>"])
+    pkg.close()
+
+
+def write_odt(path, rng, words, scale):
+    _odf(path, ["<office:text>", *(f"<text:p>{_line(rng, words)}</text:p>" for _ in range(PARAGRAPHS * scale)),
+                "</office:text>"])
+
+
+def write_odp(path, rng, words, scale):
+    def slides():
+        for i in range(SLIDES * scale):
+            body = "".join(f"<text:p>{_line(rng, words)}</text:p>" for _ in range(12))
+            yield f'<draw:page draw:name="p{i}"><draw:frame><draw:text-box>{body}</draw:text-box></draw:frame></draw:page>'
+    _odf(path, ["<office:presentation>", *slides(), "</office:presentation>"])
+
+
+def write_ods(path, rng, words, scale):
+    def sheets():
+        for i in range(SHEETS):
+            yield f'<table:table table:name="Sheet{i + 1}">'
+            for _ in range(ROWS * scale // SHEETS):
+                cells = "".join(f"<table:table-cell><text:p>{escape(w)}</text:p></table:table-cell>"
+                                for w in rng.choices(words, k=4))
+                yield f"<table:table-row>{cells}</table:table-row>"
+            yield '<table:table-row><table:table-cell table:number-columns-repeated="1024"/></table:table-row>'
+            yield "</table:table>"
+    _odf(path, ["<office:spreadsheet>", *sheets(), "</office:spreadsheet>"])
+
+
+WRITERS = {".docx": write_docx, ".pptx": write_pptx, ".xlsx": write_xlsx,
+           ".odt": write_odt, ".odp": write_odp, ".ods": write_ods}
+
+
+def uncompressed(path):
+    with zipfile.ZipFile(path) as z:
+        return sum(i.file_size for i in z.infolist())
+
+
+def extract(proc, path):
+    return sum(1 for _ in proc.get_smart_chunks(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=1, help="document size multiplier")
+    parser.add_argument("--formats", nargs="*", choices=list(WRITERS), help="default: all")
+    args = parser.parse_args()
+
+    proc = FileProcessor()
+    words = vocabulary()
+    with tempfile.TemporaryDirectory() as root:
+        print(f"{'format':6} {'file MB':>8} {'XML MB':>8} {'chunks':>8} {'seconds':>8} {'XML MB/s':>9} {'peak MB':>8}")
+        for ext in args.formats or list(WRITERS):
+            path = os.path.join(root, f"large{ext}")
+            WRITERS[ext](path, random.Random(0), words, args.scale)
+            xml = uncompressed(path) / 2**20
+
+            start = time.perf_counter()
+            chunks = extract(proc, path)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            extract(proc, path)
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+
+            print(f"{ext[1:]:6} {os.path.getsize(path) / 2**20:8.1f} {xml:8.1f} {chunks:8d} {seconds:8.2f} "
+                  f"{xml / seconds:9.1f} {peak:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
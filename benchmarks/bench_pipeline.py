@@ -0,0 +1,286 @@
+"""
+End-to-end and per-stage indexing/search benchmark on a synthetic corpus.
+
+Stages: crawl, extract, chunk, encode, upsert, index (IndexWorker end-to-end),
+query p50/p95 and cold start. Uses the real FileProcessor, EmbeddingEngine,
+VectorStore and IndexWorker; `--model stub` swaps only the SentenceTransformer
+for a deterministic hashing model so runs are offline and reproducible.
+
+    python -m benchmarks.bench_pipeline --out bench.json
+    python -m benchmarks.bench_pipeline --baseline bench.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.corpus import COUNTS, build_corpus, queries
+
+# Metric name -> True if higher is better
+METRICS = {
+    "crawl.files_per_sec": True,
+    "extract.mb_per_sec": True,
+    "extract.text.mb_per_sec": True,
+    "extract.pdf.mb_per_sec": True,
+    "extract.image.files_per_sec": True,
+    "extract.zip.mb_per_sec": True,
+    "chunk.mb_per_sec": True,
+    "encode.texts_per_sec": True,
+    "upsert.per_sec": True,
+    "index.files_per_sec": True,
+    "index.mb_per_sec": True,
+    "query.p50_ms": False,
+    "query.p95_ms": False,
+    "cold_start.seconds": False,
+    "cold_start.first_query_ms": False,
+}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def _mb(n: int) -> float:
+    return n / 2**20
+
+
+def make_engine(model: str):
+    from app.core.embedding import EmbeddingEngine
+    if model == "stub":
+        from benchmarks.stub_model import HashingModel
+        return EmbeddingEngine(model_name="stub-hashing-384", model=HashingModel())
+    return EmbeddingEngine()
+
+
+# --- ⏱️ Stages ---
+
+def bench_crawl(root: str) -> Dict:
+    start = time.perf_counter()
+    paths = [os.path.join(d, f) for d, _, files in os.walk(root) for f in files]
+    secs = time.perf_counter() - start
+    return {"crawl.files": len(paths), "crawl.files_per_sec": len(paths) / secs}
+
+
+def bench_extract(proc, files: Dict[str, List[str]]) -> Tuple[Dict, List[str]]:
+    from app.core.source import SourceBuffer
+    out, texts, total_bytes, total_secs, errors = {}, [], 0, 0.0, 0
+    for kind, paths in files.items():
+        size, secs = 0, 0.0
+        for path in paths:
+            start = time.perf_counter()
+            try:
+                with SourceBuffer(path) as src:
+                    texts.extend(c["text"] for c in proc.get_smart_chunks(src) if c["text"])
+            except Exception:
+                errors += 1
+            secs += time.perf_counter() - start
+            size += os.path.getsize(path)
+        if paths and secs:
+            out[f"extract.{kind}.mb_per_sec"] = _mb(size) / secs
+            out[f"extract.{kind}.files_per_sec"] = len(paths) / secs
+        total_bytes += size
+        total_secs += secs
+    out["extract.mb_per_sec"] = _mb(total_bytes) / total_secs
+    out["extract.errors"] = errors
+    return out, texts
+
+
+def bench_chunk(backend, texts: List[str]) -> Tuple[Dict, List[str]]:
+    start = time.perf_counter()
+    chunks = [piece for text in texts for piece in backend.chunk_text(text)]
+    secs = time.perf_counter() - start
+    size = sum(len(t.encode()) for t in texts)
+    return {"chunk.count": len(chunks), "chunk.mb_per_sec": _mb(size) / max(secs, 1e-9)}, chunks
+
+
+def bench_encode(engine, chunks: List[str], batch: int) -> Dict:
+    start = time.perf_counter()
+    for i in range(0, len(chunks), batch):
+        engine.encode(chunks[i:i + batch])
+    secs = time.perf_counter() - start
+    return {"encode.texts_per_sec": len(chunks) / secs}
+
+
+def bench_upsert(db, engine, chunks: List[str], batch: int) -> Dict:
+    """Write-behind upserts into a scratch collection next to the real one."""
+    from app.database.write_buffer import WriteBehindBuffer
+    collection = db.client.get_or_create_collection(name="bench_upsert", metadata={"hnsw:space": "cosine"})
+    vectors = [v.tolist() for i in range(0, len(chunks), batch) for v in engine.encode(chunks[i:i + batch])]
+    writer = WriteBehindBuffer(collection)
+    start = time.perf_counter()
+    for i, vector in enumerate(vectors):
+        writer.upsert(f"bench_{i}", vector, {"chunk_id": i})
+    writer.close()
+    secs = time.perf_counter() - start
+    db.client.delete_collection("bench_upsert")
+    return {"upsert.per_sec": len(vectors) / secs}
+
+
+def bench_index(backend, root: str, files: Dict[str, List[str]]) -> Dict:
+    """Full ingestion through IndexWorker, as main.py wires it."""
+    from app.core.indexer import IndexWorker
+    paths = [p for kind in files.values() for p in kind]
+    size = sum(os.path.getsize(p) for p in paths)
+    q = queue.Queue()
+    worker = IndexWorker(q, backend.handle_new_file)
+    start = time.perf_counter()
+    worker.start()
+    for path in paths:
+        q.put(path)
+    q.join()
+    backend.flush_batch()
+    secs = time.perf_counter() - start
+    worker.stop()
+    return {
+        "index.files_per_sec": len(paths) / secs, "index.mb_per_sec": _mb(size) / secs,
+        "index.dead_letters": len(backend.dead_letter_queue),
+    }
+
+
+def bench_query(db, engine, texts: List[str], n: int) -> Dict:
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        db.query(engine.encode(text), n=n)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "query.p50_ms": _percentile(latencies, 0.5) * 1000,
+        "query.p95_ms": _percentile(latencies, 0.95) * 1000,
+    }
+
+
+def bench_cold_start(db_path: str, model: str, query: str) -> Dict:
+    """Fresh interpreter: import, open the populated store, load the model, answer one query."""
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pipeline", "--probe", db_path, "--model", model, "--probe-query", query],
+        capture_output=True, text=True, check=True, cwd=os.getcwd(),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _probe(db_path: str, model: str, query: str):
+    start = time.perf_counter()
+    from app.database.vector_db import VectorStore
+    db = VectorStore(db_path)
+    engine = make_engine(model)
+    engine.model  # Force the (lazy) model load
+    ready = time.perf_counter()
+    db.query(engine.encode(query), n=10)
+    done = time.perf_counter()
+    db.writer.close()
+    print(json.dumps({"cold_start.seconds": done - start, "cold_start.first_query_ms": (done - ready) * 1000}))
+
+
+# --- 📊 Baseline Comparison ---
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Prints a diff table; returns the metrics that regressed by more than `threshold`."""
+    regressions = []
+    print(f"\n{'METRIC':<30} {'BASELINE':>12} {'CURRENT':>12} {'CHANGE':>8}")
+    for name, higher_is_better in METRICS.items():
+        old, new = baseline["metrics"].get(name), results["metrics"].get(name)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<30} {old:12.3f} {new:12.3f} {change:+8.1%}{flag}")
+    if baseline.get("meta", {}).get("corpus") != results["meta"]["corpus"]:
+        print("[!] Corpus differs from the baseline; numbers are not directly comparable")
+    return regressions
+
+
+def run(args) -> Dict:
+    from app.core.logic import SLAMBackend
+    from app.core.processor import FileProcessor
+    from app.database.vector_db import VectorStore
+
+    kinds = args.kinds or [k for k in COUNTS if k != "image" or shutil.which("tesseract")]
+    work = tempfile.mkdtemp(prefix="slam_bench_")
+    try:
+        root = os.path.join(work, "corpus")
+        files = build_corpus(root, args.scale, args.seed, kinds)
+        all_paths = [p for paths in files.values() for p in paths]
+        results = {
+            "meta": {
+                "scale": args.scale, "seed": args.seed, "model": args.model, "kinds": kinds,
+                "python": platform.python_version(), "platform": platform.platform(), "time": time.time(),
+                "corpus": {"files": len(all_paths), "bytes": sum(os.path.getsize(p) for p in all_paths)},
+            },
+            "metrics": {},
+        }
+        m = results["metrics"]
+
+        def stage(name, fn, *a):
+            print(f"[*] {name}...", flush=True)
+            return fn(*a)
+
+        db = VectorStore(os.path.join(work, "db"))
+        engine = make_engine(args.model)
+        proc = FileProcessor()
+        backend = SLAMBackend(db, proc, engine)
+
+        m.update(stage("crawl", bench_crawl, root))
+        extracted, texts = stage("extract", bench_extract, proc, files)
+        m.update(extracted)
+        chunked, chunks = stage("chunk", bench_chunk, backend, texts)
+        m.update(chunked)
+        m.update(stage("encode", bench_encode, engine, chunks, backend.encode_batch))
+        m.update(stage("upsert", bench_upsert, db, engine, chunks[:args.upserts], backend.encode_batch))
+        m.update(stage("index", bench_index, backend, root, files))
+        qs = queries(args.queries, args.seed)
+        m.update(stage("query", bench_query, db, engine, qs, 10))
+        db.writer.close()
+        m.update(stage("cold start", bench_cold_start, db.path, args.model, qs[0]))
+        return results
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="corpus size multiplier")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--kinds", nargs="*", choices=list(COUNTS), help="default: all (images only with tesseract)")
+    parser.add_argument("--model", choices=["stub", "real"], default="stub")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--upserts", type=int, default=5000, help="chunks used for the upsert stage")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument("--probe", help=argparse.SUPPRESS)
+    parser.add_argument("--probe-query", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        _probe(args.probe, args.model, args.probe_query)
+        return
+
+    results = run(args)
+    for name, value in sorted(results["metrics"].items()):
+        print(f"{name:<32} {value:12.3f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[*] Results written to {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"[!] {len(regressions)} metric(s) regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
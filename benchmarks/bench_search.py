@@ -0,0 +1,64 @@
+"""
+Queries/sec: one encode + one Chroma query per query vs the batched path
+(one encode call and one multi-embedding query per block).
+
+    python -m benchmarks.bench_search --docs 20000 --queries 2000 --block 256
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.bench_pipeline import make_engine
+from benchmarks.corpus import queries, sentences, vocabulary
+
+
+def populate(db, engine, n_docs, seed=0, batch=256):
+    rng = random.Random(seed)
+    words = vocabulary(seed)
+    for start in range(0, n_docs, batch):
+        texts = [sentences(rng, words, 2) for _ in range(min(batch, n_docs - start))]
+        for i, vector in enumerate(engine.encode(texts), start):
+            db.upsert(f"doc_{i}", vector.tolist(), {"path": f"/bench/doc_{i}.txt", "chunk_id": 0})
+    db.flush()
+
+
+def bench_single(db, engine, qs, n):
+    start = time.perf_counter()
+    for q in qs:
+        db.query(engine.encode(q), n=n)
+    return len(qs) / (time.perf_counter() - start)
+
+
+def bench_batch(db, engine, qs, n, block):
+    start = time.perf_counter()
+    for i in range(0, len(qs), block):
+        for _ in db.query_batch(engine.encode(qs[i:i + block]), n=n, block=block):
+            pass
+    return len(qs) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--block", type=int, default=256, help="queries per encode/query call")
+    parser.add_argument("-n", type=int, default=10, help="results per query")
+    parser.add_argument("--model", choices=["stub", "real"], default="stub")
+    args = parser.parse_args()
+
+    from app.database.vector_db import VectorStore
+    with tempfile.TemporaryDirectory() as root:
+        db = VectorStore(root)
+        engine = make_engine(args.model)
+        populate(db, engine, args.docs)
+        qs = queries(args.queries)
+        single = bench_single(db, engine, qs, args.n)
+        print(f"single-query : {single:,.0f} queries/s")
+        batched = bench_batch(db, engine, qs, args.n, args.block)
+        print(f"batched ({args.block:>4}): {batched:,.0f} queries/s ({batched / single:.1f}x)")
+        db.writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Upserts/sec: per-file `collection.upsert` commits vs the write-behind buffer.
+
+    python -m benchmarks.bench_write_buffer --files 500 --chunks 8
+"""
+import argparse
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+from app.database.write_buffer import WriteBehindBuffer
+
+
+def make_collection(root, name):
+    client = chromadb.PersistentClient(path=root)
+    return client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+
+
+def fake_files(n_files, n_chunks, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    for f in range(n_files):
+        path = f"/bench/file_{f}.txt"
+        vectors = rng.standard_normal((n_chunks, dim), dtype=np.float32)
+        yield path, [(f"{path}_{i}", v.tolist(), {"path": path, "chunk_id": i}) for i, v in enumerate(vectors)]
+
+
+def bench_per_file(collection, files):
+    total = 0
+    start = time.perf_counter()
+    for _, chunks in files:
+        ids, vecs, metas = zip(*chunks)
+        collection.upsert(ids=list(ids), embeddings=list(vecs), metadatas=list(metas))
+        total += len(chunks)
+    return total, time.perf_counter() - start
+
+
+def bench_buffered(collection, files, max_batch):
+    writer = WriteBehindBuffer(collection, max_batch=max_batch)
+    total = 0
+    start = time.perf_counter()
+    for _, chunks in files:
+        for chunk_id, vec, meta in chunks:
+            writer.upsert(chunk_id, vec, meta)
+        total += len(chunks)
+    writer.close()
+    return total, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--chunks", type=int, default=8, help="chunks per file")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch", type=int, default=256, help="write-behind max_batch")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        files = list(fake_files(args.files, args.chunks, args.dim))
+        n, secs = bench_per_file(make_collection(root, "per_file"), files)
+        base = n / secs
+        print(f"per-file commits : {n} upserts in {secs:.2f}s -> {base:,.0f} upserts/s")
+        n, secs = bench_buffered(make_collection(root, "buffered"), files, args.batch)
+        rate = n / secs
+        print(f"write-behind     : {n} upserts in {secs:.2f}s -> {rate:,.0f} upserts/s ({rate / base:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Deterministic synthetic corpora: the same `seed` and `scale` always produce the
+same files (and, for zips, the same bytes), so benchmark runs are comparable.
+
+    python -m benchmarks.corpus /tmp/slam_corpus --scale 2
+"""
+import argparse
+import io
+import os
+import random
+import zipfile
+from typing import Dict, List
+
+# Fixed member timestamps keep archive bytes reproducible
+ZIP_DATE = (2020, 1, 1, 0, 0, 0)
+
+# Per unit of `scale`
+COUNTS = {"text": 40, "pdf": 8, "image": 4, "zip": 4, "tree": 24}
+
+
+def vocabulary(seed: int = 0, size: int = 3000) -> List[str]:
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(3, 10))) for _ in range(size)]
+
+
+def sentences(rng: random.Random, words: List[str], n: int) -> str:
+    return "\n".join(" ".join(rng.choices(words, k=rng.randint(8, 18))).capitalize() + "." for _ in range(n))
+
+
+def queries(n: int, seed: int = 0) -> List[str]:
+    """Query strings drawn from the corpus vocabulary."""
+    rng = random.Random(seed + 1)
+    words = vocabulary(seed)
+    return [" ".join(rng.choices(words, k=rng.randint(2, 5))) for _ in range(n)]
+
+
+def _write_pdf(path: str, rng: random.Random, words: List[str], pages: int):
+    import fitz
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        y = 72
+        for line in sentences(rng, words, 30).splitlines():
+            page.insert_text((72, y), line[:90], fontsize=10)
+            y += 14
+    doc.save(path, no_new_id=True)
+    doc.close()
+
+
+def _write_image(path: str, rng: random.Random, words: List[str]):
+    from PIL import Image, ImageDraw
+    img = Image.new("L", (1200, 400), 255)
+    draw = ImageDraw.Draw(img)
+    for i in range(8):
+        draw.text((20, 20 + i * 45), " ".join(rng.choices(words, k=8)), fill=0)
+    img.save(path)
+
+
+def _zip_bytes(members: Dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(zipfile.ZipInfo(name, ZIP_DATE), data, zipfile.ZIP_DEFLATED)
+    return buf.getvalue()
+
+
+def build_corpus(root: str, scale: int = 1, seed: int = 0, kinds=None) -> Dict[str, List[str]]:
+    """Writes the corpus under `root`; returns {kind: [paths]}."""
+    kinds = kinds or list(COUNTS)
+    rng = random.Random(seed)
+    words = vocabulary(seed)
+    files: Dict[str, List[str]] = {k: [] for k in kinds}
+    os.makedirs(root, exist_ok=True)
+
+    def emit(kind, path, data=None):
+        if data is not None:
+            with open(path, "wb") as f:
+                f.write(data)
+        files[kind].append(path)
+
+    for kind in kinds:
+        n = COUNTS[kind] * scale
+        base = os.path.join(root, kind)
+        os.makedirs(base, exist_ok=True)
+        for i in range(n):
+            if kind == "text":
+                ext = (".txt", ".md", ".log")[i % 3]
+                # Mostly small files with a few large ones, like a real home directory
+                lines = 4000 if i % 10 == 0 else rng.randint(20, 400)
+                emit(kind, os.path.join(base, f"doc_{i}{ext}"), sentences(rng, words, lines).encode())
+            elif kind == "pdf":
+                path = os.path.join(base, f"report_{i}.pdf")
+                _write_pdf(path, rng, words, pages=1 + i % 12)
+                emit(kind, path)
+            elif kind == "image":
+                path = os.path.join(base, f"scan_{i}.png")
+                _write_image(path, rng, words)
+                emit(kind, path)
+            elif kind == "zip":
+                members = {f"notes/part_{j}.txt": sentences(rng, words, 60).encode() for j in range(6)}
+                if i % 2:
+                    inner = {f"inner_{j}.md": sentences(rng, words, 40).encode() for j in range(3)}
+                    members["nested/inner.zip"] = _zip_bytes(inner)
+                emit(kind, os.path.join(base, f"bundle_{i}.zip"), _zip_bytes(members))
+            elif kind == "tree":
+                parts = [f"level{d}_{rng.randint(0, 2)}" for d in range(1 + i % 5)]
+                folder = os.path.join(base, *parts)
+                os.makedirs(folder, exist_ok=True)
+                emit(kind, os.path.join(folder, f"leaf_{i}.txt"), sentences(rng, words, rng.randint(5, 80)).encode())
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic SLAM benchmark corpus")
+    parser.add_argument("root")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--kinds", nargs="*", choices=list(COUNTS), help="default: all")
+    args = parser.parse_args()
+    files = build_corpus(args.root, args.scale, args.seed, args.kinds)
+    for kind, paths in files.items():
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"{kind:6} {len(paths):5} files {size / 2**20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Deterministic stand-in for SentenceTransformer, so benchmarks run offline and
+give identical vectors on every machine. Tokens are feature-hashed into `dim`
+signed buckets, so texts sharing words still land close together and query
+results stay meaningful.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashingModel:
+    """Implements the subset of `SentenceTransformer.encode` used by `EmbeddingEngine`."""
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _bucket(self, token: str):
+        h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+        return h % self.dim, 1.0 if (h >> 63) else -1.0
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN.findall(text.lower()):
+                idx, sign = self._bucket(token)
+                out[row, idx] += sign
+        if normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out /= np.where(norms == 0, 1.0, norms)
+        return out[0] if single else out
@@ -1,78 +1,547 @@
+import os
 import sys
-import queue
-from PyQt6.QtWidgets import QApplication
+import json
+import time
+import signal
+import argparse
+import contextlib
+import subprocess
+import threading
+
+# Qt, chromadb and the embedding model are imported lazily: the daemon never
+# loads Qt, and the GUI/CLI thin clients never load the model or the store.
 
-from app.core.processor import FileProcessor
-from app.core.embedding import EmbeddingEngine
-from app.core.indexer import IndexWorker, WatcherHandler, Observer
-from app.database.vector_db import VectorStore
-from app.ui.main_window import SLAMGui
-from app.utils.config import ConfigManager
 
 class SLAMBackend:
     def __init__(self):
+        from app.core.processor import FileProcessor
+        from app.core.indexer import IndexWorker, Observer, TieredQueue
+        from app.core.logic import SLAMBackend as IngestionBackend
+        from app.core.sandbox import ExtractionSupervisor
+        from app.database.compactor import IndexCompactor
+        from app.database.vector_db import VectorStore, MULTI_LANE
+        from app.utils.config import ConfigManager
+        from app.utils.memory import memory
+        from app.utils.metrics import metrics, start_metrics_server
+
         # 1. Initialize core components
         self.config = ConfigManager()
-        self.db = VectorStore()
-        self.engine = EmbeddingEngine()
-        self.proc = FileProcessor()
-        
+        budget = self.config.settings.get("memory_budget_mb", 0)
+        # Half of the memory budget may go to Chroma's index segment cache
+        self.db = VectorStore(memory_limit_mb=budget // 2)
+        # Queries must use the model the live collection was built with
+        self.engine = self._make_engine(self.db.active["model"])
+        self._swap_lock = threading.Lock()
+        self.migration = None
+        self.proc = FileProcessor(max_text_bytes=self.config.settings.get("max_text_bytes", 0),
+                                  ocr_gate_threshold=self.config.settings.get("ocr_gate_threshold", 0))
+        # Extraction runs in a supervised subprocess so one bad file can't stall the queue
+        self.sandbox = ExtractionSupervisor(
+            timeout=self.config.settings["extract_timeout"],
+            max_rss_mb=self.config.settings["extract_max_rss_mb"],
+            recycle_after=self.config.settings["extract_recycle_after"],
+            processor_kwargs={"ocr_lang": self.proc.ocr_lang, "max_text_bytes": self.proc.max_text_bytes,
+                              "ocr_gate_threshold": self.proc.ocr_gate.threshold},
+            manifest_path=self.db.manifest.db_path,
+        )
+        # Language routing: non-English text gets its own lane and model (off unless configured)
+        self.router, requeue = self._setup_language_lanes()
+        self.db.dedup.threshold = self.config.settings.get("near_duplicate_threshold", 0)
+        self.indexer = IngestionBackend(self.db, self.proc, self.engine, sandbox=self.sandbox, router=self.router)
+        # Near-duplicates whose canonical changed go back through the queue
+        self.indexer.requeue = self.enqueue
+        self.indexer.max_attempts = self.config.settings.get("dead_letter_max_attempts", 5)
+        self.indexer.retry_backoff = self.config.settings.get("dead_letter_backoff_seconds", 60)
+        self.started = time.time()
+        self.stopping = threading.Event()
+
         # 2. Setup Thread-safe Queue for background indexing
-        self.task_queue = queue.Queue()
-        
+        # Watched roots (see apply_watched_folders); set up before the worker reads them
+        self._watches = {}          # root -> watchdog watch
+        self._unwatched = set()     # Dropped roots: queued paths below them are ignored
+        self._purging = set()
+        self._roots_lock = threading.Lock()
+
+        # New files go ahead of the deferred page ranges of large documents
+        self.task_queue = TieredQueue()
+        metrics.gauge("index_queue_depth", "Files waiting to be indexed", fn=self.task_queue.qsize)
+        metrics.gauge("index_deferred_depth", "Deferred page ranges of large documents", fn=self.task_queue.deferred)
+        unit_pages = self.config.settings.get("progressive_unit_pages", 0)
+        if unit_pages:
+            self.indexer.first_pages = self.config.settings.get("progressive_first_pages", unit_pages)
+            self.indexer.unit_pages = unit_pages
+            self.indexer.defer = self.task_queue.put_low
+        self.metrics_server = None
+        port = self.config.settings.get("metrics_port", 0)
+        if port:
+            try:
+                self.metrics_server = start_metrics_server(port)
+                print(f"[*] Metrics on http://127.0.0.1:{port}/metrics")
+            except OSError as e:
+                print(f"[!] Could not start metrics endpoint: {e}")
+
         # 3. Start the Worker Thread (Consumer)
         # This processes files one-by-one so your CPU doesn't spike
         self.worker = IndexWorker(self.task_queue, self.handle_new_file)
         self.worker.start()
+        # Garbage collection skips files the worker is indexing right now
+        self.compactor = IndexCompactor(self.db, is_busy=self.indexer.is_busy, enqueue=self.enqueue)
+        hours = self.config.settings.get("compact_interval_hours", 0)
+        if hours:
+            self.compactor.run_periodically(hours * 3600, self.stopping)
+        # Failed files are retried once their backoff expires, polled every base backoff (>= 5 s)
+        if self.indexer.max_attempts:
+            self.indexer.retry_periodically(max(self.indexer.retry_backoff, 5), self.stopping)
+
+        # Over budget, shed the preview cache first and the (reloadable) model last
+        memory.budget_mb = budget
+        memory.register("snippet_cache", self.db.snippets.clear_cache, priority=10)
+        memory.register("embedding_model", lambda: self.engine.unload(), priority=90)
+        if self.router:
+            memory.register("multilingual_model", self.router.engines[MULTI_LANE].unload, priority=80)
+        memory.start(self.stopping)
+
+        # 5. Resume (or start) re-embedding if the configured model isn't the live one
+        self._resume_migration()
+        if requeue:
+            print(f"[*] Re-indexing {len(requeue)} file(s) from the retired multilingual lane")
+            self.enqueue(sorted(requeue))
+        # Queued work doesn't survive a restart: finish files left partly indexed or invalidated
+        unfinished = [p for p in self.db.manifest.incomplete_paths() if p not in requeue]
+        if unfinished:
+            print(f"[*] Re-indexing {len(unfinished)} file(s) left incomplete by the last run")
+            self.enqueue(unfinished)
 
         # 4. Initialize and start the Watchdog Observer (Producer)
         self.observer = Observer()
         self.setup_watchers()
         self.observer.start()
 
+    def _make_engine(self, model_name):
+        from app.core.embedding import EmbeddingEngine
+        return EmbeddingEngine(
+            model_name,
+            idle_timeout=self.config.settings.get("model_idle_minutes", 0) * 60,
+            torch_threads=self.config.settings.get("torch_threads", 0),
+        )
+
+    def _setup_language_lanes(self):
+        """Opens the multilingual lane if configured; returns (router, paths needing a re-index)."""
+        from app.database.vector_db import MULTI_LANE
+        model = self.config.settings.get("multilingual_model")
+        lane = self.db.lane_info(MULTI_LANE)
+        requeue = set()
+        if lane and lane["model"] != model:
+            # Routing turned off or its model changed: those chunks are embedded afresh
+            requeue = self.db.close_lane(MULTI_LANE)
+            for path in requeue:
+                for entry in self.db.manifest.sources_for(path):
+                    self.db.manifest.record(entry["id"], path, "", entry["chunks"])
+            lane = None
+        if not model:
+            return None, requeue
+        from app.core.language import LanguageRouter
+        router = LanguageRouter(self._make_engine(model))
+        self.db.open_lane(MULTI_LANE, lane or self.db.collection_info(model, router.engines[MULTI_LANE].dimension))
+        return router, requeue
+
     def setup_watchers(self):
-        """Adds all folders from config to the observer."""
-        handler = WatcherHandler(self.task_queue)
-        watched_paths = self.config.settings.get("watched_folders", [])
-        
-        for path in watched_paths:
+        """Schedules the configured folders; later edits to the list are applied live."""
+        from app.core.indexer import WatcherHandler
+        self.watch_handler = WatcherHandler(self.task_queue)
+        self.apply_watched_folders(self.config.settings.get("watched_folders", []))
+        self.config.watch(self._on_config_change, self.stopping)
+
+    def _on_config_change(self, changes):
+        if "watched_folders" in changes:
+            self.apply_watched_folders(changes["watched_folders"][1] or [])
+        later = sorted(k for k in changes if k not in ("watched_folders", "theme"))
+        if later:
+            print(f"[*] Config changed ({', '.join(later)}); takes effect after a restart")
+
+    def apply_watched_folders(self, folders):
+        """
+        Brings the observer in line with `folders`: unschedules dropped roots
+        and schedules new ones. Only new roots are crawled and only dropped
+        roots purged. The manifest remembers which roots the index covers
+        (and purges still running), so a restart does neither again.
+        """
+        meta = self.db.manifest
+        wanted = {os.path.abspath(f) for f in folders}
+        with self._roots_lock:
+            for root in sorted(self._watches.keys() - wanted):
+                self.observer.unschedule(self._watches.pop(root))
+                print(f"[*] Stopped watching: {root}")
+            for root in sorted(wanted - self._watches.keys()):
+                try:
+                    self._watches[root] = self.observer.schedule(self.watch_handler, root, recursive=True)
+                    print(f"[*] Now watching: {root}")
+                except Exception as e:
+                    print(f"[!] Could not watch {root}: {e}")
+            indexed = meta.get_meta("watched_roots")
+            if indexed is None:
+                # First start that tracks roots: take the index as matching the config
+                indexed = sorted(self._watches)
+            indexed = set(indexed)
+            added = sorted(r for r in self._watches.keys() - indexed if not _below(r, wanted - {r}))
+            removed = (indexed - wanted) | (set(meta.get_meta("purging_roots", [])) - wanted)
+            meta.set_meta("watched_roots", sorted(indexed - removed))
+            meta.set_meta("purging_roots", sorted(removed) or None)
+            self._unwatched = {r for r in self._unwatched | removed if not _below(r, wanted)}
+            removed -= self._purging
+            self._purging |= removed
+        for root in added:
+            threading.Thread(target=self._crawl, args=(root,), name="SLAM-Crawl", daemon=True).start()
+        for root in sorted(removed):
+            threading.Thread(target=self._purge, args=(root,), name="SLAM-Purge", daemon=True).start()
+
+    def _crawl(self, root):
+        """Queues every file below a newly watched root (unchanged ones are skipped by their stat)."""
+        from app.utils.diagnostics import log_dir
+        from app.utils.file_filter import EXCLUDE_DIRS, should_exclude
+        # SLAM's own database and logs may live below a watched folder
+        own = {os.path.realpath(self.db.path), os.path.realpath(log_dir)}
+        queued, stack = 0, [root]
+        while stack:
+            if root not in self._watches:
+                print(f"[*] Crawl of {root} stopped: no longer watched")
+                return
             try:
-                self.observer.schedule(handler, path, recursive=True)
-                print(f"[*] Now watching: {path}")
-            except Exception as e:
-                print(f"[!] Could not watch {path}: {e}")
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in EXCLUDE_DIRS and os.path.realpath(entry.path) not in own:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and not should_exclude(entry.path):
+                            self.task_queue.put(entry.path)
+                            queued += 1
+            except OSError as e:
+                print(f"[!] Could not list {e.filename}: {e.strerror}")
+        with self._roots_lock:
+            roots = set(self.db.manifest.get_meta("watched_roots", []))
+            self.db.manifest.set_meta("watched_roots", sorted(roots | {root}))
+        print(f"[*] Crawled {root}: {queued} file(s) queued")
+
+    def _purge(self, root):
+        """Drops the index entries of a root that is no longer watched (folders still watched below it stay)."""
+        purged = self.indexer.purge_under(root, keep=list(self._watches),
+                                          cancelled=lambda: root in self._watches)
+        with self._roots_lock:
+            self._purging.discard(root)
+            purging = set(self.db.manifest.get_meta("purging_roots", [])) - {root}
+            self.db.manifest.set_meta("purging_roots", sorted(purging) or None)
+        print(f"[*] Purged {purged} file(s) under {root}")
 
     def handle_new_file(self, path):
-        """The core indexing logic called by the background worker."""
+        """The core indexing logic called by the background worker (a path or a deferred page range)."""
+        target = getattr(path, "path", path)
+        if self._unwatched and _below(target, self._unwatched) and not _below(target, self._watches):
+            return  # Queued before its folder was removed from the watch list
         print(f"[*] Processing: {path}")
-        text = self.proc.extract_text(path)
-        
-        if text:
-            # Generate the semantic vector (AI)
-            vector = self.engine.encode(text)
-            
-            # Store in the Vector Database
-            metadata = {
-                "path": str(path),
-                "filename": str(path).split('/')[-1]
-            }
-            self.db.collection.upsert(
-                ids=[str(path)], 
-                embeddings=[vector.tolist()], 
-                metadatas=[metadata]
-            )
-            print(f"[✅] Indexed: {metadata['filename']}")
+        # Chunked, deduplicated ingestion (archive members get `archive!member` ids)
+        self.indexer.handle_new_file(path)
+
+    # --- 🔎 Query API (served over IPC by the daemon, called directly in-process) ---
+
+    def _query_targets(self):
+        """{lane: (engine, collection)}, read together so a model swap can't split a pair."""
+        from app.database.vector_db import DEFAULT_LANE
+        with self._swap_lock:
+            targets = {DEFAULT_LANE: (self.engine, self.db.collection)}
+            if self.router:
+                for lane, engine in self.router.engines.items():
+                    collection = self.db.lanes.get(lane)
+                    # An empty lane isn't worth loading its model for
+                    if collection is not None and collection.count():
+                        targets[lane] = (engine, collection)
+            return targets
+
+    def _lanes_for(self, query, targets):
+        from app.database.vector_db import DEFAULT_LANE
+        if len(targets) == 1:
+            return [DEFAULT_LANE]
+        return [lane for lane in self.router.query_lanes(query) if lane in targets] or [DEFAULT_LANE]
+
+    def search(self, query, n=10):
+        from app.database.vector_db import fuse_results
+        targets = self._query_targets()
+        k = self._fetch_count(n)
+        lists = [self.db.query(targets[lane][0].encode(query), n=k, collection=targets[lane][1])
+                 for lane in self._lanes_for(query, targets)]
+        return self._collapse(fuse_results(lists, k), n)
+
+    def search_batch(self, queries, n=10, block=256):
+        """
+        Streams {"index", "results"} per query. Each block of queries is
+        embedded with one encode call per lane and answered by one
+        multi-vector query per lane.
+        """
+        from app.database.vector_db import fuse_results
+        queries = list(queries)
+        targets = self._query_targets()
+        k = self._fetch_count(n)
+        for start in range(0, len(queries), block):
+            part = queries[start:start + block]
+            lanes_of = [self._lanes_for(q, targets) for q in part]
+            lists = [[] for _ in part]
+            for lane, (engine, collection) in targets.items():
+                idx = [i for i, lanes in enumerate(lanes_of) if lane in lanes]
+                if not idx:
+                    continue
+                vectors = engine.encode([part[i] for i in idx])
+                for i, results in zip(idx, self.db.query_batch(vectors, n=k, block=block, collection=collection)):
+                    lists[i].append(results)
+            for i, results in enumerate(lists, start):
+                yield {"index": i, "results": self._collapse(fuse_results(results, k), n)}
+
+    def _fetch_count(self, n):
+        # Duplicate groups collapse to one hit, so over-fetch while any exist
+        dedup = self.db.dedup
+        return 2 * n if dedup.enabled and dedup.has_groups() else n
+
+    def _collapse(self, results, n):
+        """One hit per near-duplicate group, listing the group's other files."""
+        if self._fetch_count(n) > n:
+            return self.db.dedup.collapse(results, n)
+        return results[:n]
+
+    def snippet(self, chunk_id):
+        return self.db.snippets.get(chunk_id)
+
+    def enqueue(self, paths):
+        for path in paths:
+            self.task_queue.put(os.path.abspath(path))
+        return len(paths)
+
+    def warm(self):
+        """Starts reloading an idle-unloaded model so the query being typed doesn't wait for it."""
+        if not self.engine.loaded:
+            threading.Thread(target=lambda: self.engine.model, name="SLAM-Warm", daemon=True).start()
+        return self.engine.loaded
+
+    # --- 🔁 Model Migration ---
+
+    def switch_model(self, model_name):
+        """
+        Re-embeds the index with `model_name` in the background; search keeps
+        using the current model until the new collection is swapped in.
+        """
+        from app.core.migration import ReembedMigration
+        running = self.migration and self.migration.state not in ("done", "failed", "aborted", "stopped")
+        if running and self.migration.target["model"] == model_name:
+            return self.migration.status()
+        if running:
+            self.migration.abort()
+        self.config.settings["embedding_model"] = model_name
+        self.config.save_config()
+        if model_name == self.db.active["model"]:
+            self.migration = None
+            return {"state": "done", "model": model_name}
+        self.migration = ReembedMigration(self.db, self._make_engine(model_name), quiesce=self._quiesce,
+                                          swap_lock=self._swap_lock, on_swap=self._on_model_swap,
+                                          enqueue=self.enqueue)
+        self.migration.start()
+        return self.migration.status()
+
+    def _resume_migration(self):
+        from app.core.migration import CHECKPOINT_KEY
+        wanted = self.config.settings.get("embedding_model") or self.db.active["model"]
+        checkpoint = self.db.manifest.get_meta(CHECKPOINT_KEY)
+        if checkpoint and checkpoint["model"] != wanted:
+            # Config moved on since that migration started
+            self.db.drop_collection(checkpoint["name"])
+            self.db.manifest.set_meta(CHECKPOINT_KEY, None)
+        if wanted != self.db.active["model"]:
+            print(f"[*] Re-embedding index for {wanted} in the background")
+            self.switch_model(wanted)
+
+    @contextlib.contextmanager
+    def _quiesce(self):
+        # Final catch-up and swap run with ingestion and compaction held off
+        with self.compactor.lock, self.indexer.paused():
+            yield
+
+    def _on_model_swap(self, engine):
+        old, self.engine = self.engine, engine
+        self.indexer.engine = engine
+        old.unload()
+        print(f"[*] Search switched to {engine.model_name}")
+
+    def compact(self, dry_run=False):
+        """Reconciles the index with the manifest and disk; dry_run only reports (fsck)."""
+        return self.compactor.run(dry_run=dry_run)
+
+    # --- 💾 Snapshots ---
+
+    def _engines(self):
+        from app.database.vector_db import DEFAULT_LANE
+        return {DEFAULT_LANE: self.engine, **(self.router.engines if self.router else {})}
+
+    def export_snapshot(self, dest, dtype="float16"):
+        """Writes the index to the directory `dest` for bulk import on another machine."""
+        with self.indexer.paused():
+            return self.db.export_snapshot(os.path.abspath(dest), engines=self._engines(), dtype=dtype)
+
+    def import_snapshot(self, src, remap=None):
+        """
+        Loads a snapshot exported elsewhere (same embedding model), rewriting
+        path prefixes per `remap`; files that differ on this disk are then
+        re-indexed in the background.
+        """
+        from app.database.snapshot import reconcile
+        with self.compactor.lock, self.indexer.paused():
+            summary = self.db.import_snapshot(os.path.abspath(src), remap=remap, engines=self._engines())
+        paths = summary.pop("paths")
+        threading.Thread(
+            target=lambda: print(f"[*] Snapshot reconciled: {reconcile(self.db, paths, self.enqueue, self.indexer.get_file_hash)}"),
+            name="SLAM-Reconcile", daemon=True,
+        ).start()
+        return summary
+
+    def status(self):
+        from app.database.vector_db import MULTI_LANE
+        from app.utils.diagnostics import status_snapshot
+        return {
+            **status_snapshot(),
+            "uptime": time.time() - self.started,
+            "model": self.engine.model_name,
+            "multilingual_model": self.router.engines[MULTI_LANE].model_name if self.router else None,
+            "collection": self.db.active["name"],
+            "migration": self.migration.status() if self.migration else None,
+            "model_loaded": self.engine.loaded,
+            "watched_folders": self.config.settings.get("watched_folders", []),
+            "dead_letters": len(self.db.manifest.dead_letters()),
+        }
+
+    def api(self):
+        return {
+            "ping": lambda: "pong",
+            "search": self.search,
+            "search_batch": self.search_batch,
+            "snippet": self.snippet,
+            "enqueue": self.enqueue,
+            "status": self.status,
+            "compact": self.compact,
+            "warm": self.warm,
+            "switch_model": self.switch_model,
+            "export_snapshot": self.export_snapshot,
+            "import_snapshot": self.import_snapshot,
+        }
+
+    def close(self):
+        self.stopping.set()
+        if self.migration:
+            self.migration.stop()  # Checkpointed; resumes on the next start
+        self.observer.stop()
+        self.worker.stop()
+        self.sandbox.close()
+        self.db.flush()
+
+
+def _below(path, roots):
+    return any(path.startswith(os.path.join(root, "")) for root in roots)
+
+
+def run_daemon(address):
+    """Headless mode: owns the model, store, watchers and index queue; serves local clients."""
+    from app.core.ipc import IPCServer
+    backend = SLAMBackend()
+    server = IPCServer(backend.api(), address)
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    server.start()
+    print(f"[*] SLAM daemon listening on {server.address}")
+    # Warm the model now so the first client query doesn't pay for the load
+    backend.engine.model
+    stop.wait()
+    print("[*] Shutting down...")
+    server.close()
+    backend.close()
+
+
+def connect(address, autostart=True, wait=60.0):
+    """Client for the daemon at `address`, starting a background daemon if none is running."""
+    from app.core.ipc import SLAMClient
+    client = SLAMClient(address)
+    if client.ping() or not autostart:
+        return client
+    print("[*] Starting SLAM daemon...")
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--daemon"] + (["--address", address] if address else []),
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if client.ping():
+            return client
+        time.sleep(0.2)
+    raise ConnectionError(f"SLAM daemon did not come up within {wait:.0f}s")
+
+
+def run_gui(backend):
+    from PyQt6.QtWidgets import QApplication
+    from app.ui.main_window import SLAMGui
 
-if __name__ == "__main__":
     # Initialize the Qt Application
     app = QApplication(sys.argv)
-    
-    # Initialize the Backend Engine
-    backend = SLAMBackend()
-    
+
     # Launch the GUI
     gui = SLAMGui(backend)
     gui.show()
-    
+
     # Standard exit procedure
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SLAM: Smart Local Assets Manager")
+    parser.add_argument("--daemon", action="store_true", help="run headless: index and serve the IPC API")
+    parser.add_argument("--standalone", action="store_true", help="GUI with an in-process backend (no daemon)")
+    parser.add_argument("--address", default="", help="Unix socket path or host:port (default: slam_db/slam.sock)")
+    parser.add_argument("--search", metavar="QUERY", help="query the daemon and print results as JSON")
+    parser.add_argument("--batch", metavar="FILE", help="run one query per line of FILE ('-' for stdin); prints JSON lines")
+    parser.add_argument("-n", type=int, default=10, help="results per query for --search/--batch")
+    parser.add_argument("--status", action="store_true", help="print the daemon's index status as JSON")
+    parser.add_argument("--enqueue", nargs="+", metavar="PATH", help="ask the daemon to (re)index files")
+    parser.add_argument("--fsck", action="store_true", help="verify the index against the manifest and disk; changes nothing")
+    parser.add_argument("--switch-model", metavar="NAME", help="re-embed the index with another model in the background")
+    parser.add_argument("--compact", action="store_true", help="delete orphaned/stale chunks and requeue inconsistent files")
+    parser.add_argument("--export-snapshot", metavar="DIR", help="write the index to DIR for bulk import elsewhere")
+    parser.add_argument("--import-snapshot", metavar="DIR", help="load an exported index from DIR (same embedding model)")
+    parser.add_argument("--remap", action="append", default=[], metavar="OLD=NEW",
+                        help="with --import-snapshot: rewrite the path prefix OLD to NEW (repeatable)")
+    args = parser.parse_args()
+
+    if args.daemon:
+        run_daemon(args.address)
+    elif (args.search or args.status or args.enqueue or args.batch or args.fsck or args.compact or args.switch_model
+          or args.export_snapshot or args.import_snapshot):
+        client = connect(args.address)
+        if args.export_snapshot:
+            print(json.dumps(client.export_snapshot(os.path.abspath(args.export_snapshot)), indent=2))
+        if args.import_snapshot:
+            remap = dict(r.split("=", 1) for r in args.remap)
+            print(json.dumps(client.import_snapshot(os.path.abspath(args.import_snapshot), remap=remap), indent=2))
+        if args.switch_model:
+            print(json.dumps(client.switch_model(args.switch_model), indent=2))
+        if args.fsck or args.compact:
+            print(json.dumps(client.compact(dry_run=not args.compact), indent=2))
+        if args.enqueue:
+            print(json.dumps({"queued": client.enqueue([os.path.abspath(p) for p in args.enqueue])}))
+        if args.status:
+            print(json.dumps(client.status(), indent=2))
+        if args.search:
+            print(json.dumps(client.search(args.search, n=args.n), indent=2))
+        if args.batch:
+            with (sys.stdin if args.batch == "-" else open(args.batch)) as f:
+                queries = [line.strip() for line in f if line.strip()]
+            # Results stream back per query; print each as soon as it arrives
+            for item in client.search_batch(queries, n=args.n):
+                print(json.dumps({"query": queries[item["index"]], "results": item["results"]}), flush=True)
+    elif args.standalone:
+        run_gui(SLAMBackend())
+    else:
+        # Thin client: one warm daemon serves every GUI and script
+        run_gui(connect(args.address))